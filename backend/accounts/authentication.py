@@ -0,0 +1,38 @@
+from django.core.exceptions import ObjectDoesNotExist
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from core import cache_respuestas
+
+
+class JWTAuthenticationConCache(JWTAuthentication):
+    """
+    JWTAuthentication que guarda en caché el usuario (con su perfil ya
+    cargado) bajo "auth:<user_id>" + jti. Con el caché caliente, autenticar
+    no hace consultas. Se invalida al guardar o borrar el usuario o su
+    perfil (accounts.signals, core.signals).
+    """
+
+    def get_user(self, validated_token):
+        try:
+            usuario_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken("El token no identifica a un usuario") from e
+
+        return cache_respuestas.obtener_o_calcular(
+            f'auth:{usuario_id}', [validated_token.get(api_settings.JTI_CLAIM)], 'auth',
+            lambda: self._cargar_usuario(validated_token),
+        )
+
+    def _cargar_usuario(self, validated_token):
+        usuario = super().get_user(validated_token)
+        # Snapshot del perfil en el caché de relaciones: viaja pickleado con el
+        # usuario y `usuario.perfil` (o su ausencia) ya no consulta la base.
+        relacion = type(usuario).perfil.related
+        try:
+            perfil = relacion.related_model.objects.get(estudiante=usuario)
+        except ObjectDoesNotExist:
+            perfil = None
+        relacion.set_cached_value(usuario, perfil)
+        return usuario
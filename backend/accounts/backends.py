@@ -0,0 +1,22 @@
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .correo import encolar
+
+
+class ColaEmailBackend(BaseEmailBackend):
+    """
+    EMAIL_BACKEND que no habla con el servidor de correo: encola los mensajes
+    en CorreoSaliente y retorna de inmediato. El envío real lo hace
+    `manage.py enviar_correos` (o los workers opcionales de accounts.correo)
+    con settings.EMAIL_COLA['BACKEND_REAL'].
+    """
+
+    def send_messages(self, email_messages):
+        if not email_messages:
+            return 0
+        try:
+            return encolar(email_messages)
+        except Exception:
+            if not self.fail_silently:
+                raise
+            return 0
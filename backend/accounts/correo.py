@@ -0,0 +1,200 @@
+"""
+Envío de correos en segundo plano.
+
+ColaEmailBackend (accounts.backends) solo inserta en CorreoSaliente; los
+workers de este módulo reclaman lotes de la bandeja, los envían reutilizando
+una sola conexión SMTP por lote y reintentan con backoff exponencial.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import CorreoSaliente
+
+logger = logging.getLogger(__name__)
+
+_despertar = threading.Event()
+_workers = []
+_workers_lock = threading.Lock()
+
+
+def config(nombre):
+    return settings.EMAIL_COLA[nombre]
+
+
+# ----------------------- ENCOLAR -----------------------
+
+def encolar(mensajes):
+    """Guarda los EmailMessage en la bandeja de salida con un solo INSERT."""
+    filas = []
+    for mensaje in mensajes:
+        html = next(
+            (contenido for contenido, tipo in getattr(mensaje, 'alternatives', []) if tipo == 'text/html'),
+            None,
+        )
+        if mensaje.attachments:
+            logger.warning("Correo '%s' con adjuntos: los adjuntos no se encolan", mensaje.subject)
+        filas.append(CorreoSaliente(
+            asunto=mensaje.subject,
+            cuerpo=mensaje.body,
+            html=html,
+            remitente=mensaje.from_email or settings.DEFAULT_FROM_EMAIL,
+            destinatarios=list(mensaje.to),
+            cc=list(mensaje.cc),
+            bcc=list(mensaje.bcc),
+            reply_to=list(mensaje.reply_to),
+            headers=dict(mensaje.extra_headers),
+        ))
+    CorreoSaliente.objects.bulk_create(filas)
+    transaction.on_commit(_despertar.set)
+    return len(filas)
+
+
+def _a_mensaje(correo, conexion):
+    mensaje = EmailMultiAlternatives(
+        subject=correo.asunto,
+        body=correo.cuerpo,
+        from_email=correo.remitente,
+        to=correo.destinatarios,
+        cc=correo.cc,
+        bcc=correo.bcc,
+        reply_to=correo.reply_to,
+        headers=correo.headers,
+        connection=conexion,
+    )
+    if correo.html:
+        mensaje.attach_alternative(correo.html, 'text/html')
+    return mensaje
+
+
+# ----------------------- ENTREGAR -----------------------
+
+def reclamar_lote(tamano=None):
+    """
+    Marca como 'enviando' un lote de correos listos y lo devuelve. El UPDATE
+    condicionado por estado evita que dos workers tomen el mismo correo.
+    """
+    ahora = timezone.now()
+    vencido = ahora - timedelta(seconds=config('RECLAMO_VENCE_SEGUNDOS'))
+    candidatos = list(
+        CorreoSaliente.objects.filter(
+            Q(estado='pendiente', proximo_intento__lte=ahora)
+            | Q(estado='enviando', reclamado_en__lt=vencido)  # worker caído a mitad de envío
+        ).order_by('proximo_intento', 'pk').values_list('pk', flat=True)[:tamano or config('LOTE')]
+    )
+    if not candidatos:
+        return []
+
+    lote = uuid.uuid4()
+    CorreoSaliente.objects.filter(pk__in=candidatos).filter(
+        Q(estado='pendiente') | Q(estado='enviando', reclamado_en__lt=vencido)
+    ).update(estado='enviando', lote=lote, reclamado_en=ahora)
+    return list(CorreoSaliente.objects.filter(lote=lote, estado='enviando'))
+
+
+def entregar_pendientes(tamano=None):
+    """
+    Envía un lote por una sola conexión del backend real.
+    Devuelve (enviados, fallidos).
+    """
+    correos = reclamar_lote(tamano)
+    if not correos:
+        return 0, 0
+
+    enviados = fallidos = 0
+    conexion = get_connection(config('BACKEND_REAL'), fail_silently=False)
+    try:
+        conexion.open()
+    except Exception as error:
+        for correo in correos:
+            _registrar_fallo(correo, error)
+        return 0, len(correos)
+
+    try:
+        for correo in correos:
+            inicio = time.perf_counter()
+            try:
+                _a_mensaje(correo, conexion).send()
+            except Exception as error:
+                _registrar_fallo(correo, error)
+                fallidos += 1
+                continue
+            CorreoSaliente.objects.filter(pk=correo.pk).update(
+                estado='enviado',
+                enviado_en=timezone.now(),
+                latencia_ms=round((time.perf_counter() - inicio) * 1000, 2),
+                intentos=correo.intentos + 1,
+                ultimo_error=None,
+            )
+            enviados += 1
+    finally:
+        conexion.close()
+    return enviados, fallidos
+
+
+def _registrar_fallo(correo, error):
+    intentos = correo.intentos + 1
+    agotado = intentos >= config('MAX_INTENTOS')
+    espera = config('BACKOFF_BASE_SEGUNDOS') * (2 ** (intentos - 1))
+    CorreoSaliente.objects.filter(pk=correo.pk).update(
+        estado='fallido' if agotado else 'pendiente',
+        intentos=intentos,
+        ultimo_error=str(error)[:2000],
+        proximo_intento=timezone.now() + timedelta(seconds=espera),
+    )
+    logger.warning("Falló el envío del correo %s (intento %s): %s", correo.pk, intentos, error)
+
+
+def vaciar_cola():
+    """Entrega lotes hasta que no queden correos listos. Devuelve (enviados, fallidos)."""
+    total_enviados = total_fallidos = 0
+    while True:
+        enviados, fallidos = entregar_pendientes()
+        total_enviados += enviados
+        total_fallidos += fallidos
+        if not enviados and not fallidos:
+            return total_enviados, total_fallidos
+
+
+# ----------------------- WORKERS EN PROCESO -----------------------
+
+class WorkerCorreo(threading.Thread):
+    def __init__(self, numero):
+        super().__init__(name=f'correo-{numero}', daemon=True)
+        self.detenido = threading.Event()
+
+    def run(self):
+        while not self.detenido.is_set():
+            try:
+                enviados, fallidos = entregar_pendientes()
+            except Exception:
+                logger.exception("Falló el worker de correo")
+                enviados = fallidos = 0
+            finally:
+                connections.close_all()
+            if not enviados and not fallidos:
+                _despertar.wait(config('INTERVALO_SONDEO'))
+                _despertar.clear()
+
+    def detener(self):
+        self.detenido.set()
+        _despertar.set()
+
+
+def iniciar_workers():
+    with _workers_lock:
+        if not _workers:
+            for numero in range(config('WORKERS')):
+                worker = WorkerCorreo(numero)
+                worker.start()
+                _workers.append(worker)
+    return _workers
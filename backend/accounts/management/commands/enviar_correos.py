@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.correo import config, entregar_pendientes, vaciar_cola
+
+
+class Command(BaseCommand):
+    help = (
+        "Entrega los correos pendientes de la bandeja de salida. "
+        "Con --continuo se queda sondeando la cola (para correr como servicio)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--continuo', action='store_true')
+
+    def handle(self, *args, **opts):
+        if not opts['continuo']:
+            enviados, fallidos = vaciar_cola()
+            self.stdout.write(self.style.SUCCESS(f"{enviados} enviados, {fallidos} fallidos."))
+            return
+
+        while True:
+            enviados, fallidos = entregar_pendientes()
+            if enviados or fallidos:
+                self.stdout.write(f"{enviados} enviados, {fallidos} fallidos.")
+            else:
+                time.sleep(config('INTERVALO_SONDEO'))
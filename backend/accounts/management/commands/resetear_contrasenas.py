@@ -0,0 +1,30 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.reset import solicitar_reset_lote
+
+
+class Command(BaseCommand):
+    help = (
+        "Emite correos de reseteo de contraseña en lote, sin pasar por HTTP. "
+        "Con --invalidar las contraseñas actuales dejan de servir (rotación forzada)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('emails', nargs='*', help="Correos de las cuentas a resetear.")
+        parser.add_argument('--todos', action='store_true', help="Todas las cuentas activas.")
+        parser.add_argument('--invalidar', action='store_true')
+        parser.add_argument('--lote', type=int, default=200)
+
+    def handle(self, *args, **opts):
+        if not opts['emails'] and not opts['todos']:
+            raise CommandError("Indica correos o usa --todos.")
+
+        usuarios = get_user_model().objects.filter(is_active=True).order_by('pk')
+        if not opts['todos']:
+            usuarios = usuarios.filter(email__in=opts['emails'])
+
+        total = solicitar_reset_lote(
+            usuarios, invalidar_actual=opts['invalidar'], tamano_lote=opts['lote']
+        )
+        self.stdout.write(self.style.SUCCESS(f"{total} correo(s) de reseteo encolado(s)."))
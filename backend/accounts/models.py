@@ -1,6 +1,7 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 
 class CustomUserManager(BaseUserManager):  #Superusuario Personalizado
     def create_user(self, email, password=None, **extra_fields):
@@ -49,3 +50,43 @@ class User(AbstractUser): #Usuario Estudiante o Admin Interu
 
     def __str__(self):
         return self.email
+
+
+class CorreoSaliente(models.Model):
+    """
+    Bandeja de salida: los correos de djoser (activación, reset) se guardan
+    aquí y los entrega un worker en segundo plano (ver accounts.correo).
+    """
+    ESTADO_CHOICES = (
+        ('pendiente', 'Pendiente'),
+        ('enviando', 'Enviando'),
+        ('enviado', 'Enviado'),
+        ('fallido', 'Fallido'),
+    )
+    asunto = models.CharField(max_length=998)
+    cuerpo = models.TextField(blank=True)
+    html = models.TextField(blank=True, null=True)
+    remitente = models.CharField(max_length=254)
+    destinatarios = models.JSONField(default=list)
+    cc = models.JSONField(default=list, blank=True)
+    bcc = models.JSONField(default=list, blank=True)
+    reply_to = models.JSONField(default=list, blank=True)
+    headers = models.JSONField(default=dict, blank=True)
+
+    estado = models.CharField(max_length=10, choices=ESTADO_CHOICES, default='pendiente')
+    intentos = models.PositiveIntegerField(default=0)
+    ultimo_error = models.TextField(blank=True, null=True)
+    creado = models.DateTimeField(auto_now_add=True)
+    proximo_intento = models.DateTimeField(default=timezone.now)
+    lote = models.UUIDField(blank=True, null=True)
+    reclamado_en = models.DateTimeField(blank=True, null=True)
+    enviado_en = models.DateTimeField(blank=True, null=True)
+    latencia_ms = models.FloatField(blank=True, null=True)  # duración del envío SMTP
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['estado', 'proximo_intento'], name='correo_cola_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.asunto} -> {', '.join(self.destinatarios)} ({self.estado})"
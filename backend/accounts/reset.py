@@ -0,0 +1,147 @@
+"""
+Flujo de reseteo de contraseña en proceso, sin llamadas HTTP a la propia API.
+
+Lo usan la vista de solicitud (PasswordResetView), la de confirmación
+(PasswordResetConfirmView) y el comando `resetear_contrasenas` para resets
+masivos (p. ej. una rotación forzada).
+"""
+
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import get_connection
+from django.db import transaction
+from django.utils import timezone
+from django.utils.http import urlsafe_base64_decode
+from djoser.compat import get_user_email
+from djoser.conf import settings as djoser_settings
+from rest_framework.throttling import BaseThrottle
+
+from core import cache_respuestas
+
+logger = logging.getLogger(__name__)
+
+
+def _correo_reset(usuario, request=None):
+    """Arma y renderiza el correo de djoser con su uid/token, sin enviarlo."""
+    correo = djoser_settings.EMAIL.password_reset(request, {'user': usuario})
+    correo.render()
+    correo.to = [get_user_email(usuario)]
+    correo.from_email = settings.DEFAULT_FROM_EMAIL
+    correo.request = None
+    return correo
+
+
+def solicitar_reset(usuario, request=None):
+    """Envía (encola) el correo de reseteo a un usuario."""
+    return solicitar_reset_lote([usuario], request=request)
+
+
+def solicitar_reset_lote(usuarios, request=None, invalidar_actual=False, tamano_lote=200):
+    """
+    Emite el correo de reseteo para muchos usuarios. Cada lote se entrega en
+    una sola llamada a send_messages (con ColaEmailBackend, un solo INSERT).
+    Con invalidar_actual=True la contraseña actual deja de servir antes de
+    generar el token (rotación forzada). Devuelve cuántos correos se emitieron.
+    """
+    total = 0
+    conexion = get_connection()
+    lote = []
+
+    def emitir(lote):
+        with transaction.atomic():
+            if invalidar_actual:
+                for usuario in lote:
+                    usuario.set_unusable_password()
+                type(lote[0]).objects.bulk_update(lote, ['password'])
+                # bulk_update no emite post_save: se invalida a mano
+                ids = [u.pk for u in lote]
+                transaction.on_commit(lambda: cache_respuestas.invalidar_autenticacion(*ids))
+            # El token depende del hash de la contraseña: se genera después de invalidarla
+            return conexion.send_messages([_correo_reset(u, request) for u in lote]) or 0
+
+    iterable = usuarios.iterator(chunk_size=tamano_lote) if hasattr(usuarios, 'iterator') else usuarios
+    for usuario in iterable:
+        lote.append(usuario)
+        if len(lote) >= tamano_lote:
+            total += emitir(lote)
+            lote = []
+    if lote:
+        total += emitir(lote)
+
+    logger.info("Reseteo de contraseña emitido para %s usuario(s)", total)
+    return total
+
+
+def confirmar_reset(usuario, nueva_password, request=None):
+    """Aplica la nueva contraseña. El token usado queda inválido al cambiar el hash."""
+    usuario.set_password(nueva_password)
+    usuario.last_login = timezone.now()
+    usuario.save(update_fields=['password', 'last_login'])
+
+    if djoser_settings.PASSWORD_CHANGED_EMAIL_CONFIRMATION:
+        djoser_settings.EMAIL.password_changed_confirmation(request, {'user': usuario}).send(
+            [get_user_email(usuario)]
+        )
+    return usuario
+
+
+# ----------------------- PROTECCIÓN DE LA CONFIRMACIÓN -----------------------
+
+def _config(nombre):
+    return settings.RESET_CONFIRMACION[nombre]
+
+
+def uid_a_pk(uid):
+    """
+    pk del usuario codificado en el uid, o None si no es válido. Variantes del
+    mismo uid ("MQ", "MQ==", "MDE") dan el mismo pk: los límites y el caché
+    de tokens rechazados usan este valor y no el texto recibido.
+    """
+    try:
+        return str(int(urlsafe_base64_decode(uid).decode()))
+    except (ValueError, TypeError, OverflowError, UnicodeDecodeError):
+        return None
+
+
+def _clave_token(uid, token):
+    digest = hashlib.sha256(f'{uid_a_pk(uid) or "invalido"}:{token}'.encode()).hexdigest()
+    return f'reset:token_rechazado:{digest}'
+
+
+def token_rechazado(uid, token):
+    """True si el token ya se usó o ya falló: se rechaza sin tocar la base."""
+    return cache.get(_clave_token(uid, token)) is not None
+
+
+def rechazar_token(uid, token, motivo):
+    """Recuerda un token usado o inválido por lo que dura un token de reset."""
+    cache.set(_clave_token(uid, token), motivo, _config('TTL_TOKENS_RECHAZADOS'))
+
+
+def _contar(clave, ventana):
+    # Ventana fija: add() crea el contador solo si no existe, incr() es atómico
+    cache.add(clave, 0, ventana)
+    try:
+        return cache.incr(clave)
+    except ValueError:  # expiró entre add() e incr()
+        cache.set(clave, 1, ventana)
+        return 1
+
+
+def intento_excedido(request, uid):
+    """
+    Suma un intento de confirmación para la IP y para el uid.
+    Devuelve cuántos segundos esperar si alguno superó su límite, si no None.
+    """
+    ventana = _config('VENTANA_SEGUNDOS')
+    ip = BaseThrottle().get_ident(request) if request is not None else 'interno'
+    por_ip = _contar(f'reset:intentos:ip:{ip}', ventana)
+    # Todos los uid indescifrables comparten un contador
+    por_uid = _contar(f'reset:intentos:uid:{uid_a_pk(uid) or "invalido"}', ventana)
+    if por_ip > _config('LIMITE_POR_IP') or por_uid > _config('LIMITE_POR_UID'):
+        logger.warning("Límite de confirmaciones de reset superado (ip=%s, uid=%s)", ip, uid)
+        return ventana
+    return None
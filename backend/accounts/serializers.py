@@ -38,28 +38,48 @@ class CustomUserSerializer(UserSerializer):
         model = User
         fields = ("id", "email", "acepta_politicas", "is_estudiante", "is_admin_interu")
 
-from djoser.serializers import PasswordResetConfirmSerializer
+from djoser.serializers import PasswordResetConfirmSerializer, PasswordSerializer
 from django.contrib.auth import get_user_model
-from django.utils.http import urlsafe_base64_decode
 from django.contrib.auth.tokens import default_token_generator
 from rest_framework import serializers
+from rest_framework.exceptions import Throttled
 import logging
 
+from accounts.reset import confirmar_reset, intento_excedido, rechazar_token, token_rechazado, uid_a_pk
+
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
 # ==================== SERIALIZER PARA RESET DE CONTRASEÑA CON LOGGING ====================
 class LoggingPasswordResetConfirmSerializer(PasswordResetConfirmSerializer):
     def validate(self, attrs):
+        """
+        Una sola pasada: límite de intentos y tokens ya rechazados (en caché,
+        sin base), luego una consulta del usuario y un check_token.
+        """
         logger.info("INICIO VALIDACION RESET DE CONTRASENA")
-        uid_decoded = urlsafe_base64_decode(attrs["uid"]).decode()
-        user = User.objects.get(pk=uid_decoded)
+        uid, token = attrs["uid"], attrs["token"]
+
+        espera = intento_excedido(self.context.get("request"), uid)
+        if espera:
+            raise Throttled(wait=espera, detail="Demasiados intentos de confirmación.")
+
+        if token_rechazado(uid, token):
+            raise serializers.ValidationError({"token": ["Token inválido o expirado."]})
+
+        try:
+            user = User.objects.get(pk=uid_a_pk(uid))
+        except (User.DoesNotExist, ValueError, TypeError):
+            rechazar_token(uid, token, "uid_invalido")
+            raise serializers.ValidationError({"uid": ["Usuario inválido o inexistente."]})
 
-        if not default_token_generator.check_token(user, attrs["token"]):
-            raise serializers.ValidationError({"token": "Token inválido o expirado."})
+        if not default_token_generator.check_token(user, token):
+            rechazar_token(uid, token, "token_invalido")
+            raise serializers.ValidationError({"token": ["Token inválido o expirado."]})
 
         self.user = user  # clave
-        return super().validate(attrs)  # valida new_password / re_new_password
+        # Solo la validación de new_password: uid y token ya se comprobaron arriba
+        return PasswordSerializer.validate(self, attrs)
 
     def save(self):
         new_password = self.validated_data.get("new_password")
@@ -67,7 +87,7 @@ class LoggingPasswordResetConfirmSerializer(PasswordResetConfirmSerializer):
             raise serializers.ValidationError({"detail": "Usuario no resuelto."})
 
         logger.info(f"Aplicando nueva contraseña a {self.user.email}")
-        self.user.set_password(new_password)
-        self.user.save(update_fields=["password"])
+        confirmar_reset(self.user, new_password, request=self.context.get("request"))
+        rechazar_token(self.validated_data["uid"], self.validated_data["token"], "usado")
         logger.info("Contraseña guardada exitosamente")
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,15 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core import cache_respuestas
+
+User = get_user_model()
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidar_cache_autenticacion(sender, instance, **kwargs):
+    # Cambio de contraseña, desactivación o eliminación de la cuenta
+    usuario_id = instance.pk
+    transaction.on_commit(lambda: cache_respuestas.invalidar_autenticacion(usuario_id))
@@ -1,3 +1,219 @@
-from django.test import TestCase
+import io
+from datetime import timedelta
+from smtplib import SMTPException
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.models import Perfil
+
+from . import correo
+from .authentication import JWTAuthenticationConCache
+from .models import CorreoSaliente
+from .reset import solicitar_reset_lote
+
+User = get_user_model()
+
+URL_RESET = '/api/auth/users/reset_password/'
+URL_CONFIRMAR = '/api/auth/users/reset_password_confirm/'
+
+
+@override_settings(RESET_CONFIRMACION={
+    'TTL_TOKENS_RECHAZADOS': 3600, 'VENTANA_SEGUNDOS': 900, 'LIMITE_POR_UID': 3, 'LIMITE_POR_IP': 100,
+})
+class LimiteConfirmacionResetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='reset@inacapmail.cl', password='Clave12345')
+
+    def confirmar(self, uid):
+        return self.client.post(URL_CONFIRMAR, {
+            'uid': uid, 'token': 'token-falso', 'new_password': 'OtraClave!2024x',
+        })
+
+    def test_variantes_del_uid_comparten_el_limite(self):
+        uid = urlsafe_base64_encode(force_bytes(self.user.pk))
+        variantes = [uid, uid + '=', uid + '==', urlsafe_base64_encode(force_bytes(f'0{self.user.pk}'))]
+
+        for variante in variantes[:3]:
+            self.assertEqual(self.confirmar(variante).status_code, 400)
+        respuesta = self.confirmar(variantes[3])
+        self.assertEqual(respuesta.status_code, 429)
+
+    def test_uid_invalidos_comparten_un_contador(self):
+        for uid in ('###', '$$$', '%%%'):
+            self.assertEqual(self.confirmar(uid).status_code, 400)
+        self.assertEqual(self.confirmar('???').status_code, 429)
+
+
+@override_settings(EMAIL_COLA={
+    'BACKEND_REAL': 'django.core.mail.backends.locmem.EmailBackend', 'WORKERS': 0, 'LOTE': 2,
+    'MAX_INTENTOS': 3, 'BACKOFF_BASE_SEGUNDOS': 30, 'INTERVALO_SONDEO': 5, 'RECLAMO_VENCE_SEGUNDOS': 600,
+})
+class BandejaSalidaTests(APITestCase):
+    def encolar(self, cantidad=1):
+        mensajes = []
+        for i in range(cantidad):
+            mensaje = EmailMultiAlternatives(f'asunto {i}', 'texto', 'no-reply@interu.cl', [f'u{i}@inacapmail.cl'])
+            mensaje.attach_alternative('<p>texto</p>', 'text/html')
+            mensajes.append(mensaje)
+        return get_connection('accounts.backends.ColaEmailBackend').send_messages(mensajes)
+
+    def test_backend_encola_sin_enviar(self):
+        self.assertEqual(self.encolar(2), 2)
+        self.assertEqual(mail.outbox, [])
+        fila = CorreoSaliente.objects.get(asunto='asunto 0')
+        self.assertEqual((fila.estado, fila.html), ('pendiente', '<p>texto</p>'))
+        self.assertEqual(fila.destinatarios, ['u0@inacapmail.cl'])
+
+    def test_reclamar_lote(self):
+        self.encolar(4)
+        ahora = timezone.now()
+        CorreoSaliente.objects.filter(asunto='asunto 0').update(proximo_intento=ahora + timedelta(minutes=5))
+        CorreoSaliente.objects.filter(asunto='asunto 1').update(
+            estado='enviando', reclamado_en=ahora - timedelta(hours=1)  # worker caído
+        )
+        CorreoSaliente.objects.filter(asunto='asunto 2').update(estado='enviando', reclamado_en=ahora)
+
+        lote = correo.reclamar_lote()
+        self.assertEqual(sorted(c.asunto for c in lote), ['asunto 1', 'asunto 3'])
+        self.assertEqual(correo.reclamar_lote(), [])
+
+    def test_entrega_por_lotes(self):
+        self.encolar(3)
+        self.assertEqual(correo.vaciar_cola(), (3, 0))
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[0].alternatives[0][0], '<p>texto</p>')
+        self.assertFalse(CorreoSaliente.objects.exclude(estado='enviado', intentos=1).exists())
+
+    def test_reintento_con_backoff_y_fallido_al_agotar(self):
+        self.encolar()
+        with mock.patch.object(EmailMultiAlternatives, 'send', side_effect=SMTPException('caído')):
+            for intento, espera in ((1, 30), (2, 60)):
+                antes = timezone.now()
+                self.assertEqual(correo.entregar_pendientes(), (0, 1))
+                fila = CorreoSaliente.objects.get()
+                self.assertEqual((fila.estado, fila.intentos, fila.ultimo_error), ('pendiente', intento, 'caído'))
+                self.assertGreaterEqual(fila.proximo_intento, antes + timedelta(seconds=espera))
+                self.assertEqual(correo.entregar_pendientes(), (0, 0))  # aún no toca
+                CorreoSaliente.objects.update(proximo_intento=timezone.now())
+
+            self.assertEqual(correo.entregar_pendientes(), (0, 1))
+        self.assertEqual(CorreoSaliente.objects.get().estado, 'fallido')
+        self.assertEqual(correo.vaciar_cola(), (0, 0))
+
+
+class AutenticacionConCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='token@inacapmail.cl', password='Clave12345')
+        self.perfil = Perfil.objects.create(
+            estudiante=self.user, nombre='Ana', apellido='Soto', carrera='Informática', area='TI'
+        )
+        token = RefreshToken.for_user(self.user).access_token
+        self.request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def autenticar(self):
+        usuario, _ = JWTAuthenticationConCache().authenticate(self.request)
+        return usuario
+
+    def test_cache_caliente_no_consulta(self):
+        self.autenticar()
+        with self.assertNumQueries(0):
+            usuario = self.autenticar()
+            self.assertEqual(usuario.perfil.nombre, 'Ana')
+
+    def test_cambio_de_contrasena_invalida(self):
+        self.autenticar()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('OtraClave!2024x')
+            self.user.save()
+        self.assertTrue(self.autenticar().check_password('OtraClave!2024x'))
+
+    def test_reset_invalida(self):
+        self.autenticar()
+        with self.captureOnCommitCallbacks(execute=True):
+            solicitar_reset_lote([self.user], invalidar_actual=True)
+        self.assertFalse(self.autenticar().has_usable_password())
+
+    def test_cambio_de_perfil_invalida(self):
+        self.autenticar()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.perfil.nombre = 'Ana María'
+            self.perfil.save()
+        self.assertEqual(self.autenticar().perfil.nombre, 'Ana María')
+
+    def test_cuenta_desactivada_o_eliminada(self):
+        self.autenticar()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.autenticar()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.autenticar()
+
+
+class SolicitudResetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.usuarios = [
+            User.objects.create_user(email=f'rota{i}@inacapmail.cl', password='Clave12345') for i in range(6)
+        ]
+
+    def test_respuesta_uniforme_para_correos_desconocidos(self):
+        conocido = self.client.post(URL_RESET, {'email': 'rota0@inacapmail.cl'})
+        desconocido = self.client.post(URL_RESET, {'email': 'nadie@inacapmail.cl'})
+        self.assertEqual((conocido.status_code, desconocido.status_code), (204, 204))
+        self.assertEqual(desconocido.content, conocido.content)
+        self.assertEqual([m.to for m in mail.outbox], [['rota0@inacapmail.cl']])
+
+    @override_settings(EMAIL_BACKEND='accounts.backends.ColaEmailBackend')
+    def test_lote_con_consultas_constantes(self):
+        def consultas(cantidad, tamano_lote):
+            ids = [u.pk for u in self.usuarios[:cantidad]]
+            with CaptureQueriesContext(connection) as capturadas:
+                total = solicitar_reset_lote(
+                    User.objects.filter(pk__in=ids).order_by('pk'), tamano_lote=tamano_lote
+                )
+            self.assertEqual(total, cantidad)
+            return [q['sql'] for q in capturadas.captured_queries]
+
+        self.assertEqual(len(consultas(2, 10)), len(consultas(6, 10)))
+        inserts = [sql for sql in consultas(6, 2) if sql.startswith('INSERT INTO "accounts_correosaliente"')]
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(CorreoSaliente.objects.count(), 14)
+
+    def test_comando_resetear_contrasenas(self):
+        with self.assertRaises(CommandError):
+            call_command('resetear_contrasenas')
+
+        inactivo = self.usuarios[5]
+        inactivo.is_active = False
+        inactivo.save()
+        salida = io.StringIO()
+        call_command('resetear_contrasenas', '--todos', '--invalidar', '--lote', '2', stdout=salida)
+        self.assertIn('5 correo(s) de reseteo encolado(s).', salida.getvalue())
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertFalse(User.objects.get(pk=self.usuarios[0].pk).has_usable_password())
+        self.assertTrue(User.objects.get(pk=inactivo.pk).check_password('Clave12345'))
+
+        salida = io.StringIO()
+        call_command('resetear_contrasenas', 'rota1@inacapmail.cl', 'nadie@inacapmail.cl', stdout=salida)
+        self.assertIn('1 correo(s)', salida.getvalue())
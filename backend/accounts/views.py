@@ -1,13 +1,38 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from django.contrib.auth.tokens import default_token_generator
+from djoser.conf import settings as djoser_settings
+from djoser.views import UserViewSet
+from core.throttling import BucketIPThrottle
+from accounts.reset import solicitar_reset
 from accounts.serializers import LoggingPasswordResetConfirmSerializer  # o ForcePasswordResetConfirmSerializer
 
+class RegistroViewSet(UserViewSet):
+    """UserViewSet de djoser con límite por IP en el registro (POST /users/)."""
+    throttle_classes = [BucketIPThrottle]
+    throttle_scope = 'registro'
+
+
+class PasswordResetView(APIView):
+    permission_classes = []  # pública
+
+    def post(self, request):
+        # Misma validación que djoser (PASSWORD_RESET_SHOW_EMAIL_NOT_FOUND incluido)
+        serializer = djoser_settings.SERIALIZERS.password_reset(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        usuario = serializer.get_user()
+        if usuario:
+            solicitar_reset(usuario, request=request)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 class PasswordResetConfirmView(APIView):
     permission_classes = []  # pública (como el reset)
+    token_generator = default_token_generator  # lo lee el serializer de djoser desde context["view"]
 
     def post(self, request):
-        serializer = LoggingPasswordResetConfirmSerializer(data=request.data, context={"request": request})
+        serializer = LoggingPasswordResetConfirmSerializer(data=request.data, context={"request": request, "view": self})
         serializer.is_valid(raise_exception=True)
-        serializer.save()  # aquí se aplica set_password en tu serializer
-        return Response(status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+        serializer.save()  # aplica la contraseña con accounts.reset.confirmar_reset
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,192 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ClaveIdempotencia, Publicacion
+from .service import SoftDeleteService, TemporizadorAutoEliminacion
+
+logger = logging.getLogger(__name__)
+
+
+def _config(**opciones):
+    config = dict(settings.BARREDOR)
+    config.update({k: v for k, v in opciones.items() if v is not None})
+    return config
+
+
+def _por_lotes(queryset, lote, pausa, accion):
+    """
+    Aplica accion(ids) a las filas del queryset en lotes de tamaño fijo, cada
+    uno en su propia transacción corta, para no bloquear la tabla completa.
+    Devuelve cuántas filas se procesaron.
+    """
+    total = 0
+    while True:
+        ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:lote])
+        if not ids:
+            return total
+        with transaction.atomic():
+            accion(ids)
+        total += len(ids)
+        if len(ids) < lote:
+            return total
+        if pausa:
+            time.sleep(pausa)
+
+
+def desactivar_expiradas(dias=None, lote=None, pausa=None):
+    """UPDATE por lotes de las publicaciones activas creadas antes del límite."""
+    config = _config(DIAS_EXPIRACION=dias, LOTE=lote, PAUSA_ENTRE_LOTES=pausa)
+    limite = TemporizadorAutoEliminacion(config['DIAS_EXPIRACION']).fecha_limite()
+    return _por_lotes(
+        Publicacion.objects.filter(estado=True, fecha_creacion__lt=limite),
+        config['LOTE'], config['PAUSA_ENTRE_LOTES'],
+        lambda ids: SoftDeleteService.desactivar_lote(Publicacion.objects.filter(pk__in=ids)),
+    )
+
+
+def eliminar_inactivas(dias=None, lote=None, pausa=None):
+    """
+    Borra definitivamente (con sus chats, mensajes, etc.) las publicaciones
+    inactivas hace más de DIAS_ELIMINACION. Las desactivadas antes de existir
+    fecha_desactivacion se juzgan por su fecha de creación. Las ocultas por
+    reportes esperan la decisión de un moderador.
+    """
+    config = _config(DIAS_ELIMINACION=dias, LOTE=lote, PAUSA_ENTRE_LOTES=pausa)
+    limite = TemporizadorAutoEliminacion(config['DIAS_ELIMINACION']).fecha_limite()
+    queryset = Publicacion.objects.filter(estado=False, oculta_por_reportes=False).filter(
+        Q(fecha_desactivacion__lt=limite)
+        | Q(fecha_desactivacion__isnull=True, fecha_creacion__lt=limite)
+    )
+    # El borrado en cascada es más caro que un UPDATE: lotes más chicos
+    lote_borrado = max(1, config['LOTE'] // 5)
+    return _por_lotes(
+        queryset, lote_borrado, config['PAUSA_ENTRE_LOTES'],
+        lambda ids: Publicacion.objects.filter(pk__in=ids).delete(),
+    )
+
+
+def eliminar_claves_idempotencia(dias=None, lote=None, pausa=None):
+    """Borra las respuestas de Idempotency-Key ya vencidas (dias no aplica)."""
+    config = _config(LOTE=lote, PAUSA_ENTRE_LOTES=pausa)
+    return _por_lotes(
+        ClaveIdempotencia.objects.filter(expira__lte=timezone.now()),
+        config['LOTE'], config['PAUSA_ENTRE_LOTES'],
+        lambda ids: ClaveIdempotencia.objects.filter(pk__in=ids).delete(),
+    )
+
+
+def barrer(dias_expiracion=None, dias_eliminacion=None, lote=None, pausa=None):
+    """Ejecuta todas las fases y devuelve métricas de throughput."""
+    metricas = {}
+    for nombre, fase, dias in (
+        ('desactivadas', desactivar_expiradas, dias_expiracion),
+        ('eliminadas', eliminar_inactivas, dias_eliminacion),
+        ('claves_idempotencia', eliminar_claves_idempotencia, None),
+    ):
+        inicio = time.perf_counter()
+        filas = fase(dias=dias, lote=lote, pausa=pausa)
+        segundos = time.perf_counter() - inicio
+        metricas[nombre] = {
+            'filas': filas,
+            'segundos': round(segundos, 3),
+            'filas_por_segundo': round(filas / segundos, 1) if filas and segundos else 0.0,
+        }
+    return metricas
+
+
+CLAVE_LIDER = 'barredor:lider'
+ADVISORY_LOCK_ID = 0x62617272  # 'barr'
+
+
+@contextmanager
+def liderazgo():
+    """
+    True si este proceso obtuvo el derecho a barrer. En PostgreSQL usa un
+    advisory lock de sesión; en otro motor, `cache.add` con TTL (requiere un
+    caché compartido entre workers: Redis o archivo).
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_try_advisory_lock(%s)', [ADVISORY_LOCK_ID])
+            obtenido = cursor.fetchone()[0]
+        try:
+            yield obtenido
+        finally:
+            if obtenido:
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT pg_advisory_unlock(%s)', [ADVISORY_LOCK_ID])
+        return
+
+    marca = f'{os.getpid()}:{threading.get_ident()}'
+    # El TTL solo libera el lock si el proceso murió a mitad de un barrido
+    obtenido = cache.add(CLAVE_LIDER, marca, settings.BARREDOR['LIDER_TTL_SEGUNDOS'])
+    try:
+        yield obtenido
+    finally:
+        if obtenido and cache.get(CLAVE_LIDER) == marca:
+            cache.delete(CLAVE_LIDER)
+
+
+def barrer_exclusivo(**opciones):
+    """barrer() si ningún otro proceso está barriendo; si no, None."""
+    with liderazgo() as lider:
+        if not lider:
+            return None
+        return barrer(**opciones)
+
+
+class BarredorPeriodico(threading.Thread):
+    """
+    Ejecuta barrer() cada INTERVALO_SEGUNDOS en un hilo daemon del proceso.
+    Con varios workers cada uno tiene su hilo, pero solo barre el que toma
+    el lock de liderazgo().
+    """
+
+    def __init__(self, intervalo):
+        super().__init__(name='barredor-publicaciones', daemon=True)
+        self.intervalo = intervalo
+        self.detenido = threading.Event()
+
+    def run(self):
+        while not self.detenido.wait(self.intervalo):
+            try:
+                metricas = barrer_exclusivo()
+                if metricas is not None:
+                    logger.info("Barredor de publicaciones: %s", metricas)
+            except Exception:
+                logger.exception("Falló el barredor de publicaciones")
+            finally:
+                connections.close_all()
+
+    def detener(self):
+        self.detenido.set()
+
+
+_barredor = None
+_barredor_lock = threading.Lock()
+
+
+def iniciar_barredor_periodico():
+    global _barredor
+    intervalo = settings.BARREDOR.get('INTERVALO_SEGUNDOS', 0)
+    if intervalo <= 0:
+        return None
+    if connection.vendor != 'postgresql' and 'locmem' in settings.CACHES['default']['BACKEND'].lower():
+        logger.warning(
+            "Barredor periódico con LocMemCache: el lock de liderazgo no se comparte "
+            "entre procesos; con varios workers usa Redis o el comando en cron."
+        )
+    with _barredor_lock:
+        if _barredor is None:
+            _barredor = BarredorPeriodico(intervalo)
+            _barredor.start()
+    return _barredor
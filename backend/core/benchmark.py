@@ -0,0 +1,358 @@
+"""
+Harness de benchmarks de la API (lo usa `manage.py bench_api`).
+
+- sembrar(): genera usuarios, perfiles, publicaciones, chats, mensajes y
+  notificaciones con bulk_create, todos bajo el dominio @bench.local para
+  poder borrarlos con limpiar().
+- ClienteEnProceso / ClienteHTTP: mismo contrato, contra el cliente de test
+  de DRF (cuenta consultas) o contra un servidor levantado (requests).
+- ESCENARIOS: recorridos típicos de un usuario (feed, polling de chat,
+  ráfaga de mensajes, notificaciones, calificación).
+- Recolector: latencias por escenario -> p50/p95/p99, consultas por
+  request y throughput, en un dict listo para guardar como JSON.
+"""
+
+import random
+import subprocess
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .models import Chat, ChatParticipante, Mensaje, Notificacion, Perfil, Publicacion
+from .notificaciones import sumar_no_leidas
+
+User = get_user_model()
+
+PREFIJO_EMAIL = 'bench-api-'
+DOMINIO_EMAIL = '@bench.local'
+
+CARRERAS = ['Informática', 'Diseño', 'Administración', 'Electricidad', 'Mecánica']
+AREAS = ['TI', 'Artes', 'Negocios', 'Energía', 'Industria']
+
+
+# ----------------------- DATOS -----------------------
+
+def sembrar(usuarios=200, publicaciones=1000, chats=400, mensajes_por_chat=20, seed=42):
+    """
+    Inserta el dataset sintético y devuelve lo que necesitan los escenarios:
+    {'usuarios': [ids], 'chats_por_usuario': {id: [chat_id, ...]}}.
+    """
+    rnd = random.Random(seed)
+    nuevos = User.objects.bulk_create(
+        [User(email=f'{PREFIJO_EMAIL}{i}{DOMINIO_EMAIL}', password='!') for i in range(usuarios)],
+        batch_size=1000,
+    )
+    Perfil.objects.bulk_create(
+        [Perfil(estudiante=u, nombre='Bench', apellido=str(i), carrera=rnd.choice(CARRERAS),
+                area=rnd.choice(AREAS)) for i, u in enumerate(nuevos)],
+        batch_size=1000,
+    )
+    pubs = Publicacion.objects.bulk_create(
+        [Publicacion(estudiante=rnd.choice(nuevos), titulo=f'Bench {i}',
+                     descripcion='Publicación sintética para benchmarks')
+         for i in range(publicaciones)],
+        batch_size=1000,
+    )
+
+    pares, vistos = [], set()
+    while len(pares) < chats and len(vistos) < len(pubs) * len(nuevos):
+        publicacion, receptor = rnd.choice(pubs), rnd.choice(nuevos)
+        if receptor.pk == publicacion.estudiante_id or (publicacion.pk, receptor.pk) in vistos:
+            continue
+        vistos.add((publicacion.pk, receptor.pk))
+        pares.append((publicacion, receptor))
+    nuevos_chats = Chat.objects.bulk_create(
+        [Chat(publicacion=p, receptor=r) for p, r in pares], batch_size=1000
+    )
+
+    participantes, mensajes, chats_por_usuario = [], [], defaultdict(list)
+    for chat, (publicacion, receptor) in zip(nuevos_chats, pares):
+        for estudiante_id, rol in ((publicacion.estudiante_id, 'autor'), (receptor.pk, 'receptor')):
+            participantes.append(ChatParticipante(chat=chat, estudiante_id=estudiante_id, rol=rol))
+            chats_por_usuario[estudiante_id].append(chat.pk)
+        for j in range(mensajes_por_chat):
+            autor = publicacion.estudiante_id if j % 2 else receptor.pk
+            mensajes.append(Mensaje(chat=chat, estudiante_id=autor, texto=f'mensaje {j}', leido=j < mensajes_por_chat - 2))
+    ChatParticipante.objects.bulk_create(participantes, batch_size=2000)
+    Mensaje.objects.bulk_create(mensajes, batch_size=5000)
+
+    Notificacion.objects.bulk_create(
+        [Notificacion(estudiante_id=p.estudiante_id, tipo='nuevo_chat', chat=c, publicacion=p,
+                      mensaje=f'Nuevo chat sobre tu publicación {p.pk}')
+         for c, (p, _) in zip(nuevos_chats, pares)],
+        batch_size=2000,
+    )
+    por_autor = Counter(p.estudiante_id for p, _ in pares)
+    for cantidad in set(por_autor.values()):
+        sumar_no_leidas([u for u, n in por_autor.items() if n == cantidad], 'nuevo_chat', cantidad)
+
+    return {
+        'usuarios': [u.pk for u in nuevos if chats_por_usuario.get(u.pk)],
+        'chats_por_usuario': dict(chats_por_usuario),
+    }
+
+
+def limpiar():
+    """Borra todo lo sembrado (en cascada desde los usuarios)."""
+    return User.objects.filter(
+        email__startswith=PREFIJO_EMAIL, email__endswith=DOMINIO_EMAIL
+    ).delete()[0]
+
+
+def tokens_de(usuario_ids):
+    return {u.pk: str(AccessToken.for_user(u)) for u in User.objects.filter(pk__in=usuario_ids)}
+
+
+# ----------------------- CLIENTES -----------------------
+
+class ClienteEnProceso:
+    """Cliente de test de DRF en el mismo proceso; cuenta las consultas de cada request."""
+    cuenta_consultas = True
+
+    def __init__(self):
+        from rest_framework.test import APIClient
+        self._local = threading.local()
+        self._crear = APIClient
+
+    def _cliente(self):
+        if not hasattr(self._local, 'cliente'):
+            self._local.cliente = self._crear()
+        return self._local.cliente
+
+    def request(self, metodo, ruta, token, datos=None, headers=None):
+        extra = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        extra.update({f"HTTP_{k.upper().replace('-', '_')}": v for k, v in (headers or {}).items()})
+        cliente = self._cliente()
+        with CaptureQueriesContext(connection) as consultas:
+            inicio = time.perf_counter()
+            respuesta = getattr(cliente, metodo.lower())(ruta, datos, format='json', **extra)
+            ms = (time.perf_counter() - inicio) * 1000
+        cuerpo = getattr(respuesta, 'data', None)
+        return respuesta.status_code, cuerpo, dict(respuesta.headers), ms, len(consultas)
+
+
+class ClienteHTTP:
+    """Cliente contra un servidor levantado (runserver, gunicorn, daphne)."""
+    cuenta_consultas = False
+
+    def __init__(self, url_base):
+        import requests
+        self.url_base = url_base.rstrip('/')
+        self._local = threading.local()
+        self._requests = requests
+
+    def _sesion(self):
+        if not hasattr(self._local, 'sesion'):
+            self._local.sesion = self._requests.Session()
+        return self._local.sesion
+
+    def request(self, metodo, ruta, token, datos=None, headers=None):
+        url = ruta if ruta.startswith('http') else f'{self.url_base}{ruta}'
+        cabeceras = {'Authorization': f'Bearer {token}', **(headers or {})}
+        kwargs = {'params': datos} if metodo == 'GET' else {'json': datos}
+        inicio = time.perf_counter()
+        respuesta = self._sesion().request(metodo, url, headers=cabeceras, timeout=30, **kwargs)
+        ms = (time.perf_counter() - inicio) * 1000
+        try:
+            cuerpo = respuesta.json()
+        except ValueError:
+            cuerpo = None
+        return respuesta.status_code, cuerpo, dict(respuesta.headers), ms, None
+
+
+# ----------------------- ESCENARIOS -----------------------
+
+def escenario_feed(ctx):
+    """Primera página del feed y dos más siguiendo el cursor."""
+    ruta, datos = '/api/publicaciones/', {'limit': 20}
+    for _ in range(3):
+        cuerpo = ctx.request('GET', ruta, datos)
+        siguiente = (cuerpo or {}).get('next') if isinstance(cuerpo, dict) else None
+        if not siguiente:
+            return
+        ruta, datos = siguiente, None
+
+
+def escenario_polling_chat(ctx):
+    """Carga inicial de un chat y luego 5 sondeos con ETag (304 si no hay nada nuevo)."""
+    chat = ctx.rnd.choice(ctx.chats)
+    datos = {'chat': chat, 'after': 0}
+    ctx.request('GET', '/api/mensajes/', datos)
+    etag = ctx.ultimas_headers.get('ETag')
+    for _ in range(5):
+        ctx.request('GET', '/api/mensajes/', datos, headers={'If-None-Match': etag} if etag else None)
+
+
+def escenario_rafaga_mensajes(ctx):
+    """10 mensajes seguidos al mismo chat."""
+    chat = ctx.rnd.choice(ctx.chats)
+    for i in range(10):
+        ctx.request('POST', '/api/mensajes/', {'chat': chat, 'texto': f'rafaga {i}'})
+
+
+def escenario_notificaciones(ctx):
+    ctx.request('GET', '/api/notificaciones/resumen/')
+    ctx.request('GET', '/api/notificaciones/')
+    ctx.request('POST', '/api/notificaciones/marcar-todas-leidas/')
+
+
+def escenario_calificacion(ctx):
+    """Califica un chat que el usuario aún no calificó (si le queda alguno)."""
+    pendientes = ctx.sin_calificar
+    if pendientes:
+        ctx.request('POST', '/api/calificaciones-chat/', {
+            'chat': pendientes.pop(), 'puntaje': ctx.rnd.randint(1, 5), 'comentario': 'bench',
+        })
+
+
+ESCENARIOS = {
+    'feed': escenario_feed,
+    'polling_chat': escenario_polling_chat,
+    'rafaga_mensajes': escenario_rafaga_mensajes,
+    'notificaciones': escenario_notificaciones,
+    'calificacion': escenario_calificacion,
+}
+
+
+class Contexto:
+    """Estado de un usuario virtual dentro de una iteración de escenario."""
+
+    def __init__(self, cliente, recolector, escenario, token, chats, sin_calificar, rnd):
+        self.cliente = cliente
+        self.recolector = recolector
+        self.escenario = escenario
+        self.token = token
+        self.chats = chats
+        self.sin_calificar = sin_calificar
+        self.rnd = rnd
+        self.ultimas_headers = {}
+
+    def request(self, metodo, ruta, datos=None, headers=None):
+        status, cuerpo, self.ultimas_headers, ms, consultas = self.cliente.request(
+            metodo, ruta, self.token, datos, headers
+        )
+        self.recolector.registrar(self.escenario, status, ms, consultas)
+        return cuerpo
+
+
+# ----------------------- EJECUCIÓN Y REPORTE -----------------------
+
+def percentil(valores_ordenados, p):
+    if not valores_ordenados:
+        return None
+    indice = min(len(valores_ordenados) - 1, max(0, round(p / 100 * len(valores_ordenados)) - 1))
+    return round(valores_ordenados[indice], 2)
+
+
+class Recolector:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencias = defaultdict(list)
+        self.consultas = defaultdict(list)
+        self.status = defaultdict(Counter)
+        self.segundos = defaultdict(float)
+
+    def registrar(self, escenario, status, ms, consultas):
+        with self._lock:
+            self.latencias[escenario].append(ms)
+            self.status[escenario][str(status)] += 1
+            if consultas is not None:
+                self.consultas[escenario].append(consultas)
+
+    def resumen(self):
+        resultado = {}
+        for escenario, latencias in sorted(self.latencias.items()):
+            ordenadas = sorted(latencias)
+            consultas = self.consultas.get(escenario) or []
+            segundos = self.segundos[escenario]
+            resultado[escenario] = {
+                'requests': len(ordenadas),
+                'p50_ms': percentil(ordenadas, 50),
+                'p95_ms': percentil(ordenadas, 95),
+                'p99_ms': percentil(ordenadas, 99),
+                'max_ms': round(ordenadas[-1], 2),
+                'requests_por_segundo': round(len(ordenadas) / segundos, 1) if segundos else None,
+                'consultas_promedio': round(sum(consultas) / len(consultas), 2) if consultas else None,
+                'consultas_max': max(consultas) if consultas else None,
+                'status': dict(self.status[escenario]),
+            }
+        return resultado
+
+
+def ejecutar(cliente, datos, escenarios, iteraciones=50, concurrencia=1, seed=42):
+    """
+    Corre `iteraciones` veces cada escenario, repartidas entre `concurrencia`
+    hilos, con un usuario sembrado al azar por iteración. Devuelve el resumen.
+    """
+    tokens = tokens_de(datos['usuarios'])
+    sin_calificar = {u: list(c) for u, c in datos['chats_por_usuario'].items()}
+    recolector = Recolector()
+
+    def trabajador(nombre, numero):
+        rnd = random.Random(f'{seed}-{nombre}-{numero}')
+        try:
+            for _ in range(numero, iteraciones, concurrencia):
+                usuario = rnd.choice(datos['usuarios'])
+                ESCENARIOS[nombre](Contexto(
+                    cliente, recolector, nombre, tokens[usuario],
+                    datos['chats_por_usuario'][usuario], sin_calificar[usuario], rnd,
+                ))
+        finally:
+            if concurrencia > 1:
+                connection.close()
+
+    # Un escenario a la vez: el throughput de cada uno se mide sobre su propio tiempo de pared
+    for nombre in escenarios:
+        inicio = time.perf_counter()
+        if concurrencia == 1:
+            trabajador(nombre, 0)
+        else:
+            hilos = [threading.Thread(target=trabajador, args=(nombre, n)) for n in range(concurrencia)]
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+        recolector.segundos[nombre] = time.perf_counter() - inicio
+    return recolector.resumen()
+
+
+def commit_actual():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def informe(modo, parametros, escenarios):
+    return {
+        'fecha': timezone.now().isoformat(),
+        'commit': commit_actual(),
+        'modo': modo,
+        'motor_bd': connection.vendor,
+        'parametros': parametros,
+        'escenarios': escenarios,
+    }
+
+
+def comparar(anterior, actual):
+    """Filas (escenario, métrica, antes, ahora, cambio %) para p95, p99 y consultas."""
+    filas = []
+    for escenario, ahora in actual['escenarios'].items():
+        antes = anterior.get('escenarios', {}).get(escenario)
+        if not antes:
+            continue
+        for metrica in ('p95_ms', 'p99_ms', 'consultas_promedio'):
+            a, b = antes.get(metrica), ahora.get(metrica)
+            if a is None or b is None:
+                continue
+            cambio = round((b - a) / a * 100, 1) if a else None
+            filas.append((escenario, metrica, a, b, cambio))
+    return filas
@@ -0,0 +1,144 @@
+"""
+Búsqueda de texto completo sobre Publicacion.titulo y descripcion.
+
+- PostgreSQL: índice GIN sobre un tsvector con la configuración
+  `es_unaccent` (stemming español + unaccent). Postgres lo mantiene solo.
+- SQLite: tabla virtual FTS5 `core_publicacion_fts` (rowid = id_publicacion)
+  con el texto ya normalizado por `documento()`: sin tildes y reducido a
+  raíces con un stemmer español liviano. Se actualiza al guardar.
+
+Los objetos SQL se crean en la migración 0008_busqueda_publicaciones.
+"""
+
+import re
+import unicodedata
+
+from django.db import connection
+
+TABLA_FTS = 'core_publicacion_fts'
+CONFIG_PG = 'es_unaccent'
+
+# Expresión indexada en PostgreSQL; la consulta debe usar exactamente la misma
+VECTOR_PG = (
+    "(setweight(to_tsvector('{config}'::regconfig, coalesce(titulo, '')), 'A') || "
+    "setweight(to_tsvector('{config}'::regconfig, coalesce(descripcion, '')), 'B'))"
+).format(config=CONFIG_PG)
+
+# De más largo a más corto: se quita el primero que calce
+_SUFIJOS = (
+    'amientos', 'imientos', 'amiento', 'imiento', 'aciones', 'uciones',
+    'adoras', 'adores', 'idades', 'mente', 'acion', 'ucion', 'adora', 'ador',
+    'ismos', 'istas', 'ibles', 'ables', 'idad', 'ismo', 'ista', 'ible', 'able',
+    'ces', 'ar', 'er', 'ir', 'as', 'os', 'es', 's', 'a', 'o', 'e',
+)
+_LARGO_MINIMO_RAIZ = 3
+
+
+def plegar(texto):
+    """Minúsculas y sin tildes ("Programación" -> "programacion")."""
+    texto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+
+
+def raiz(palabra):
+    """Stemmer español liviano: suficiente para unir plurales y derivados comunes."""
+    for sufijo in _SUFIJOS:
+        if palabra.endswith(sufijo) and len(palabra) - len(sufijo) >= _LARGO_MINIMO_RAIZ:
+            return palabra[:-len(sufijo)]
+    return palabra
+
+
+def tokens(texto):
+    return [raiz(p) for p in re.findall(r'\w+', plegar(texto))]
+
+
+def documento(texto):
+    return ' '.join(tokens(texto))
+
+
+def es_postgres():
+    return connection.vendor == 'postgresql'
+
+
+# ----------------------- MANTENIMIENTO DEL ÍNDICE -----------------------
+
+def actualizar(publicacion):
+    if es_postgres():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLA_FTS} WHERE rowid = %s', [publicacion.pk])
+        cursor.execute(
+            f'INSERT INTO {TABLA_FTS} (rowid, titulo, descripcion) VALUES (%s, %s, %s)',
+            [publicacion.pk, documento(publicacion.titulo), documento(publicacion.descripcion)],
+        )
+
+
+def eliminar(publicacion_id):
+    if es_postgres():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLA_FTS} WHERE rowid = %s', [publicacion_id])
+
+
+def reconstruir(tamano_lote=1000):
+    """Reconstruye el índice completo. Devuelve cuántas publicaciones indexó."""
+    from .models import Publicacion
+
+    if es_postgres():
+        with connection.cursor() as cursor:
+            cursor.execute('REINDEX INDEX pub_busqueda_gin')
+        return Publicacion.objects.count()
+
+    total = 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLA_FTS}')
+        filas = Publicacion.objects.order_by('pk').values_list('pk', 'titulo', 'descripcion')
+        lote = []
+        for pk, titulo, descripcion in filas.iterator(chunk_size=tamano_lote):
+            lote.append((pk, documento(titulo), documento(descripcion)))
+            if len(lote) >= tamano_lote:
+                cursor.executemany(
+                    f'INSERT INTO {TABLA_FTS} (rowid, titulo, descripcion) VALUES (%s, %s, %s)', lote
+                )
+                total += len(lote)
+                lote = []
+        if lote:
+            cursor.executemany(
+                f'INSERT INTO {TABLA_FTS} (rowid, titulo, descripcion) VALUES (%s, %s, %s)', lote
+            )
+            total += len(lote)
+    return total
+
+
+# ----------------------- CONSULTA -----------------------
+
+def buscar(q, limite=20, desplazamiento=0):
+    """
+    Devuelve [(id_publicacion, relevancia)] de publicaciones activas,
+    de más a menos relevante. relevancia: mayor es mejor.
+    """
+    if es_postgres():
+        sql = (
+            f'SELECT p.id_publicacion, ts_rank({VECTOR_PG}, consulta) AS relevancia '
+            f"FROM core_publicacion p, websearch_to_tsquery('{CONFIG_PG}'::regconfig, %s) consulta "
+            f'WHERE p.estado AND {VECTOR_PG} @@ consulta '
+            'ORDER BY relevancia DESC, p.id_publicacion DESC LIMIT %s OFFSET %s'
+        )
+        parametros = [q, limite, desplazamiento]
+    else:
+        terminos = tokens(q)
+        if not terminos:
+            return []
+        # Prefijo por término: "program"* calza programa, programación, programador...
+        consulta = ' '.join(f'"{t}"*' for t in terminos)
+        sql = (
+            f'SELECT f.rowid, -bm25({TABLA_FTS}, 3.0, 1.0) AS relevancia '
+            f'FROM {TABLA_FTS} f JOIN core_publicacion p ON p.id_publicacion = f.rowid '
+            f'WHERE {TABLA_FTS} MATCH %s AND p.estado '
+            'ORDER BY relevancia DESC, f.rowid DESC LIMIT %s OFFSET %s'
+        )
+        parametros = [consulta, limite, desplazamiento]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, parametros)
+        return [(pk, float(relevancia)) for pk, relevancia in cursor.fetchall()]
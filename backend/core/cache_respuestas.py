@@ -0,0 +1,91 @@
+"""
+Caché de respuestas/objetos para endpoints de lectura.
+
+Cada entrada vive bajo un espacio de nombres ("publicacion:15", "perfil:3",
+"feed") con un número de versión propio guardado en el mismo caché.
+Invalidar es subir la versión: las claves viejas quedan inalcanzables y
+expiran solas, sin tener que enumerarlas. Una versión que el caché expulsó
+renace con time.time_ns(), siempre mayor que cualquier versión anterior,
+así que nunca vuelve a apuntar a entradas viejas.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import metricas as colector
+
+
+def ttl(nombre):
+    return settings.CACHE_TTL.get(nombre, settings.CACHE_TTL['default'])
+
+
+def _clave_version(namespace):
+    return f'cache:version:{namespace}'
+
+
+def version(namespace):
+    return cache.get_or_set(_clave_version(namespace), time.time_ns, None)
+
+
+def invalidar(*namespaces):
+    for namespace in namespaces:
+        try:
+            cache.incr(_clave_version(namespace))
+        except ValueError:
+            cache.set(_clave_version(namespace), time.time_ns(), None)
+
+
+def clave(namespace, *partes):
+    sufijo = ':'.join(str(p) for p in partes)
+    return f'cache:{namespace}:v{version(namespace)}:{sufijo}'
+
+
+def _registrar(namespace, acierto):
+    grupo = namespace.split(':', 1)[0]
+    colector.consultas_cache.inc(grupo=grupo, resultado='acierto' if acierto else 'fallo')
+
+
+def obtener_o_calcular(namespace, partes, nombre_ttl, calcular):
+    """
+    Devuelve el valor cacheado o lo calcula con calcular() y lo guarda
+    con el TTL configurado para nombre_ttl.
+    """
+    k = clave(namespace, *partes)
+    valor = cache.get(k)
+    if valor is not None:
+        _registrar(namespace, True)
+        return valor
+
+    _registrar(namespace, False)
+    valor = calcular()
+    cache.set(k, valor, ttl(nombre_ttl))
+    return valor
+
+
+def metricas():
+    """Aciertos, fallos y ratio por grupo (de core.metricas, todos los procesos)."""
+    datos = {}
+    for (grupo, resultado), total in colector.agregados().get(colector.consultas_cache.nombre, {}).items():
+        valores = datos.setdefault(grupo, {'hits': 0, 'misses': 0})
+        valores['hits' if resultado == 'acierto' else 'misses'] += total
+    for valores in datos.values():
+        total = valores['hits'] + valores['misses']
+        valores['ratio'] = round(valores['hits'] / total, 4) if total else None
+    return datos
+
+
+# ----------------------- INVALIDACIÓN POR ENTIDAD -----------------------
+
+def invalidar_publicaciones(*publicacion_ids):
+    invalidar('feed', *(f'publicacion:{pk}' for pk in publicacion_ids))
+
+
+def invalidar_perfiles(*usuario_ids):
+    invalidar(*(f'perfil:{pk}' for pk in usuario_ids))
+
+
+def invalidar_autenticacion(*usuario_ids):
+    """Descarta los usuarios cacheados por JWTAuthenticationConCache (todos sus jti)."""
+    invalidar(*(f'auth:{pk}' for pk in usuario_ids))
@@ -0,0 +1,61 @@
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from channels.layers import get_channel_layer
+
+logger = logging.getLogger(__name__)
+
+
+def grupo_usuario(usuario_id):
+    return f'usuario_{usuario_id}'
+
+
+def publicar_evento(usuario_ids, tipo, data):
+    """
+    Envía un evento al grupo de cada usuario en el channel layer.
+    Un fallo del layer no debe romper la request que generó el evento.
+    """
+    layer = get_channel_layer()
+    if layer is None:
+        return
+    for usuario_id in set(usuario_ids):
+        try:
+            async_to_sync(layer.group_send)(grupo_usuario(usuario_id), {'type': tipo, 'data': data})
+        except Exception:
+            logger.exception("No se pudo publicar %s al usuario %s", tipo, usuario_id)
+
+
+class EventosConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Canal en tiempo real de un estudiante: recibe sus nuevos mensajes
+    y notificaciones sin tener que consultar los endpoints REST.
+    Los eventos se publican con publicar_evento (core.signals y
+    core.notificaciones) a través del channel layer.
+    """
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+
+        self.grupo = grupo_usuario(user.pk)
+        await self.channel_layer.group_add(self.grupo, self.channel_name)
+        subprotocolos = self.scope.get('subprotocols') or []
+        await self.accept(subprotocol='bearer' if subprotocolos[:1] == ['bearer'] else None)
+
+    async def disconnect(self, code):
+        if hasattr(self, 'grupo'):
+            await self.channel_layer.group_discard(self.grupo, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        # Solo empujamos eventos; lo único que atendemos es el ping de keepalive.
+        if content.get('tipo') == 'ping':
+            await self.send_json({'tipo': 'pong'})
+
+    async def nuevo_mensaje(self, event):
+        await self.send_json({'tipo': 'mensaje', 'data': event['data']})
+
+    async def nueva_notificacion(self, event):
+        await self.send_json({'tipo': 'notificacion', 'data': event['data']})
@@ -0,0 +1,166 @@
+"""
+Exportación en streaming (CSV o NDJSON) de reportes, publicaciones y
+calificaciones para los administradores.
+
+Las filas salen de `.values_list(...).iterator(chunk_size=TAMANO_CHUNK)`:
+sin instancias de modelo ni serializers, y en PostgreSQL con un cursor del
+lado del servidor. Cada fila se escribe y se descarta, así que la memoria
+del worker no crece con la cantidad de filas.
+"""
+
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import CalificacionChat, Publicacion, Reporte
+
+TAMANO_CHUNK = 2000
+TAMANO_BLOQUE = 64 * 1024  # bytes aproximados por escritura al socket
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+# Celdas que Excel/LibreOffice interpretarían como fórmula
+_PREFIJOS_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+
+
+class Exportacion:
+    def __init__(self, nombre, modelo, columnas, campo_fecha, estados=None):
+        self.nombre = nombre
+        self.modelo = modelo
+        self.columnas = columnas  # (encabezado, lookup de values_list)
+        self.campo_fecha = campo_fecha
+        self.estados = estados  # valor del query param -> valor en la base
+
+    def parsear_estados(self, valores):
+        if self.estados is None:
+            raise ValidationError({"estado": [f"No aplica a la exportación de {self.nombre}."]})
+        try:
+            return {self.estados[v.strip().lower()] for v in valores}
+        except KeyError:
+            opciones = ', '.join(sorted(self.estados))
+            raise ValidationError({"estado": [f"Valor inválido. Usa {opciones}."]})
+
+    def filas(self, queryset):
+        lookups = [lookup for _, lookup in self.columnas]
+        return queryset.order_by('pk').values_list(*lookups).iterator(chunk_size=TAMANO_CHUNK)
+
+
+EXPORTACIONES = {
+    'reportes': Exportacion(
+        'reportes', Reporte,
+        columnas=(
+            ('id_reporte', 'id_reporte'),
+            ('fecha', 'fecha'),
+            ('estado', 'estado'),
+            ('motivo', 'motivo'),
+            ('estudiante_id', 'estudiante_id'),
+            ('estudiante_email', 'estudiante__email'),
+            ('publicacion_id', 'publicacion_id'),
+            ('publicacion_titulo', 'publicacion__titulo'),
+            ('administrador_id', 'administrador_id'),
+        ),
+        campo_fecha='fecha',
+        estados={
+            '0': 0, 'pendiente': 0,
+            '1': 1, 'aceptado': 1,
+            '2': 2, 'rechazado': 2,
+        },
+    ),
+    'publicaciones': Exportacion(
+        'publicaciones', Publicacion,
+        columnas=(
+            ('id_publicacion', 'id_publicacion'),
+            ('fecha_creacion', 'fecha_creacion'),
+            ('estado', 'estado'),
+            ('titulo', 'titulo'),
+            ('descripcion', 'descripcion'),
+            ('habilidades_ofrecidas', 'habilidades_ofrecidas'),
+            ('habilidades_buscadas', 'habilidades_buscadas'),
+            ('fecha_desactivacion', 'fecha_desactivacion'),
+            ('oculta_por_reportes', 'oculta_por_reportes'),
+            ('estudiante_id', 'estudiante_id'),
+            ('estudiante_email', 'estudiante__email'),
+        ),
+        campo_fecha='fecha_creacion',
+        estados={'true': True, '1': True, 'false': False, '0': False},
+    ),
+    'calificaciones': Exportacion(
+        'calificaciones', CalificacionChat,
+        columnas=(
+            ('id_calificacion', 'id_calificacion'),
+            ('fecha', 'fecha'),
+            ('chat_id', 'chat_id'),
+            ('publicacion_id', 'chat__publicacion_id'),
+            ('evaluador_id', 'evaluador_id'),
+            ('evaluador_email', 'evaluador__email'),
+            ('puntaje', 'puntaje'),
+            ('comentario', 'comentario'),
+        ),
+        campo_fecha='fecha',
+    ),
+}
+
+
+# ----------------------- FORMATOS -----------------------
+
+class _Eco:
+    """Buffer de csv.writer que devuelve la línea en vez de guardarla."""
+
+    def write(self, valor):
+        return valor
+
+
+def _celda_csv(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, (list, dict)):
+        return json.dumps(valor, ensure_ascii=False)
+    if hasattr(valor, 'isoformat'):
+        return valor.isoformat()
+    if isinstance(valor, str) and valor.startswith(_PREFIJOS_FORMULA):
+        return "'" + valor
+    return valor
+
+
+def _lineas_csv(exportacion, filas):
+    escritor = csv.writer(_Eco())
+    yield '\ufeff'  # BOM: Excel abre el UTF-8 con tildes correctas
+    yield escritor.writerow([encabezado for encabezado, _ in exportacion.columnas])
+    for fila in filas:
+        yield escritor.writerow([_celda_csv(valor) for valor in fila])
+
+
+def _lineas_ndjson(exportacion, filas):
+    encabezados = [encabezado for encabezado, _ in exportacion.columnas]
+    codificador = DjangoJSONEncoder(ensure_ascii=False)
+    for fila in filas:
+        yield codificador.encode(dict(zip(encabezados, fila))) + '\n'
+
+
+def _en_bloques(lineas):
+    """Junta líneas hasta ~TAMANO_BLOQUE: una escritura por bloque y no por fila."""
+    bloque, tamano = [], 0
+    for linea in lineas:
+        bloque.append(linea)
+        tamano += len(linea)
+        if tamano >= TAMANO_BLOQUE:
+            yield ''.join(bloque)
+            bloque, tamano = [], 0
+    if bloque:
+        yield ''.join(bloque)
+
+
+def respuesta(exportacion, queryset, formato):
+    """StreamingHttpResponse con el queryset en el formato pedido ('csv' o 'ndjson')."""
+    generador = _lineas_csv if formato == 'csv' else _lineas_ndjson
+    response = StreamingHttpResponse(
+        _en_bloques(generador(exportacion, exportacion.filas(queryset))), content_type=FORMATOS[formato]
+    )
+    archivo = f"{exportacion.nombre}-{timezone.localdate():%Y%m%d}.{formato}"
+    response['Content-Disposition'] = f'attachment; filename="{archivo}"'
+    return response
@@ -0,0 +1,67 @@
+"""
+Soporte del header Idempotency-Key para endpoints de creación.
+
+La primera respuesta exitosa se guarda en ClaveIdempotencia por
+(estudiante, ruta, clave); un reintento con la misma clave recibe esa
+respuesta sin volver a ejecutar la vista. Las claves vencen a las
+IDEMPOTENCIA_TTL_SEGUNDOS y el barredor las borra.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .models import ClaveIdempotencia
+
+HEADER = 'Idempotency-Key'
+LARGO_MAXIMO = 255
+
+
+def clave_de(request):
+    clave = request.headers.get(HEADER)
+    if clave is None:
+        return None
+    clave = clave.strip()
+    if not clave or len(clave) > LARGO_MAXIMO:
+        raise ValidationError({HEADER: [f"Debe tener entre 1 y {LARGO_MAXIMO} caracteres."]})
+    return clave
+
+
+def respuesta_guardada(request):
+    """Response guardada para la clave del request, o None si no hay (o no vino header)."""
+    clave = clave_de(request)
+    if clave is None:
+        return None
+    guardada = ClaveIdempotencia.objects.filter(
+        estudiante=request.user, ruta=request.path, clave=clave, expira__gt=timezone.now()
+    ).values_list('status', 'respuesta').first()
+    if guardada is None:
+        return None
+    status, datos = guardada
+    return Response(datos, status=status, headers={'Idempotent-Replayed': 'true'})
+
+
+def guardar_respuesta(request, response):
+    """Guarda la respuesta para la clave del request (si vino). Devuelve la misma response."""
+    clave = clave_de(request)
+    if clave is None or response.status_code >= 400:
+        return response
+    ttl = timedelta(seconds=settings.IDEMPOTENCIA_TTL_SEGUNDOS)
+    # Una clave vencida que el barredor aún no borró se reemplaza
+    ClaveIdempotencia.objects.filter(
+        estudiante=request.user, ruta=request.path, clave=clave, expira__lte=timezone.now()
+    ).delete()
+    try:
+        with transaction.atomic():
+            ClaveIdempotencia.objects.create(
+                estudiante=request.user, ruta=request.path, clave=clave,
+                status=response.status_code, respuesta=response.data,
+                expira=timezone.now() + ttl,
+            )
+    except IntegrityError:
+        pass  # otra request con la misma clave la guardó primero
+    return response
@@ -0,0 +1,182 @@
+"""
+Costo en base de datos de cada request (lo usa InstrumentacionMiddleware).
+
+Para las requests muestreadas se instala un `connection.execute_wrapper`
+que cuenta consultas, suma su tiempo y agrupa las sentencias por firma
+(SQL con los literales normalizados) para detectar N+1. También se mide el
+tiempo de serialización de DRF (el `.data` del serializer más externo).
+Los resultados van al header Server-Timing, a una línea de log JSON y a
+los histogramas por nombre de URL de core.metricas.
+"""
+
+import contextvars
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from rest_framework import serializers
+
+from . import metricas
+
+logger = logging.getLogger(__name__)
+
+_medicion_actual = contextvars.ContextVar('medicion_actual', default=None)
+
+_LITERALES = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)'), '(...)'),
+)
+
+
+def config(nombre):
+    return settings.INSTRUMENTACION[nombre]
+
+
+def firma(sql):
+    """SQL sin literales ni listas IN: dos consultas de un N+1 comparten firma."""
+    for patron, reemplazo in _LITERALES:
+        sql = patron.sub(reemplazo, sql)
+    return sql
+
+
+class Medicion:
+    __slots__ = ('consultas', 'sql_ms', 'serializador_ms', 'firmas', 'serializando')
+
+    def __init__(self):
+        self.consultas = 0
+        self.sql_ms = 0.0
+        self.serializador_ms = 0.0
+        self.firmas = Counter()
+        self.serializando = False
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_ms += (time.perf_counter() - inicio) * 1000
+            self.consultas += 1
+            self.firmas[firma(sql)] += 1
+
+    def duplicadas(self):
+        umbral = config('UMBRAL_DUPLICADAS')
+        return [(sql, veces) for sql, veces in self.firmas.most_common() if veces >= umbral]
+
+    def medir(self):
+        """Context manager: instala el wrapper en todas las conexiones abiertas por alias."""
+        pila = ExitStack()
+        for alias in connections:
+            pila.enter_context(connections[alias].execute_wrapper(self))
+        token = _medicion_actual.set(self)
+        pila.callback(_medicion_actual.reset, token)
+        return pila
+
+
+# ----------------------- TIEMPO DE SERIALIZACIÓN -----------------------
+
+def _envolver_data(clase):
+    original = clase.data
+
+    def data(self):
+        medicion = _medicion_actual.get()
+        if medicion is None or medicion.serializando:
+            return original.fget(self)
+        medicion.serializando = True  # solo cuenta el serializer más externo
+        inicio = time.perf_counter()
+        try:
+            return original.fget(self)
+        finally:
+            medicion.serializador_ms += (time.perf_counter() - inicio) * 1000
+            medicion.serializando = False
+
+    data.__wrapped__ = original
+    clase.data = property(data)
+
+
+_instalado = False
+_instalado_lock = threading.Lock()
+
+
+def instalar_medicion_serializadores():
+    global _instalado
+    with _instalado_lock:
+        if not _instalado:
+            _envolver_data(serializers.Serializer)
+            _envolver_data(serializers.ListSerializer)
+            _instalado = True
+
+
+# ----------------------- MÉTRICAS POR RUTA -----------------------
+
+def registrar(url_name, metodo, medicion):
+    """Vuelca una medición al colector de core.metricas."""
+    metricas.sql_requests.observar(medicion.sql_ms / 1000, url_name=url_name, method=metodo)
+    metricas.consultas_requests.observar(medicion.consultas, url_name=url_name, method=metodo)
+    if medicion.duplicadas():
+        metricas.requests_con_duplicadas.inc(url_name=url_name, method=metodo)
+
+
+def resumen_por_ruta():
+    """Histogramas por (url_name, método) en segundos y consultas, para la vista JSON."""
+    datos = metricas.agregados()
+    rutas = {}
+
+    def fila(url_name, metodo):
+        return rutas.setdefault((url_name, metodo), {
+            'url_name': url_name, 'metodo': metodo,
+            'latencia': None, 'sql': None, 'consultas': None, 'con_duplicadas': 0,
+        })
+
+    latencias = {}
+    for (url_name, metodo, _status), valor in datos.get(metricas.latencia_requests.nombre, {}).items():
+        acumulada = latencias.setdefault((url_name, metodo), [0] * len(valor))
+        for i, v in enumerate(valor):
+            acumulada[i] += v
+    for clave, valor in latencias.items():
+        fila(*clave)['latencia'] = metricas.histograma_como_dict(metricas.latencia_requests, valor)
+    for campo, metrica in (('sql', metricas.sql_requests), ('consultas', metricas.consultas_requests)):
+        for clave, valor in datos.get(metrica.nombre, {}).items():
+            fila(*clave)[campo] = metricas.histograma_como_dict(metrica, valor)
+    for clave, valor in datos.get(metricas.requests_con_duplicadas.nombre, {}).items():
+        fila(*clave)['con_duplicadas'] = valor
+    return [rutas[clave] for clave in sorted(rutas)]
+
+
+# ----------------------- SALIDAS -----------------------
+
+def server_timing(total_ms, medicion):
+    partes = [
+        f'db;dur={medicion.sql_ms:.1f};desc="{medicion.consultas} consultas"',
+        f'ser;dur={medicion.serializador_ms:.1f}',
+        f'app;dur={max(0.0, total_ms - medicion.sql_ms - medicion.serializador_ms):.1f}',
+        f'total;dur={total_ms:.1f}',
+    ]
+    duplicadas = medicion.duplicadas()
+    if duplicadas:
+        partes.append(f'dup;desc="{len(duplicadas)} firmas repetidas"')
+    return ', '.join(partes)
+
+
+def registrar_log(request, ruta, status, total_ms, medicion):
+    duplicadas = medicion.duplicadas()
+    lenta = total_ms >= config('LOG_LENTAS_MS')
+    if not (duplicadas or lenta or config('LOG_TODAS')):
+        return
+    logger.log(logging.WARNING if duplicadas or lenta else logging.INFO, json.dumps({
+        'evento': 'request',
+        'metodo': request.method,
+        'ruta': ruta,
+        'status': status,
+        'total_ms': round(total_ms, 2),
+        'consultas': medicion.consultas,
+        'sql_ms': round(medicion.sql_ms, 2),
+        'serializador_ms': round(medicion.serializador_ms, 2),
+        'duplicadas': [{'sql': sql[:300], 'veces': veces} for sql, veces in duplicadas[:3]],
+    }, ensure_ascii=False))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from core.barredor import barrer_exclusivo
+
+
+class Command(BaseCommand):
+    help = (
+        "Desactiva publicaciones expiradas y elimina las inactivas hace mucho, "
+        "en lotes acotados. Los valores por defecto vienen de settings.BARREDOR."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias-expiracion', type=int)
+        parser.add_argument('--dias-eliminacion', type=int)
+        parser.add_argument('--lote', type=int)
+        parser.add_argument('--pausa', type=float, help="Segundos de pausa entre lotes.")
+
+    def handle(self, *args, **opts):
+        metricas = barrer_exclusivo(
+            dias_expiracion=opts['dias_expiracion'],
+            dias_eliminacion=opts['dias_eliminacion'],
+            lote=opts['lote'],
+            pausa=opts['pausa'],
+        )
+        if metricas is None:
+            self.stdout.write(self.style.WARNING("Otro proceso está barriendo; no se hizo nada."))
+            return
+        for fase, datos in metricas.items():
+            self.stdout.write(
+                f"{fase}: {datos['filas']} filas en {datos['segundos']} s "
+                f"({datos['filas_por_segundo']} filas/s)"
+            )
+        self.stdout.write(self.style.SUCCESS("Barrido completo."))
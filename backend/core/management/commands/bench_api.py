@@ -0,0 +1,102 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from core import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de la API: siembra datos sintéticos, corre los escenarios en proceso "
+        "(cliente de test, cuenta consultas) o contra un servidor (--url) y guarda p50/p95/p99, "
+        "consultas por request y throughput en JSON. Los datos sembrados se borran al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help="URL base de un servidor levantado, p. ej. http://127.0.0.1:8000")
+        parser.add_argument('--escenarios', default=','.join(benchmark.ESCENARIOS),
+                            help="Lista separada por comas. Disponibles: " + ', '.join(benchmark.ESCENARIOS))
+        parser.add_argument('--iteraciones', type=int, default=50, help="Por escenario.")
+        parser.add_argument('--concurrencia', type=int, default=1)
+        parser.add_argument('--usuarios', type=int, default=200)
+        parser.add_argument('--publicaciones', type=int, default=1000)
+        parser.add_argument('--chats', type=int, default=400)
+        parser.add_argument('--mensajes-por-chat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--con-throttle', action='store_true',
+                            help="En proceso el throttling se desactiva salvo que se pida.")
+        parser.add_argument('--salida', default='bench_api.json')
+        parser.add_argument('--comparar', help="JSON de una corrida anterior para mostrar diferencias.")
+        parser.add_argument('--conservar-datos', action='store_true')
+
+    def handle(self, *args, **opts):
+        escenarios = [e.strip() for e in opts['escenarios'].split(',') if e.strip()]
+        desconocidos = set(escenarios) - set(benchmark.ESCENARIOS)
+        if desconocidos:
+            raise CommandError(f"Escenarios desconocidos: {', '.join(sorted(desconocidos))}")
+
+        anterior = None
+        if opts['comparar']:
+            anterior = json.loads(Path(opts['comparar']).read_text(encoding='utf-8'))
+
+        benchmark.limpiar()
+        datos = benchmark.sembrar(
+            usuarios=opts['usuarios'], publicaciones=opts['publicaciones'], chats=opts['chats'],
+            mensajes_por_chat=opts['mensajes_por_chat'], seed=opts['seed'],
+        )
+        self.stdout.write(f"Datos sembrados: {len(datos['usuarios'])} usuarios con chats.")
+
+        try:
+            if opts['url']:
+                modo, cliente = 'http', benchmark.ClienteHTTP(opts['url'])
+                resultados = self._correr(cliente, datos, escenarios, opts)
+            else:
+                modo, cliente = 'en_proceso', benchmark.ClienteEnProceso()
+                ajustes = {} if opts['con_throttle'] else {'THROTTLE_BUCKETS': {}}
+                with override_settings(**ajustes):
+                    resultados = self._correr(cliente, datos, escenarios, opts)
+        finally:
+            if not opts['conservar_datos']:
+                benchmark.limpiar()
+
+        parametros = {k: opts[k] for k in (
+            'iteraciones', 'concurrencia', 'usuarios', 'publicaciones', 'chats', 'mensajes_por_chat', 'seed'
+        )}
+        informe = benchmark.informe(modo, parametros, resultados)
+        Path(opts['salida']).write_text(json.dumps(informe, indent=2, ensure_ascii=False), encoding='utf-8')
+
+        self._imprimir(resultados)
+        if anterior:
+            if anterior.get('modo') != modo or anterior.get('motor_bd') != informe['motor_bd']:
+                self.stdout.write(self.style.WARNING(
+                    f"Ojo: la corrida anterior fue {anterior.get('modo')}/{anterior.get('motor_bd')} "
+                    f"y esta {modo}/{informe['motor_bd']}; las latencias no son comparables."
+                ))
+            self._imprimir_comparacion(benchmark.comparar(anterior, informe), anterior.get('commit'))
+        self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {opts['salida']}"))
+
+    def _correr(self, cliente, datos, escenarios, opts):
+        return benchmark.ejecutar(
+            cliente, datos, escenarios,
+            iteraciones=opts['iteraciones'], concurrencia=opts['concurrencia'], seed=opts['seed'],
+        )
+
+    def _imprimir(self, resultados):
+        self.stdout.write(
+            f"{'escenario':<18}{'req':>6}{'p50':>9}{'p95':>9}{'p99':>9}{'req/s':>9}{'consultas':>11}  status"
+        )
+        for nombre, r in resultados.items():
+            consultas = '-' if r['consultas_promedio'] is None else r['consultas_promedio']
+            self.stdout.write(
+                f"{nombre:<18}{r['requests']:>6}{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}"
+                f"{r['requests_por_segundo']:>9}{consultas:>11}  {r['status']}"
+            )
+
+    def _imprimir_comparacion(self, filas, commit_anterior):
+        self.stdout.write(f"\nComparación con {commit_anterior or 'la corrida anterior'}:")
+        for escenario, metrica, antes, ahora, cambio in filas:
+            signo = '' if cambio is None else f"{cambio:+.1f}%"
+            estilo = self.style.ERROR if cambio and cambio > 10 else (lambda x: x)
+            self.stdout.write(estilo(f"  {escenario:<18}{metrica:<20}{antes:>10} -> {ahora:<10} {signo}"))
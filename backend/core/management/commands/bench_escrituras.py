@@ -0,0 +1,84 @@
+import statistics
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections, transaction
+
+from core.models import Chat, ChatParticipante, Mensaje, Publicacion
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de carga de escrituras concurrentes: N hilos insertan mensajes en "
+        "paralelo contra la base configurada (DB_ENGINE). Sirve para comparar "
+        "SQLite (con/sin WAL) y PostgreSQL (con/sin pool). Los datos se borran al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=8)
+        parser.add_argument('--mensajes', type=int, default=200, help="Mensajes por hilo.")
+
+    def handle(self, *args, **opts):
+        chats, usuarios = self._preparar(opts['hilos'])
+        latencias, errores = [], []
+        lock = threading.Lock()
+
+        def trabajador(chat, usuario):
+            propias, fallos = [], []
+            try:
+                for i in range(opts['mensajes']):
+                    inicio = time.perf_counter()
+                    try:
+                        with transaction.atomic():
+                            Mensaje.objects.create(chat=chat, estudiante=usuario, texto=f'bench {i}')
+                            Chat.objects.filter(pk=chat.pk).update(estado_intercambio=False)
+                    except OperationalError as error:
+                        fallos.append(str(error))
+                        continue
+                    propias.append((time.perf_counter() - inicio) * 1000)
+            finally:
+                connections.close_all()
+            with lock:
+                latencias.extend(propias)
+                errores.extend(fallos)
+
+        hilos = [threading.Thread(target=trabajador, args=par) for par in zip(chats, usuarios)]
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        segundos = time.perf_counter() - inicio
+
+        self._limpiar(usuarios)
+
+        latencias.sort()
+        percentil = lambda p: latencias[min(len(latencias) - 1, int(len(latencias) * p))] if latencias else 0.0
+        self.stdout.write(f"Motor: {connection.vendor} ({connection.settings_dict['NAME']})")
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(latencias)} escrituras en {segundos:.2f} s ({len(latencias) / segundos:.0f}/s) con "
+            f"{opts['hilos']} hilos: p50={statistics.median(latencias) if latencias else 0:.1f} ms "
+            f"p95={percentil(0.95):.1f} ms p99={percentil(0.99):.1f} ms, {len(errores)} errores"
+        ))
+        if errores:
+            self.stdout.write(f"Primer error: {errores[0]}")
+
+    def _preparar(self, cantidad):
+        usuarios = [
+            User.objects.create(email=f'bench-escrituras-{i}@bench.local', password='!')
+            for i in range(cantidad)
+        ]
+        publicacion = Publicacion.objects.create(titulo='bench escrituras', estudiante=usuarios[0])
+        chats = []
+        for usuario in usuarios:
+            chat = Chat.objects.create(publicacion=publicacion, receptor=usuario)
+            ChatParticipante.objects.create(chat=chat, estudiante=usuario, rol='receptor')
+            chats.append(chat)
+        return chats, usuarios
+
+    def _limpiar(self, usuarios):
+        User.objects.filter(pk__in=[u.pk for u in usuarios]).delete()
@@ -0,0 +1,79 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Habilidad, Perfil, PerfilHabilidad, Publicacion, PublicacionHabilidad
+from core.recomendaciones import MotorRecomendaciones
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la latencia del motor de recomendaciones sobre N publicaciones sintéticas. "
+        "Todo se ejecuta dentro de una transacción que se revierte al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--publicaciones', type=int, default=100_000)
+        parser.add_argument('--usuarios', type=int, default=10_000)
+        parser.add_argument('--habilidades', type=int, default=500)
+        parser.add_argument('--consultas', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **opts):
+        rnd = random.Random(opts['seed'])
+        with transaction.atomic():
+            usuarios = self._sembrar(rnd, opts)
+            latencias = []
+            for usuario in rnd.sample(usuarios, min(opts['consultas'], len(usuarios))):
+                inicio = time.perf_counter()
+                MotorRecomendaciones.calcular(usuario)
+                latencias.append((time.perf_counter() - inicio) * 1000)
+            transaction.set_rollback(True)
+
+        latencias.sort()
+        p95 = latencias[max(0, int(len(latencias) * 0.95) - 1)]
+        self.stdout.write(self.style.SUCCESS(
+            f"{opts['publicaciones']} publicaciones, {len(latencias)} consultas: "
+            f"p50={statistics.median(latencias):.1f} ms  p95={p95:.1f} ms  max={latencias[-1]:.1f} ms"
+        ))
+
+    def _sembrar(self, rnd, opts):
+        inicio = time.perf_counter()
+        habilidades = Habilidad.objects.bulk_create(
+            [Habilidad(nombre=f'bench-habilidad-{i}') for i in range(opts['habilidades'])]
+        )
+        usuarios = User.objects.bulk_create(
+            [User(email=f'bench-{i}@bench.local', password='!') for i in range(opts['usuarios'])]
+        )
+        perfiles = Perfil.objects.bulk_create(
+            [Perfil(estudiante=u, nombre='Bench', apellido=str(u.pk), carrera='Bench', area='Bench')
+             for u in usuarios]
+        )
+        PerfilHabilidad.objects.bulk_create(
+            [PerfilHabilidad(perfil=p, habilidad=h)
+             for p in perfiles for h in rnd.sample(habilidades, 3)],
+            batch_size=5000,
+        )
+
+        publicaciones = Publicacion.objects.bulk_create(
+            [Publicacion(titulo=f'bench {i}', estudiante=rnd.choice(usuarios))
+             for i in range(opts['publicaciones'])],
+            batch_size=5000,
+        )
+        filas = []
+        for publicacion in publicaciones:
+            for tipo in ('ofrecida', 'buscada'):
+                filas.extend(
+                    PublicacionHabilidad(publicacion=publicacion, habilidad=h, tipo=tipo)
+                    for h in rnd.sample(habilidades, rnd.randint(1, 3))
+                )
+        PublicacionHabilidad.objects.bulk_create(filas, batch_size=5000)
+
+        self.stdout.write(f"Datos sintéticos creados en {time.perf_counter() - inicio:.1f} s")
+        return usuarios
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.service import ReputacionService
+
+
+class Command(BaseCommand):
+    help = "Reconstruye la tabla Reputacion desde CalificacionChat, leyendo en lotes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=1000, help="Calificaciones por lote.")
+
+    def handle(self, *args, **opts):
+        inicio = time.perf_counter()
+        procesadas, reputaciones = ReputacionService.recalcular(tamano_lote=opts['lote'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{procesadas} calificaciones procesadas, {reputaciones} reputaciones escritas "
+            f"en {time.perf_counter() - inicio:.1f} s"
+        ))
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import busqueda
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de búsqueda de texto completo de publicaciones."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=1000, help="Publicaciones por lote.")
+
+    def handle(self, *args, **opts):
+        inicio = time.perf_counter()
+        total = busqueda.reconstruir(tamano_lote=opts['lote'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} publicaciones indexadas en {time.perf_counter() - inicio:.1f} s"
+        ))
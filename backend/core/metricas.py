@@ -0,0 +1,332 @@
+"""
+Colector único de métricas de la aplicación, expuesto en formato de texto
+de Prometheus (sin dependencias) y leído también por las vistas JSON de
+caché e instrumentación.
+
+Contadores e histogramas viven en memoria del proceso, en un diccionario
+por hilo: el camino caliente no toma locks. Con varios workers (gunicorn),
+cada proceso vuelca su snapshot a METRICAS['DIRECTORIO']/<pid>.json y el
+worker que atiende el scrape suma los de todos, así Prometheus ve un solo
+target. Los contadores de procesos ya muertos se siguen sumando (para que
+no retrocedan); los gauges solo cuentan procesos vivos.
+
+Los gauges que salen de la base (reportes pendientes, bandeja de correo)
+se consultan en el momento del scrape.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_FANOUT = (1, 2, 5, 10, 25, 50, 100, 250)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100)
+
+
+def config(nombre):
+    return settings.METRICAS[nombre]
+
+
+class _PorHilo:
+    """Un dict por hilo; solo su dueño lo escribe. Leer es sumar todos."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._todos = []
+        self._lock = threading.Lock()
+
+    def propio(self):
+        valores = getattr(self._local, 'valores', None)
+        if valores is None:
+            valores = self._local.valores = {}
+            with self._lock:  # una sola vez por hilo
+                self._todos.append(valores)
+        return valores
+
+    def items(self):
+        with self._lock:
+            todos = list(self._todos)
+        for valores in todos:
+            while True:
+                try:
+                    yield from list(valores.items())
+                    break
+                except RuntimeError:  # el dueño insertó una etiqueta nueva justo ahora
+                    continue
+
+
+class Metrica:
+    tipo = None
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = _PorHilo()
+        _registro[nombre] = self
+
+    def _clave(self, etiquetas):
+        return tuple(str(etiquetas.get(e, '')) for e in self.etiquetas)
+
+
+class Contador(Metrica):
+    tipo = 'counter'
+
+    def inc(self, cantidad=1, **etiquetas):
+        valores = self._valores.propio()
+        clave = self._clave(etiquetas)
+        valores[clave] = valores.get(clave, 0) + cantidad
+
+    def snapshot(self):
+        total = {}
+        for clave, valor in self._valores.items():
+            total[clave] = total.get(clave, 0) + valor
+        return total
+
+
+class Histograma(Metrica):
+    tipo = 'histogram'
+
+    def __init__(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_SEGUNDOS):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = tuple(buckets)
+
+    def observar(self, valor, **etiquetas):
+        valores = self._valores.propio()
+        clave = self._clave(etiquetas)
+        fila = valores.get(clave)
+        if fila is None:
+            # [cuenta por bucket..., +Inf, suma, total]
+            fila = valores[clave] = [0] * (len(self.buckets) + 3)
+        for i, limite in enumerate(self.buckets):
+            if valor <= limite:
+                fila[i] += 1
+                break
+        else:
+            fila[len(self.buckets)] += 1
+        fila[-2] += valor
+        fila[-1] += 1
+
+    def snapshot(self):
+        total = {}
+        for clave, fila in self._valores.items():
+            acumulada = total.setdefault(clave, [0] * len(fila))
+            for i, valor in enumerate(fila):
+                acumulada[i] += valor
+        return total
+
+
+_registro = {}
+
+# ----------------------- MÉTRICAS DE LA APLICACIÓN -----------------------
+
+latencia_requests = Histograma(
+    'interu_http_request_duration_seconds', 'Latencia de las requests HTTP por nombre de URL.',
+    ('url_name', 'method', 'status'),
+)
+# Solo requests muestreadas por InstrumentacionMiddleware
+sql_requests = Histograma(
+    'interu_http_request_sql_seconds', 'Tiempo en SQL por request (muestreadas).',
+    ('url_name', 'method'),
+)
+consultas_requests = Histograma(
+    'interu_http_request_queries', 'Consultas SQL por request (muestreadas).',
+    ('url_name', 'method'), buckets=BUCKETS_CONSULTAS,
+)
+requests_con_duplicadas = Contador(
+    'interu_http_requests_consultas_duplicadas_total',
+    'Requests muestreadas con una misma firma SQL repetida (posible N+1).',
+    ('url_name', 'method'),
+)
+fanout_notificaciones = Histograma(
+    'interu_notificaciones_fanout', 'Destinatarios por despacho de notificaciones.',
+    ('tipo',), buckets=BUCKETS_FANOUT,
+)
+mensajes_enviados = Contador('interu_mensajes_enviados_total', 'Mensajes de chat creados.')
+notificaciones_escritas = Contador(
+    'interu_notificaciones_escritas_total', 'Notificaciones insertadas o agrupadas.', ('tipo',)
+)
+consultas_cache = Contador(
+    'interu_cache_consultas_total', 'Lecturas del caché de respuestas por grupo y resultado.',
+    ('grupo', 'resultado'),
+)
+
+
+# ----------------------- MULTIPROCESO -----------------------
+
+def _directorio():
+    return config('DIRECTORIO')
+
+
+def _snapshot_proceso():
+    metricas = {
+        nombre: [[list(clave), valor] for clave, valor in metrica.snapshot().items()]
+        for nombre, metrica in _registro.items()
+    }
+    return {'pid': os.getpid(), 'metricas': metricas, 'gauges': _gauges_proceso()}
+
+
+_ultimo_volcado = 0.0
+
+
+def volcar(forzar=False):
+    """Escribe el snapshot de este proceso (si hay directorio y pasó el intervalo)."""
+    global _ultimo_volcado
+    directorio = _directorio()
+    ahora = time.monotonic()
+    if not directorio or (not forzar and ahora - _ultimo_volcado < config('INTERVALO_VOLCADO')):
+        return
+    _ultimo_volcado = ahora
+    os.makedirs(directorio, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=directorio, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as archivo:
+        json.dump(_snapshot_proceso(), archivo)
+    os.replace(temporal, os.path.join(directorio, f'{os.getpid()}.json'))
+
+
+def _proceso_vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _snapshots():
+    directorio = _directorio()
+    if not directorio:
+        return [_snapshot_proceso()]
+    volcar(forzar=True)
+    snapshots = []
+    for nombre in os.listdir(directorio):
+        if not nombre.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directorio, nombre), encoding='utf-8') as archivo:
+                snapshots.append(json.load(archivo))
+        except (OSError, ValueError):
+            continue  # archivo a medio reemplazar o borrado
+    return snapshots
+
+
+def _agregar(snapshots):
+    contadores, gauges = {}, {}
+    for snapshot in snapshots:
+        vivo = _proceso_vivo(snapshot['pid'])
+        for nombre, filas in snapshot['metricas'].items():
+            destino = contadores.setdefault(nombre, {})
+            for clave, valor in filas:
+                clave = tuple(clave)
+                if isinstance(valor, list):
+                    acumulada = destino.setdefault(clave, [0] * len(valor))
+                    for i, v in enumerate(valor):
+                        acumulada[i] += v
+                else:
+                    destino[clave] = destino.get(clave, 0) + valor
+        if vivo:
+            for nombre, valor in snapshot['gauges'].items():
+                gauges[nombre] = gauges.get(nombre, 0) + valor
+    return contadores, gauges
+
+
+def agregados():
+    """{nombre: {etiquetas: valor}} de contadores e histogramas, sumando todos los procesos."""
+    return _agregar(_snapshots())[0]
+
+
+def histograma_como_dict(metrica, fila):
+    acumulado, buckets = 0, {}
+    for limite, cuenta in zip((*metrica.buckets, '+Inf'), fila[:-2]):
+        acumulado += cuenta
+        buckets[str(limite)] = acumulado
+    return {'buckets': buckets, 'suma': round(fila[-2], 6), 'total': fila[-1]}
+
+
+# ----------------------- GAUGES -----------------------
+
+def _gauges_proceso():
+    """Uso de conexiones de este proceso (del pool de psycopg si está activo)."""
+    gauges = {'interu_db_conexiones_abiertas': 0}
+    for conexion in connections.all(initialized_only=True):
+        if conexion.connection is not None:
+            gauges['interu_db_conexiones_abiertas'] += 1
+        pool = getattr(conexion, 'pool', None) if conexion.vendor == 'postgresql' else None
+        if pool is not None:
+            estadisticas = pool.get_stats()
+            gauges['interu_db_pool_tamano'] = estadisticas.get('pool_size', 0)
+            gauges['interu_db_pool_disponibles'] = estadisticas.get('pool_available', 0)
+            gauges['interu_db_pool_esperando'] = estadisticas.get('requests_waiting', 0)
+    return gauges
+
+
+def _gauges_base():
+    from accounts.models import CorreoSaliente
+    from .models import Reporte
+
+    gauges = [('interu_reportes_pendientes', {}, Reporte.objects.filter(estado=0).count())]
+    por_estado = dict(
+        CorreoSaliente.objects.exclude(estado='enviado')
+        .values_list('estado').annotate(total=Count('pk')).values_list('estado', 'total')
+    )
+    for estado in ('pendiente', 'enviando', 'fallido'):
+        gauges.append(('interu_correos_en_cola', {'estado': estado}, por_estado.get(estado, 0)))
+    return gauges
+
+
+# ----------------------- EXPOSICIÓN -----------------------
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _etiquetas(pares):
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{k}="{_escapar(v)}"' for k, v in pares) + '}'
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def exponer():
+    """Texto en formato de exposición 0.0.4 con las métricas de todos los procesos."""
+    contadores, gauges_proceso = _agregar(_snapshots())
+    lineas = []
+
+    for nombre, metrica in _registro.items():
+        lineas.append(f'# HELP {nombre} {metrica.ayuda}')
+        lineas.append(f'# TYPE {nombre} {metrica.tipo}')
+        for clave, valor in sorted(contadores.get(nombre, {}).items()):
+            base = list(zip(metrica.etiquetas, clave))
+            if metrica.tipo == 'histogram':
+                acumulado = 0
+                for limite, cuenta in zip((*metrica.buckets, '+Inf'), valor[:-2]):
+                    acumulado += cuenta
+                    lineas.append(f'{nombre}_bucket{_etiquetas(base + [("le", limite)])} {acumulado}')
+                lineas.append(f'{nombre}_sum{_etiquetas(base)} {_numero(valor[-2])}')
+                lineas.append(f'{nombre}_count{_etiquetas(base)} {valor[-1]}')
+            else:
+                lineas.append(f'{nombre}{_etiquetas(base)} {_numero(valor)}')
+
+    for nombre, valor in sorted(gauges_proceso.items()):
+        lineas.append(f'# TYPE {nombre} gauge')
+        lineas.append(f'{nombre} {_numero(valor)}')
+
+    vistos = set()
+    for nombre, etiquetas, valor in _gauges_base():
+        if nombre not in vistos:
+            lineas.append(f'# TYPE {nombre} gauge')
+            vistos.add(nombre)
+        lineas.append(f'{nombre}{_etiquetas(sorted(etiquetas.items()))} {valor}')
+
+    return '\n'.join(lineas) + '\n'
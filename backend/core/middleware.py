@@ -0,0 +1,82 @@
+import random
+import time
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+
+from accounts.authentication import JWTAuthenticationConCache
+
+from . import instrumentacion, metricas
+
+
+@database_sync_to_async
+def obtener_usuario_desde_token(token):
+    autenticador = JWTAuthenticationConCache()
+    try:
+        return autenticador.get_user(autenticador.get_validated_token(token))
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return AnonymousUser()
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Autentica conexiones WebSocket con el mismo access token de SimpleJWT.
+    El navegador no puede enviar headers en el handshake, así que el token
+    se acepta en ?token=<access> o en el subprotocolo "bearer, <access>".
+    """
+
+    async def __call__(self, scope, receive, send):
+        token = None
+        query = parse_qs(scope.get('query_string', b'').decode())
+        if query.get('token'):
+            token = query['token'][0]
+        else:
+            subprotocolos = scope.get('subprotocols') or []
+            if len(subprotocolos) == 2 and subprotocolos[0].lower() == 'bearer':
+                token = subprotocolos[1]
+
+        scope['user'] = await obtener_usuario_desde_token(token) if token else AnonymousUser()
+        return await super().__call__(scope, receive, send)
+
+
+class InstrumentacionMiddleware:
+    """
+    Mide la latencia de todas las requests (core.metricas, por nombre de URL)
+    y, para una fracción INSTRUMENTACION['MUESTREO'], también consultas,
+    tiempo SQL, duplicadas (N+1) y serialización. Con muestreo 0 el costo
+    extra es un perf_counter y una comparación.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        instrumentacion.instalar_medicion_serializadores()
+
+    def __call__(self, request):
+        muestreo = instrumentacion.config('MUESTREO')
+        medir = muestreo > 0 and (muestreo >= 1 or random.random() < muestreo)
+
+        inicio = time.perf_counter()
+        if medir:
+            medicion = instrumentacion.Medicion()
+            with medicion.medir():
+                response = self.get_response(request)
+        else:
+            response = self.get_response(request)
+        total = time.perf_counter() - inicio
+
+        match = getattr(request, 'resolver_match', None)
+        url_name = (match.url_name if match else None) or 'sin_nombre'
+        metricas.latencia_requests.observar(
+            total, url_name=url_name, method=request.method, status=response.status_code
+        )
+        if medir:
+            total_ms = total * 1000
+            ruta = '/' + match.route if match and match.route else '<sin_ruta>'
+            instrumentacion.registrar(url_name, request.method, medicion)
+            instrumentacion.registrar_log(request, ruta, response.status_code, total_ms, medicion)
+            response['Server-Timing'] = instrumentacion.server_timing(total_ms, medicion)
+        metricas.volcar()
+        return response
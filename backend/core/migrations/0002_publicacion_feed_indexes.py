@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='perfil',
+            index=models.Index(fields=['carrera', 'estudiante'], name='perfil_carrera_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='perfil',
+            index=models.Index(fields=['area', 'estudiante'], name='perfil_area_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='publicacion',
+            index=models.Index(fields=['estado', '-fecha_creacion', '-id_publicacion'], name='pub_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='publicacion',
+            index=models.Index(fields=['estudiante', 'estado', '-fecha_creacion'], name='pub_autor_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:00
+
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def _normalizar(nombres):
+    vistas = []
+    for nombre in nombres or []:
+        texto = unicodedata.normalize('NFKD', str(nombre))
+        texto = ' '.join(''.join(c for c in texto if not unicodedata.combining(c)).lower().split())
+        if texto and texto not in vistas:
+            vistas.append(texto)
+    return vistas
+
+
+def poblar_indice(apps, schema_editor):
+    Habilidad = apps.get_model('core', 'Habilidad')
+    Perfil = apps.get_model('core', 'Perfil')
+    Publicacion = apps.get_model('core', 'Publicacion')
+    PerfilHabilidad = apps.get_model('core', 'PerfilHabilidad')
+    PublicacionHabilidad = apps.get_model('core', 'PublicacionHabilidad')
+
+    catalogo = {}
+
+    def habilidad(nombre):
+        if nombre not in catalogo:
+            catalogo[nombre], _ = Habilidad.objects.get_or_create(nombre=nombre)
+        return catalogo[nombre]
+
+    filas = []
+    for perfil in Perfil.objects.only('pk', 'habilidades_ofrecidas').iterator(chunk_size=1000):
+        filas.extend(
+            PerfilHabilidad(perfil_id=perfil.pk, habilidad=habilidad(n))
+            for n in _normalizar(perfil.habilidades_ofrecidas)
+        )
+    PerfilHabilidad.objects.bulk_create(filas, batch_size=1000)
+
+    filas = []
+    publicaciones = Publicacion.objects.only('pk', 'habilidades_ofrecidas', 'habilidades_buscadas')
+    for publicacion in publicaciones.iterator(chunk_size=1000):
+        for tipo, nombres in (('ofrecida', publicacion.habilidades_ofrecidas),
+                              ('buscada', publicacion.habilidades_buscadas)):
+            filas.extend(
+                PublicacionHabilidad(publicacion_id=publicacion.pk, habilidad=habilidad(n), tipo=tipo)
+                for n in _normalizar(nombres)
+            )
+    PublicacionHabilidad.objects.bulk_create(filas, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_publicacion_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Habilidad',
+            fields=[
+                ('id_habilidad', models.AutoField(primary_key=True, serialize=False)),
+                ('nombre', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PerfilHabilidad',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('habilidad', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='perfiles', to='core.habilidad')),
+                ('perfil', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='indice_habilidades', to='core.perfil')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['habilidad', 'perfil'], name='perfhab_habilidad_idx')],
+                'unique_together': {('perfil', 'habilidad')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PublicacionHabilidad',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('ofrecida', 'Ofrecida'), ('buscada', 'Buscada')], max_length=10)),
+                ('habilidad', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='publicaciones', to='core.habilidad')),
+                ('publicacion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='indice_habilidades', to='core.publicacion')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['habilidad', 'tipo', 'publicacion'], name='pubhab_habilidad_idx')],
+                'unique_together': {('publicacion', 'habilidad', 'tipo')},
+            },
+        ),
+        migrations.RunPython(poblar_indice, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_indice_habilidades'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mensaje',
+            index=models.Index(fields=['chat', 'id_mensaje'], name='mensaje_chat_id_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:05
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def agrupar_no_leidas(apps, schema_editor):
+    """Deja una sola 'nuevo_mensaje' no leída por (estudiante, chat) antes de la restricción."""
+    Notificacion = apps.get_model('core', 'Notificacion')
+    pendientes = Notificacion.objects.filter(leida=False, tipo='nuevo_mensaje', chat__isnull=False)
+    duplicados = (
+        pendientes.values('estudiante', 'chat')
+        .annotate(total=Count('pk'), ultima=Max('pk'))
+        .filter(total__gt=1)
+    )
+    for grupo in duplicados.iterator():
+        Notificacion.objects.filter(pk=grupo['ultima']).update(cantidad=grupo['total'])
+        pendientes.filter(estudiante=grupo['estudiante'], chat=grupo['chat']).exclude(
+            pk=grupo['ultima']
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_mensaje_chat_id_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificacion',
+            name='cantidad',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunPython(agrupar_no_leidas, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='notificacion',
+            constraint=models.UniqueConstraint(condition=models.Q(('leida', False), ('tipo', 'nuevo_mensaje')), fields=('estudiante', 'chat', 'tipo'), name='notif_mensaje_no_leida_unica'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def poblar_contadores(apps, schema_editor):
+    Notificacion = apps.get_model('core', 'Notificacion')
+    ContadorNotificaciones = apps.get_model('core', 'ContadorNotificaciones')
+    conteos = (
+        Notificacion.objects.filter(leida=False)
+        .values('estudiante', 'tipo')
+        .annotate(total=Count('pk'))
+    )
+    ContadorNotificaciones.objects.bulk_create(
+        [
+            ContadorNotificaciones(estudiante_id=c['estudiante'], tipo=c['tipo'], no_leidas=c['total'])
+            for c in conteos.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_notificacion_agrupada'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorNotificaciones',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('nuevo_chat', 'Nuevo chat'), ('nuevo_mensaje', 'Nuevo mensaje'), ('intercambio_completado', 'Intercambio completado'), ('calificacion_chat', 'Calificación de chat')], max_length=50)),
+                ('no_leidas', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='notificacion',
+            index=models.Index(condition=models.Q(('leida', False)), fields=['estudiante', '-fecha'], name='notif_no_leidas_idx'),
+        ),
+        migrations.AddField(
+            model_name='contadornotificaciones',
+            name='estudiante',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contadores_notificaciones', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='contadornotificaciones',
+            unique_together={('estudiante', 'tipo')},
+        ),
+        migrations.RunPython(poblar_contadores, migrations.RunPython.noop),
+    ]
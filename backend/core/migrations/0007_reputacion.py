@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_contador_notificaciones'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Reputacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cantidad', models.PositiveIntegerField(default=0)),
+                ('suma', models.PositiveIntegerField(default=0)),
+                ('promedio', models.FloatField(default=0)),
+                ('ultimos_comentarios', models.JSONField(blank=True, default=list)),
+                ('estudiante', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='reputacion', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
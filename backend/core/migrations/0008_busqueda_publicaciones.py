@@ -0,0 +1,81 @@
+import re
+import unicodedata
+
+from django.db import migrations
+
+# Copia congelada de core.busqueda al momento de esta migración: cambios
+# posteriores en ese módulo no deben alterar lo que hace una migración vieja.
+TABLA_FTS = 'core_publicacion_fts'
+CONFIG_PG = 'es_unaccent'
+VECTOR_PG = (
+    "(setweight(to_tsvector('es_unaccent'::regconfig, coalesce(titulo, '')), 'A') || "
+    "setweight(to_tsvector('es_unaccent'::regconfig, coalesce(descripcion, '')), 'B'))"
+)
+SUFIJOS = (
+    'amientos', 'imientos', 'amiento', 'imiento', 'aciones', 'uciones',
+    'adoras', 'adores', 'idades', 'mente', 'acion', 'ucion', 'adora', 'ador',
+    'ismos', 'istas', 'ibles', 'ables', 'idad', 'ismo', 'ista', 'ible', 'able',
+    'ces', 'ar', 'er', 'ir', 'as', 'os', 'es', 's', 'a', 'o', 'e',
+)
+
+
+def documento(texto):
+    texto = unicodedata.normalize('NFKD', texto or '')
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+    palabras = []
+    for palabra in re.findall(r'\w+', texto):
+        for sufijo in SUFIJOS:
+            if palabra.endswith(sufijo) and len(palabra) - len(sufijo) >= 3:
+                palabra = palabra[:-len(sufijo)]
+                break
+        palabras.append(palabra)
+    return ' '.join(palabras)
+
+
+def crear_indice(apps, schema_editor):
+    conexion = schema_editor.connection
+    if conexion.vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS unaccent')
+        schema_editor.execute(f"""
+            DO $$ BEGIN
+                IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = '{CONFIG_PG}') THEN
+                    CREATE TEXT SEARCH CONFIGURATION {CONFIG_PG} (COPY = spanish);
+                    ALTER TEXT SEARCH CONFIGURATION {CONFIG_PG}
+                        ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem;
+                END IF;
+            END $$;
+        """)
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS pub_busqueda_gin ON core_publicacion USING GIN ({VECTOR_PG})'
+        )
+    elif conexion.vendor == 'sqlite':
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA_FTS} USING fts5('
+            "titulo, descripcion, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        Publicacion = apps.get_model('core', 'Publicacion')
+        filas = Publicacion.objects.values_list('pk', 'titulo', 'descripcion')
+        for pk, titulo, descripcion in filas.iterator(chunk_size=1000):
+            schema_editor.execute(
+                f'INSERT INTO {TABLA_FTS} (rowid, titulo, descripcion) VALUES (%s, %s, %s)',
+                [pk, documento(titulo), documento(descripcion)],
+            )
+
+
+def eliminar_indice(apps, schema_editor):
+    conexion = schema_editor.connection
+    if conexion.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS pub_busqueda_gin')
+    elif conexion.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {TABLA_FTS}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_reputacion'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, eliminar_indice),
+    ]
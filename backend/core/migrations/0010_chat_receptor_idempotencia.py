@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_publicacion_fecha_desactivacion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClaveIdempotencia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ruta', models.CharField(max_length=200)),
+                ('clave', models.CharField(max_length=255)),
+                ('status', models.PositiveSmallIntegerField()),
+                ('respuesta', models.JSONField()),
+                ('expira', models.DateTimeField(db_index=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='receptor',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='chats_iniciados', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='claveidempotencia',
+            name='estudiante',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='claveidempotencia',
+            constraint=models.UniqueConstraint(fields=('estudiante', 'ruta', 'clave'), name='idempotencia_clave_unica'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:18
+
+from django.db import migrations
+
+
+def completar_receptor(apps, schema_editor):
+    """
+    Copia el receptor desde ChatParticipante. Si ya había chats duplicados
+    para el mismo (publicacion, receptor), solo el más antiguo lo recibe; el
+    resto queda con receptor null y no choca con la restricción única.
+    """
+    Chat = apps.get_model('core', 'Chat')
+    ChatParticipante = apps.get_model('core', 'ChatParticipante')
+    vistos = set()
+    receptores = (
+        ChatParticipante.objects.filter(rol='receptor')
+        .order_by('chat_id')
+        .values_list('chat_id', 'chat__publicacion_id', 'estudiante_id')
+    )
+    for chat_id, publicacion_id, estudiante_id in receptores.iterator():
+        if (publicacion_id, estudiante_id) in vistos:
+            continue
+        vistos.add((publicacion_id, estudiante_id))
+        Chat.objects.filter(pk=chat_id).update(receptor_id=estudiante_id)
+
+
+class Migration(migrations.Migration):
+    # Separada del AddField y del AddConstraint: en PostgreSQL el UPDATE deja
+    # triggers de FK pendientes y el ALTER TABLE en la misma transacción falla.
+
+    dependencies = [
+        ('core', '0010_chat_receptor_idempotencia'),
+    ]
+
+    operations = [
+        migrations.RunPython(completar_receptor, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_completar_chat_receptor'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='chat',
+            constraint=models.UniqueConstraint(fields=('publicacion', 'receptor'), name='chat_publicacion_receptor_unico'),
+        ),
+    ]
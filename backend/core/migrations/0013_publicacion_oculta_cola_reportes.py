@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_chat_publicacion_receptor_unico'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publicacion',
+            name='oculta_por_reportes',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='reporte',
+            index=models.Index(fields=['estado', 'publicacion', 'fecha'], name='reporte_cola_idx'),
+        ),
+    ]
@@ -18,6 +18,13 @@ class Perfil(models.Model):
     #Lista JSON
     habilidades_ofrecidas = models.JSONField(default=list, blank=True) 
 
+    class Meta:
+        indexes = [
+            # Filtros del feed por carrera / área del autor
+            models.Index(fields=['carrera', 'estudiante'], name='perfil_carrera_idx'),
+            models.Index(fields=['area', 'estudiante'], name='perfil_area_idx'),
+        ]
+
     def __str__(self):
         return self.alias or f"{self.nombre} {self.apellido or ''}"
 
@@ -34,11 +41,61 @@ class Publicacion(models.Model):
 
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     estado = models.BooleanField(default=True)
+    fecha_desactivacion = models.DateTimeField(blank=True, null=True)
+    # Desactivada automáticamente al superar MODERACION['UMBRAL_OCULTAR'] denunciantes
+    oculta_por_reportes = models.BooleanField(default=False)
     estudiante = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            # Paginación por cursor del feed (estado + orden fecha/id)
+            models.Index(fields=['estado', '-fecha_creacion', '-id_publicacion'], name='pub_feed_idx'),
+            models.Index(fields=['estudiante', 'estado', '-fecha_creacion'], name='pub_autor_feed_idx'),
+            # Barredor: inactivas hace mucho tiempo
+            models.Index(fields=['estado', 'fecha_desactivacion'], name='pub_desactivacion_idx'),
+        ]
+
     def __str__(self):
         return self.titulo
 
+# ----------------------- HABILIDADES (ÍNDICE) ----------------
+
+class Habilidad(models.Model):
+    """
+    Catálogo normalizado de habilidades. Los JSONField de Perfil y Publicacion
+    siguen siendo la fuente de verdad; estas tablas son su índice invertido.
+    """
+    id_habilidad = models.AutoField(primary_key=True)
+    nombre = models.CharField(max_length=100, unique=True)  # normalizado
+
+    def __str__(self):
+        return self.nombre
+
+
+class PublicacionHabilidad(models.Model):
+    TIPO_CHOICES = (('ofrecida', 'Ofrecida'), ('buscada', 'Buscada'))
+    publicacion = models.ForeignKey(Publicacion, on_delete=models.CASCADE, related_name='indice_habilidades')
+    habilidad = models.ForeignKey(Habilidad, on_delete=models.CASCADE, related_name='publicaciones')
+    tipo = models.CharField(max_length=10, choices=TIPO_CHOICES)
+
+    class Meta:
+        unique_together = ('publicacion', 'habilidad', 'tipo')
+        indexes = [
+            # habilidad -> publicaciones (búsqueda ?ofrece= / ?busca=)
+            models.Index(fields=['habilidad', 'tipo', 'publicacion'], name='pubhab_habilidad_idx'),
+        ]
+
+
+class PerfilHabilidad(models.Model):
+    perfil = models.ForeignKey(Perfil, on_delete=models.CASCADE, related_name='indice_habilidades')
+    habilidad = models.ForeignKey(Habilidad, on_delete=models.CASCADE, related_name='perfiles')
+
+    class Meta:
+        unique_together = ('perfil', 'habilidad')
+        indexes = [
+            models.Index(fields=['habilidad', 'perfil'], name='perfhab_habilidad_idx'),
+        ]
+
 # ----------------------- CHAT ----------------
 
 class Chat(models.Model):
@@ -46,11 +103,35 @@ class Chat(models.Model):
     fecha_inicio = models.DateTimeField(auto_now_add=True)
     estado_intercambio = models.BooleanField(default=False)
     publicacion = models.ForeignKey('core.Publicacion', on_delete=models.CASCADE, related_name='chats')
+    # Quien inició el chat; junto con la publicación identifica el chat (null en duplicados antiguos)
+    receptor = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name='chats_iniciados'
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['publicacion', 'receptor'], name='chat_publicacion_receptor_unico'),
+        ]
 
     def __str__(self):
         return f"Chat {self.id_chat}"
 
 
+class ClaveIdempotencia(models.Model):
+    """Respuesta guardada para un header Idempotency-Key; vence a las IDEMPOTENCIA_TTL_SEGUNDOS."""
+    estudiante = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    ruta = models.CharField(max_length=200)
+    clave = models.CharField(max_length=255)
+    status = models.PositiveSmallIntegerField()
+    respuesta = models.JSONField()
+    expira = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['estudiante', 'ruta', 'clave'], name='idempotencia_clave_unica'),
+        ]
+
+
 class ChatParticipante(models.Model):
     ROL_CHOICES = (('autor', 'Autor'), ('receptor', 'Receptor'))
     chat = models.ForeignKey(Chat, on_delete=models.CASCADE, related_name='participantes')
@@ -70,6 +151,12 @@ class Mensaje(models.Model):
     estudiante = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='mensajes')
     leido = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Sincronización incremental: mensajes de un chat después de un id
+            models.Index(fields=['chat', 'id_mensaje'], name='mensaje_chat_id_idx'),
+        ]
+
 # ----------------------- CALIFICACION ----------------
 
 class CalificacionChat(models.Model):
@@ -83,6 +170,21 @@ class CalificacionChat(models.Model):
     class Meta:
         unique_together = ('chat', 'evaluador')
 
+class Reputacion(models.Model):
+    """
+    Agregado materializado de las calificaciones recibidas por un estudiante.
+    Se actualiza con cada CalificacionChat y se reconstruye con
+    `manage.py recalcular_reputaciones`.
+    """
+    estudiante = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='reputacion')
+    cantidad = models.PositiveIntegerField(default=0)
+    suma = models.PositiveIntegerField(default=0)
+    promedio = models.FloatField(default=0)
+    ultimos_comentarios = models.JSONField(default=list, blank=True)  # más reciente primero
+
+    def __str__(self):
+        return f"{self.estudiante} ({self.promedio:.2f})"
+
 # ----------------------- NOTIFICACIONES -----------------
 
 class Notificacion(models.Model):
@@ -97,12 +199,43 @@ class Notificacion(models.Model):
     tipo = models.CharField(max_length=50, choices=TIPO_CHOICES, default='nuevo_mensaje')
     fecha = models.DateTimeField(auto_now_add=True)
     leida = models.BooleanField(default=False)
+    cantidad = models.PositiveIntegerField(default=1)  # eventos agrupados en esta notificación
 
     estudiante = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notificaciones')
     chat = models.ForeignKey(Chat, on_delete=models.CASCADE, null=True, blank=True, related_name='notificaciones')
     publicacion = models.ForeignKey('core.Publicacion', on_delete=models.CASCADE, null=True, blank=True, related_name='notificaciones')
     calificacion = models.ForeignKey('core.CalificacionChat', on_delete=models.CASCADE, null=True, blank=True, related_name='notificaciones')
 
+    class Meta:
+        constraints = [
+            # Los 'nuevo_mensaje' de un chat se agrupan en una sola fila no leída
+            models.UniqueConstraint(
+                fields=['estudiante', 'chat', 'tipo'],
+                condition=models.Q(leida=False, tipo='nuevo_mensaje'),
+                name='notif_mensaje_no_leida_unica',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['estudiante', '-fecha'],
+                condition=models.Q(leida=False),
+                name='notif_no_leidas_idx',
+            ),
+        ]
+
+
+class ContadorNotificaciones(models.Model):
+    """
+    Notificaciones no leídas por (estudiante, tipo), mantenido junto con cada
+    alta o lectura para que el resumen no tenga que contar filas.
+    """
+    estudiante = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='contadores_notificaciones')
+    tipo = models.CharField(max_length=50, choices=Notificacion.TIPO_CHOICES)
+    no_leidas = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('estudiante', 'tipo')
+
 
 # ----------------------- REPORTES -----------------
 class Reporte(models.Model):
@@ -113,3 +246,9 @@ class Reporte(models.Model):
     administrador = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name='reportes_moderados')
     estudiante = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='reportes')
     publicacion = models.ForeignKey(Publicacion, on_delete=models.CASCADE)
+
+    class Meta:
+        indexes = [
+            # Cola de moderación: pendientes agrupados por publicación
+            models.Index(fields=['estado', 'publicacion', 'fecha'], name='reporte_cola_idx'),
+        ]
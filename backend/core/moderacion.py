@@ -0,0 +1,101 @@
+"""
+Cola de moderación de reportes.
+
+Los reportes pendientes se agrupan por publicación y se ordenan por
+cantidad y recencia con una sola consulta agregada (índice
+reporte_cola_idx). Una acción se aplica a todos los reportes de un grupo en
+una transacción, con UPDATEs en lote en vez de guardar fila por fila.
+
+Cuando MODERACION['UMBRAL_OCULTAR'] estudiantes distintos reportan una
+publicación activa, esta se oculta sola hasta que un administrador decida.
+"""
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min
+
+from .models import Publicacion, Reporte
+from .service import SoftDeleteService
+
+PENDIENTE, ACEPTADO, RECHAZADO = 0, 1, 2
+ACCIONES = ('aprobar', 'rechazar', 'eliminar')
+
+
+def config(nombre):
+    return settings.MODERACION[nombre]
+
+
+def cola():
+    """Un registro por publicación con reportes pendientes, las más reportadas y recientes primero."""
+    return (
+        Reporte.objects.filter(estado=PENDIENTE)
+        .values(
+            'publicacion_id', 'publicacion__titulo', 'publicacion__estudiante_id',
+            'publicacion__estado', 'publicacion__oculta_por_reportes',
+        )
+        .annotate(
+            reportes=Count('pk'),
+            denunciantes=Count('estudiante_id', distinct=True),
+            primer_reporte=Min('fecha'),
+            ultimo_reporte=Max('fecha'),
+        )
+        .order_by('-reportes', '-ultimo_reporte', 'publicacion_id')
+    )
+
+
+def _denunciantes_pendientes(publicacion_ids):
+    return dict(
+        Reporte.objects.filter(estado=PENDIENTE, publicacion_id__in=publicacion_ids)
+        .values_list('publicacion_id')
+        .annotate(total=Count('estudiante_id', distinct=True))
+        .values_list('publicacion_id', 'total')
+    )
+
+
+def ocultar_si_supera_umbral(publicacion_id):
+    """Desactiva la publicación si llegó al umbral de denunciantes. Devuelve True si la ocultó."""
+    if _denunciantes_pendientes([publicacion_id]).get(publicacion_id, 0) < config('UMBRAL_OCULTAR'):
+        return False
+    publicacion = Publicacion.objects.filter(pk=publicacion_id)
+    with transaction.atomic():
+        # Solo si estaba activa: una que el autor ya desactivó no queda marcada
+        if not SoftDeleteService.desactivar_lote(publicacion):
+            return False
+        publicacion.update(oculta_por_reportes=True)
+    return True
+
+
+@transaction.atomic
+def aplicar_accion(reportes, accion, administrador):
+    """
+    Aplica `accion` a los reportes del queryset y a sus publicaciones:
+    - aprobar: los reportes quedan aceptados; la publicación queda como está.
+    - rechazar: los reportes quedan rechazados; si la publicación estaba
+      oculta por reportes y ya no llega al umbral, se reactiva.
+    - eliminar: los reportes quedan aceptados y la publicación se desactiva.
+    Devuelve la cantidad de reportes actualizados.
+    """
+    publicacion_ids = list(reportes.values_list('publicacion_id', flat=True).distinct())
+    if not publicacion_ids:
+        return 0
+    # Bloquea las publicaciones: dos moderadores sobre el mismo grupo se serializan
+    list(Publicacion.objects.select_for_update().filter(pk__in=publicacion_ids).values_list('pk'))
+
+    cambiados = reportes.update(
+        estado=RECHAZADO if accion == 'rechazar' else ACEPTADO, administrador=administrador
+    )
+    publicaciones = Publicacion.objects.filter(pk__in=publicacion_ids)
+
+    if accion == 'eliminar':
+        SoftDeleteService.desactivar_lote(publicaciones)
+    elif accion == 'rechazar':
+        ocultas = list(publicaciones.filter(oculta_por_reportes=True).values_list('pk', flat=True))
+        pendientes = _denunciantes_pendientes(ocultas)
+        restaurar = [pk for pk in ocultas if pendientes.get(pk, 0) < config('UMBRAL_OCULTAR')]
+        if restaurar:
+            SoftDeleteService.reactivar_lote(Publicacion.objects.filter(pk__in=restaurar))
+        publicaciones = Publicacion.objects.filter(pk__in=restaurar)
+
+    # Tras la decisión del administrador la ocultación deja de ser automática
+    publicaciones.filter(oculta_por_reportes=True).update(oculta_por_reportes=False)
+    return cambiados
@@ -0,0 +1,205 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from . import metricas
+from .consumers import publicar_evento
+from .models import ContadorNotificaciones, Notificacion
+from .serializers import NotificacionSerializer
+
+logger = logging.getLogger(__name__)
+
+# Tipos que se agrupan en una sola fila no leída por (estudiante, chat)
+TIPOS_AGRUPABLES = {'nuevo_mensaje'}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _obtener_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'NOTIFICACIONES_WORKERS', 2),
+                thread_name_prefix='notificaciones',
+            )
+    return _pool
+
+
+def notificar(usuarios, tipo, mensaje, chat=None, publicacion=None, calificacion=None):
+    """
+    Programa una notificación para varios destinatarios (usuarios o ids).
+    Nada se escribe hasta que la transacción actual se confirma; entonces se
+    insertan todas con un solo bulk_create, en el hilo de la request o en el
+    pool de background si NOTIFICACIONES_ASINCRONAS está activo.
+    """
+    usuario_ids = sorted({getattr(u, 'pk', u) for u in usuarios})
+    if not usuario_ids:
+        return
+
+    def tarea():
+        escribir_notificaciones(
+            usuario_ids, tipo, mensaje,
+            chat_id=getattr(chat, 'pk', chat),
+            publicacion_id=getattr(publicacion, 'pk', publicacion),
+            calificacion_id=getattr(calificacion, 'pk', calificacion),
+        )
+
+    transaction.on_commit(lambda: _despachar(tarea))
+
+
+def _despachar(tarea):
+    if getattr(settings, 'NOTIFICACIONES_ASINCRONAS', False):
+        _obtener_pool().submit(_ejecutar_en_worker, tarea)
+    else:
+        _ejecutar(tarea)
+
+
+def _ejecutar(tarea):
+    # La transacción principal ya se confirmó: un fallo aquí se registra,
+    # no se convierte en un 500 para el usuario.
+    try:
+        tarea()
+    except Exception:
+        logger.exception("Falló el despacho de notificaciones")
+
+
+def _ejecutar_en_worker(tarea):
+    try:
+        _ejecutar(tarea)
+    finally:
+        connections.close_all()
+
+
+def escribir_notificaciones(usuario_ids, tipo, mensaje, chat_id=None, publicacion_id=None, calificacion_id=None):
+    """
+    Inserta (o agrupa) las notificaciones y las publica por WebSocket.
+    Devuelve la lista de notificaciones afectadas.
+    """
+    ahora = timezone.now()
+    with transaction.atomic():
+        agrupadas = {}
+        if tipo in TIPOS_AGRUPABLES and chat_id:
+            # El lock evita agrupar en una fila que marcar_leida está cerrando:
+            # esa UPDATE espera a este commit, o esta lectura ya la ve leída.
+            agrupadas = dict(
+                Notificacion.objects.select_for_update().filter(
+                    estudiante_id__in=usuario_ids, chat_id=chat_id, tipo=tipo, leida=False
+                ).values_list('estudiante_id', 'pk')
+            )
+            if agrupadas:
+                Notificacion.objects.filter(pk__in=agrupadas.values(), leida=False).update(
+                    cantidad=F('cantidad') + 1, mensaje=mensaje, fecha=ahora
+                )
+
+        nuevas = [
+            Notificacion(
+                estudiante_id=usuario_id, tipo=tipo, mensaje=mensaje, chat_id=chat_id,
+                publicacion_id=publicacion_id, calificacion_id=calificacion_id,
+            )
+            for usuario_id in usuario_ids if usuario_id not in agrupadas
+        ]
+        try:
+            with transaction.atomic():
+                creadas = Notificacion.objects.bulk_create(nuevas)
+        except IntegrityError:
+            # Otro despacho del mismo chat creó la fila no leída primero
+            creadas = []
+            for notificacion in nuevas:
+                notificacion, creada = _crear_o_agrupar(notificacion, ahora)
+                if creada:
+                    creadas.append(notificacion)
+                else:
+                    agrupadas[notificacion.estudiante_id] = notificacion.pk
+
+        sumar_no_leidas([n.estudiante_id for n in creadas], tipo)
+        afectadas = list(
+            Notificacion.objects.filter(pk__in=[*agrupadas.values(), *(n.pk for n in creadas)])
+        )
+
+    metricas.fanout_notificaciones.observar(len(usuario_ids), tipo=tipo)
+    metricas.notificaciones_escritas.inc(len(afectadas), tipo=tipo)
+    for notificacion in afectadas:
+        publicar_evento(
+            [notificacion.estudiante_id], 'nueva_notificacion',
+            dict(NotificacionSerializer(notificacion).data),
+        )
+    return afectadas
+
+
+def _crear_o_agrupar(notificacion, ahora):
+    while True:
+        try:
+            with transaction.atomic():
+                notificacion.save(force_insert=True)
+            return notificacion, True
+        except IntegrityError:
+            notificacion.pk = None
+        existente = Notificacion.objects.select_for_update().filter(
+            estudiante_id=notificacion.estudiante_id, chat_id=notificacion.chat_id,
+            tipo=notificacion.tipo, leida=False,
+        ).first()
+        if existente is None:
+            continue  # la fila que chocó se marcó leída entretanto: se vuelve a insertar
+        Notificacion.objects.filter(pk=existente.pk).update(
+            cantidad=F('cantidad') + 1, mensaje=notificacion.mensaje, fecha=ahora
+        )
+        return existente, False
+
+
+# ----------------------- CONTADORES DE NO LEÍDAS -----------------------
+
+def sumar_no_leidas(usuario_ids, tipo, cantidad=1):
+    if not usuario_ids:
+        return
+    ContadorNotificaciones.objects.bulk_create(
+        [ContadorNotificaciones(estudiante_id=u, tipo=tipo) for u in set(usuario_ids)],
+        ignore_conflicts=True,
+    )
+    ContadorNotificaciones.objects.filter(estudiante_id__in=usuario_ids, tipo=tipo).update(
+        no_leidas=F('no_leidas') + cantidad
+    )
+
+
+def restar_no_leidas(usuario_id, tipo, cantidad=1):
+    ContadorNotificaciones.objects.filter(estudiante_id=usuario_id, tipo=tipo).update(
+        no_leidas=Greatest(F('no_leidas') - cantidad, Value(0))
+    )
+
+
+@transaction.atomic
+def marcar_leida(notificacion):
+    """Marca una notificación como leída; el contador solo baja si estaba pendiente."""
+    if Notificacion.objects.filter(pk=notificacion.pk, leida=False).update(leida=True):
+        restar_no_leidas(notificacion.estudiante_id, notificacion.tipo)
+    notificacion.leida = True
+    return notificacion
+
+
+@transaction.atomic
+def marcar_todas_leidas(usuario):
+    """Marca todas las pendientes como leídas y devuelve cuántas eran."""
+    total = 0
+    for tipo, _ in Notificacion.TIPO_CHOICES:
+        actualizadas = Notificacion.objects.filter(
+            estudiante=usuario, tipo=tipo, leida=False
+        ).update(leida=True)
+        if actualizadas:
+            restar_no_leidas(usuario.pk, tipo, actualizadas)
+            total += actualizadas
+    return total
+
+
+def resumen_no_leidas(usuario):
+    por_tipo = {tipo: 0 for tipo, _ in Notificacion.TIPO_CHOICES}
+    por_tipo.update(
+        ContadorNotificaciones.objects.filter(estudiante=usuario).values_list('tipo', 'no_leidas')
+    )
+    return {'total': sum(por_tipo.values()), 'por_tipo': por_tipo}
@@ -0,0 +1,26 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class PublicacionCursorPagination(CursorPagination):
+    """
+    Paginación por cursor (keyset) del feed de publicaciones.
+    El costo de cada página no depende de cuántas filas haya antes.
+    """
+    page_size = 20
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    ordering = ('-fecha_creacion', '-id_publicacion')
+
+
+class ChatCursorPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    ordering = ('-fecha_inicio', '-id_chat')
+
+
+class ColaModeracionPagination(PageNumberPagination):
+    """La cola se ordena por un agregado (cantidad de reportes), así que no admite cursor."""
+    page_size = 20
+    page_size_query_param = 'limit'
+    max_page_size = 100
@@ -0,0 +1,122 @@
+import math
+
+from django.core.cache import cache
+from django.db.models import Case, Count, F, FloatField, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Cast, Coalesce, Sqrt
+
+from . import cache_respuestas
+from .models import PerfilHabilidad, PublicacionHabilidad
+
+TOP_K_MAX = 50
+
+
+def _conteo_por_tipo(tipo):
+    """Subconsulta: cuántas habilidades de un tipo tiene la publicación."""
+    return Subquery(
+        PublicacionHabilidad.objects.filter(publicacion=OuterRef('publicacion'), tipo=tipo)
+        .values('publicacion')
+        .annotate(total=Count('id'))
+        .values('total'),
+        output_field=IntegerField(),
+    )
+
+
+class MotorRecomendaciones:
+    """
+    Recomienda publicaciones activas con intercambio recíproco:
+    mis habilidades cubren lo que buscan y sus habilidades cubren lo que busco.
+
+    Cada publicación y el usuario se tratan como vectores binarios dispersos
+    sobre el catálogo de Habilidad. El puntaje es la suma de las similitudes
+    coseno en ambas direcciones y se calcula en SQL sobre el índice invertido,
+    así que solo se leen las publicaciones que comparten alguna habilidad.
+    """
+
+    # Versionado con core.cache_respuestas: una versión expulsada del caché no
+    # vuelve a apuntar a rankings viejos.
+    NAMESPACE = 'recomendaciones'
+
+    @staticmethod
+    def _clave_usuario(usuario_id):
+        return cache_respuestas.clave(MotorRecomendaciones.NAMESPACE, usuario_id)
+
+    @staticmethod
+    def invalidar_todo():
+        """Cambió una publicación: el ranking de cualquiera puede cambiar."""
+        cache_respuestas.invalidar(MotorRecomendaciones.NAMESPACE)
+
+    @staticmethod
+    def invalidar_usuario(usuario_id):
+        cache.delete(MotorRecomendaciones._clave_usuario(usuario_id))
+
+    @staticmethod
+    def vector_usuario(usuario):
+        """Ids de habilidades que el usuario ofrece (perfil) y busca (sus publicaciones activas)."""
+        ofrecidas = set(
+            PerfilHabilidad.objects.filter(perfil__estudiante=usuario).values_list('habilidad_id', flat=True)
+        )
+        buscadas = set(
+            PublicacionHabilidad.objects.filter(
+                publicacion__estudiante=usuario, publicacion__estado=True, tipo='buscada'
+            ).values_list('habilidad_id', flat=True)
+        )
+        return ofrecidas, buscadas
+
+    @staticmethod
+    def calcular(usuario, limite=TOP_K_MAX):
+        ofrecidas, buscadas = MotorRecomendaciones.vector_usuario(usuario)
+        if not ofrecidas and not buscadas:
+            return []
+
+        inv_ofrecidas = 1 / math.sqrt(len(ofrecidas)) if ofrecidas else 0.0
+        inv_buscadas = 1 / math.sqrt(len(buscadas)) if buscadas else 0.0
+
+        filas = (
+            PublicacionHabilidad.objects
+            .filter(publicacion__estado=True)
+            .exclude(publicacion__estudiante=usuario)
+            .filter(
+                Q(tipo='buscada', habilidad_id__in=ofrecidas)
+                | Q(tipo='ofrecida', habilidad_id__in=buscadas)
+            )
+            .values('publicacion')
+            .annotate(
+                cubre=Count('id', filter=Q(tipo='buscada')),
+                recibe=Count('id', filter=Q(tipo='ofrecida')),
+                n_buscadas=Coalesce(_conteo_por_tipo('buscada'), 0),
+                n_ofrecidas=Coalesce(_conteo_por_tipo('ofrecida'), 0),
+            )
+            .annotate(
+                puntaje=Case(
+                    When(cubre__gt=0, then=Cast('cubre', FloatField()) * Value(inv_ofrecidas) / Sqrt('n_buscadas')),
+                    default=Value(0.0),
+                    output_field=FloatField(),
+                ) + Case(
+                    When(recibe__gt=0, then=Cast('recibe', FloatField()) * Value(inv_buscadas) / Sqrt('n_ofrecidas')),
+                    default=Value(0.0),
+                    output_field=FloatField(),
+                )
+            )
+            .order_by(F('puntaje').desc(), F('publicacion').desc())
+            [:limite]
+        )
+
+        return [
+            {
+                'publicacion': fila['publicacion'],
+                'puntaje': round(fila['puntaje'], 4),
+                'cubre': fila['cubre'],
+                'recibe': fila['recibe'],
+                'reciproco': fila['cubre'] > 0 and fila['recibe'] > 0,
+            }
+            for fila in filas
+        ]
+
+    @staticmethod
+    def top_k(usuario, k=10):
+        """Top-K cacheado por usuario (se guarda siempre el top TOP_K_MAX)."""
+        resultado = cache_respuestas.obtener_o_calcular(
+            MotorRecomendaciones.NAMESPACE, [usuario.pk], 'recomendaciones',
+            lambda: MotorRecomendaciones.calcular(usuario, TOP_K_MAX),
+        )
+        return resultado[:k]
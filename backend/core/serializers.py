@@ -1,12 +1,45 @@
+from django.db import transaction
 from rest_framework import serializers
+from .service import IndiceHabilidades, normalizar_habilidad
+from . import moderacion
 from .models import (
     CalificacionChat, Publicacion, Chat, ChatParticipante,
-    Mensaje, Reporte, Perfil, Notificacion
+    Mensaje, Reporte, Perfil, Notificacion, Reputacion
 )
 
 
+# ----------------------- REPUTACION SERIALIZERS
+class ReputacionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Reputacion
+        fields = ['cantidad', 'promedio', 'ultimos_comentarios']
+
+
+def reputacion_de(usuario):
+    """
+    Reputación ya cargada con select_related('...reputacion'); si el usuario
+    todavía no tiene calificaciones devuelve el agregado vacío.
+    """
+    reputacion = getattr(usuario, 'reputacion', None)
+    if reputacion is None:
+        return {'cantidad': 0, 'promedio': None, 'ultimos_comentarios': []}
+    return ReputacionSerializer(reputacion).data
+
+
+def validar_habilidades(valor):
+    """Lista de habilidades que caben en Habilidad.nombre una vez normalizadas."""
+    if not isinstance(valor, list):
+        raise serializers.ValidationError("Debe ser una lista.")
+    largo = IndiceHabilidades.LARGO_MAXIMO
+    if any(len(normalizar_habilidad(h)) > largo for h in valor):
+        raise serializers.ValidationError(f"Cada habilidad debe tener como máximo {largo} caracteres.")
+    return valor
+
+
 # ----------------------- PERFIL SERIALIZERS
 class PerfilCompletoSerializer(serializers.ModelSerializer):
+    reputacion = serializers.SerializerMethodField()
+
     class Meta:
         model = Perfil
         fields = [
@@ -19,9 +52,29 @@ class PerfilCompletoSerializer(serializers.ModelSerializer):
             'biografia',
             'foto',
             'habilidades_ofrecidas', # ahora lista
+            'reputacion',
         ]
         read_only_fields = ['id_perfil']
 
+    def get_reputacion(self, obj):
+        return reputacion_de(obj.estudiante)
+
+    def validate_habilidades_ofrecidas(self, valor):
+        return validar_habilidades(valor)
+
+    @transaction.atomic
+    def create(self, validated_data):
+        perfil = super().create(validated_data)
+        IndiceHabilidades.sincronizar_perfil(perfil)
+        return perfil
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        perfil = super().update(instance, validated_data)
+        if 'habilidades_ofrecidas' in validated_data:
+            IndiceHabilidades.sincronizar_perfil(perfil)
+        return perfil
+
 
 class ConfirmarEliminarCuentaSerializer(serializers.Serializer):
     password = serializers.CharField(write_only=True)
@@ -29,10 +82,22 @@ class ConfirmarEliminarCuentaSerializer(serializers.Serializer):
 #----------------------- PUBLICACIONES SERIALIZERS
 
 class PublicacionSerializer(serializers.ModelSerializer):
+    reputacion_autor = serializers.SerializerMethodField()
+
     class Meta:
         model = Publicacion
         fields = '__all__'
-        read_only_fields = ('estudiante', 'fecha_creacion', 'habilidades_ofrecidas')
+        # estado solo cambia por SoftDeleteService (borrado del autor o moderación)
+        read_only_fields = (
+            'estudiante', 'fecha_creacion', 'habilidades_ofrecidas',
+            'estado', 'fecha_desactivacion', 'oculta_por_reportes',
+        )
+
+    def get_reputacion_autor(self, obj):
+        return reputacion_de(obj.estudiante)
+
+    def validate_habilidades_buscadas(self, valor):
+        return validar_habilidades(valor)
 
     def create(self, validated_data):
         user = self.context['request'].user
@@ -48,13 +113,23 @@ class PublicacionSerializer(serializers.ModelSerializer):
                 {"habilidades_ofrecidas": "Debes indicar al menos una habilidad ofrecida en tu perfil."}
             )
 
-        return Publicacion.objects.create(
-            estudiante=user,
-            titulo=validated_data['titulo'],
-            descripcion=validated_data.get('descripcion', ''),
-            habilidades_ofrecidas=perfil.habilidades_ofrecidas,
-            habilidades_buscadas=validated_data['habilidades_buscadas'],
-        )
+        with transaction.atomic():
+            publicacion = Publicacion.objects.create(
+                estudiante=user,
+                titulo=validated_data['titulo'],
+                descripcion=validated_data.get('descripcion', ''),
+                habilidades_ofrecidas=perfil.habilidades_ofrecidas,
+                habilidades_buscadas=validated_data['habilidades_buscadas'],
+            )
+            IndiceHabilidades.sincronizar_publicacion(publicacion)
+        return publicacion
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        publicacion = super().update(instance, validated_data)
+        if 'habilidades_buscadas' in validated_data:
+            IndiceHabilidades.sincronizar_publicacion(publicacion)
+        return publicacion
 
 class ChatParticipanteSerializer(serializers.ModelSerializer):
     class Meta:
@@ -73,7 +148,8 @@ class CalificacionChatSerializer(serializers.ModelSerializer):
     class Meta:
         model = CalificacionChat
         fields = '__all__'
-        read_only_fields = ['id_calificacion', 'fecha']
+        # El evaluador es el usuario autenticado (lo asigna la vista)
+        read_only_fields = ['id_calificacion', 'fecha', 'evaluador']
 
     def validate_puntaje(self, value):
         if value < 1 or value > 5:
@@ -90,14 +166,44 @@ class ChatSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class ChatBandejaSerializer(serializers.ModelSerializer):
+    """
+    Vista resumida de un chat para la bandeja de entrada: participantes,
+    último mensaje y cantidad de mensajes no leídos. Los valores vienen
+    anotados por la consulta (ver ChatListCreateView.get_queryset).
+    """
+    participantes = ChatParticipanteSerializer(many=True, read_only=True)
+    ultimo_mensaje = serializers.SerializerMethodField()
+    no_leidos = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Chat
+        fields = [
+            'id_chat', 'fecha_inicio', 'estado_intercambio', 'publicacion',
+            'participantes', 'ultimo_mensaje', 'no_leidos',
+        ]
+
+    def get_ultimo_mensaje(self, obj):
+        if obj.ultimo_mensaje_id is None:
+            return None
+        return {
+            'id_mensaje': obj.ultimo_mensaje_id,
+            'texto': obj.ultimo_mensaje_texto,
+            'fecha': serializers.DateTimeField().to_representation(obj.ultimo_mensaje_fecha),
+            'estudiante': obj.ultimo_mensaje_estudiante,
+        }
+
+
 class NotificacionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Notificacion
         fields = '__all__'
-        read_only_fields = ['id_notificacion', 'fecha']
+        read_only_fields = ['id_notificacion', 'fecha', 'cantidad']
 
 
 class ReporteSerializer(serializers.ModelSerializer):
+    publicacion = serializers.PrimaryKeyRelatedField(queryset=Publicacion.objects.filter(estado=True))
+
     class Meta:
         model = Reporte
         fields = '__all__'
@@ -105,21 +211,32 @@ class ReporteSerializer(serializers.ModelSerializer):
 
 
 class ModerarReporteSerializer(serializers.ModelSerializer):
-    accion = serializers.ChoiceField(choices=["aprobar", "rechazar", "eliminar"], write_only=True)
+    accion = serializers.ChoiceField(choices=moderacion.ACCIONES, write_only=True)
 
     class Meta:
         model = Reporte
         fields = ['id_reporte', 'accion']
 
     def update(self, instance, validated_data):
-        accion = validated_data.pop("accion")
-        if accion == "aprobar":
-            instance.estado = 1
-        elif accion == "rechazar":
-            instance.estado = 2
-        elif accion == "eliminar":
-            instance.publicacion.estado = False
-            instance.publicacion.save()
-            instance.estado = 1
-        instance.save()
+        moderacion.aplicar_accion(
+            Reporte.objects.filter(pk=instance.pk), validated_data["accion"], self.context['request'].user
+        )
+        instance.refresh_from_db()
         return instance
+
+
+class ModerarPublicacionSerializer(serializers.Serializer):
+    accion = serializers.ChoiceField(choices=moderacion.ACCIONES)
+
+
+class ColaModeracionSerializer(serializers.Serializer):
+    """Un grupo de la cola: los valores vienen agregados por moderacion.cola()."""
+    publicacion = serializers.IntegerField(source='publicacion_id')
+    titulo = serializers.CharField(source='publicacion__titulo')
+    autor = serializers.IntegerField(source='publicacion__estudiante_id')
+    publicacion_activa = serializers.BooleanField(source='publicacion__estado')
+    oculta_por_reportes = serializers.BooleanField(source='publicacion__oculta_por_reportes')
+    reportes = serializers.IntegerField()
+    denunciantes = serializers.IntegerField()
+    primer_reporte = serializers.DateTimeField()
+    ultimo_reporte = serializers.DateTimeField()
@@ -1,6 +1,18 @@
 import datetime
+import unicodedata
+from collections import defaultdict, deque
+from django.db import transaction
+from django.dispatch import Signal
 from django.utils import timezone
 
+from .models import (
+    CalificacionChat, ChatParticipante, Habilidad, PerfilHabilidad,
+    PublicacionHabilidad, Reputacion,
+)
+
+# Enviada una vez por cada cambio de estado masivo: sender=modelo, ids=[...], estado=bool
+estado_lote_cambiado = Signal()
+
 class TemporizadorAutoEliminacion:
     """
     Permite verificar si un objeto está listo para ser eliminado
@@ -12,17 +24,231 @@ class TemporizadorAutoEliminacion:
     def esta_listo_para_eliminar(self, fecha_creacion):
         return timezone.now() - fecha_creacion > datetime.timedelta(days=self.dias)
 
+    def fecha_limite(self):
+        """Lo creado antes de esta fecha está listo para eliminar (versión para querysets)."""
+        return timezone.now() - datetime.timedelta(days=self.dias)
+
 
 class SoftDeleteService:
     """
     Implementa borrado lógico (soft delete) para entidades como Publicación.
+    Las variantes *_lote trabajan sobre un queryset con un solo UPDATE de
+    las columnas de estado y emiten una única señal estado_lote_cambiado.
     """
     @staticmethod
     def desactivar(objeto):
         objeto.estado = False
+        if hasattr(objeto, 'fecha_desactivacion'):
+            objeto.fecha_desactivacion = timezone.now()
         objeto.save()
 
     @staticmethod
     def reactivar(objeto):
         objeto.estado = True
+        if hasattr(objeto, 'fecha_desactivacion'):
+            objeto.fecha_desactivacion = None
         objeto.save()
+
+    @staticmethod
+    def _cambiar_estado_lote(queryset, estado):
+        modelo = queryset.model
+        campos = {'estado': estado}
+        if any(f.name == 'fecha_desactivacion' for f in modelo._meta.concrete_fields):
+            campos['fecha_desactivacion'] = None if estado else timezone.now()
+
+        with transaction.atomic():
+            ids = list(queryset.filter(estado=not estado).values_list('pk', flat=True))
+            if ids:
+                modelo.objects.filter(pk__in=ids).update(**campos)
+                estado_lote_cambiado.send(sender=modelo, ids=ids, estado=estado)
+        return len(ids)
+
+    @staticmethod
+    def desactivar_lote(queryset):
+        """Desactiva todas las filas activas del queryset. Devuelve cuántas cambiaron."""
+        return SoftDeleteService._cambiar_estado_lote(queryset, False)
+
+    @staticmethod
+    def reactivar_lote(queryset):
+        """Reactiva todas las filas inactivas del queryset. Devuelve cuántas cambiaron."""
+        return SoftDeleteService._cambiar_estado_lote(queryset, True)
+
+
+def normalizar_habilidad(nombre):
+    """
+    Forma canónica de una habilidad: sin espacios sobrantes, en minúsculas
+    y sin tildes ("  Programación  Web" -> "programacion web").
+    """
+    texto = unicodedata.normalize('NFKD', str(nombre))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(texto.lower().split())
+
+
+class IndiceHabilidades:
+    """
+    Mantiene el índice invertido habilidad -> publicaciones/perfiles
+    a partir de las listas JSON de cada entidad.
+    """
+    LARGO_MAXIMO = Habilidad._meta.get_field('nombre').max_length
+
+    @staticmethod
+    def normalizar_lista(nombres):
+        vistas = []
+        for nombre in nombres or []:
+            # Los serializers ya rechazan nombres largos; esto cubre otros caminos (admin, shell)
+            normalizado = normalizar_habilidad(nombre)[:IndiceHabilidades.LARGO_MAXIMO].strip()
+            if normalizado and normalizado not in vistas:
+                vistas.append(normalizado)
+        return vistas
+
+    @staticmethod
+    def obtener_o_crear(nombres):
+        """Devuelve {nombre_normalizado: Habilidad}, creando las que falten."""
+        nombres = IndiceHabilidades.normalizar_lista(nombres)
+        if not nombres:
+            return {}
+        existentes = {h.nombre: h for h in Habilidad.objects.filter(nombre__in=nombres)}
+        faltantes = [Habilidad(nombre=n) for n in nombres if n not in existentes]
+        if faltantes:
+            Habilidad.objects.bulk_create(faltantes, ignore_conflicts=True)
+            existentes = {h.nombre: h for h in Habilidad.objects.filter(nombre__in=nombres)}
+        return existentes
+
+    @staticmethod
+    def sincronizar_publicacion(publicacion):
+        ofrecidas = IndiceHabilidades.normalizar_lista(publicacion.habilidades_ofrecidas)
+        buscadas = IndiceHabilidades.normalizar_lista(publicacion.habilidades_buscadas)
+        catalogo = IndiceHabilidades.obtener_o_crear(ofrecidas + buscadas)
+
+        PublicacionHabilidad.objects.filter(publicacion=publicacion).delete()
+        filas = [
+            PublicacionHabilidad(publicacion=publicacion, habilidad=catalogo[n], tipo='ofrecida')
+            for n in ofrecidas
+        ] + [
+            PublicacionHabilidad(publicacion=publicacion, habilidad=catalogo[n], tipo='buscada')
+            for n in buscadas
+        ]
+        PublicacionHabilidad.objects.bulk_create(filas)
+
+    @staticmethod
+    def sincronizar_perfil(perfil):
+        ofrecidas = IndiceHabilidades.normalizar_lista(perfil.habilidades_ofrecidas)
+        catalogo = IndiceHabilidades.obtener_o_crear(ofrecidas)
+
+        PerfilHabilidad.objects.filter(perfil=perfil).delete()
+        PerfilHabilidad.objects.bulk_create(
+            [PerfilHabilidad(perfil=perfil, habilidad=catalogo[n]) for n in ofrecidas]
+        )
+
+    @staticmethod
+    def publicaciones_con(nombres, tipo):
+        """Subconsulta de ids de publicación que tienen alguna de las habilidades."""
+        return PublicacionHabilidad.objects.filter(
+            tipo=tipo,
+            habilidad__nombre__in=IndiceHabilidades.normalizar_lista(nombres),
+        ).values('publicacion')
+
+
+class ReputacionService:
+    """
+    Mantiene la tabla Reputacion (cantidad, suma, promedio y últimos
+    comentarios de las calificaciones recibidas por cada estudiante).
+    """
+    ULTIMOS_COMENTARIOS = 5
+
+    @staticmethod
+    def _comentario(evaluador_id, puntaje, comentario, fecha):
+        return {
+            'evaluador': evaluador_id,
+            'puntaje': puntaje,
+            'comentario': comentario,
+            'fecha': fecha.isoformat() if fecha else None,
+        }
+
+    @staticmethod
+    @transaction.atomic
+    def registrar(calificacion, calificados):
+        """Suma una calificación a la reputación de cada estudiante calificado."""
+        calificados = list(calificados)
+        if not calificados:
+            return
+        puntaje = int(calificacion.puntaje)
+
+        Reputacion.objects.bulk_create(
+            [Reputacion(estudiante_id=u) for u in calificados], ignore_conflicts=True
+        )
+        for reputacion in Reputacion.objects.select_for_update().filter(estudiante_id__in=calificados):
+            reputacion.cantidad += 1
+            reputacion.suma += puntaje
+            reputacion.promedio = reputacion.suma / reputacion.cantidad
+            if calificacion.comentario:
+                reputacion.ultimos_comentarios = [
+                    ReputacionService._comentario(
+                        calificacion.evaluador_id, puntaje, calificacion.comentario, calificacion.fecha
+                    ),
+                    *reputacion.ultimos_comentarios,
+                ][:ReputacionService.ULTIMOS_COMENTARIOS]
+            reputacion.save(update_fields=['cantidad', 'suma', 'promedio', 'ultimos_comentarios'])
+
+    @staticmethod
+    def recalcular(tamano_lote=1000):
+        """
+        Reconstruye la tabla completa leyendo las calificaciones en lotes.
+        Devuelve (calificaciones procesadas, reputaciones escritas).
+        """
+        acumulado = defaultdict(
+            lambda: {'cantidad': 0, 'suma': 0,
+                     'comentarios': deque(maxlen=ReputacionService.ULTIMOS_COMENTARIOS)}
+        )
+        procesadas = 0
+
+        def procesar(lote):
+            participantes = defaultdict(list)
+            filas = ChatParticipante.objects.filter(
+                chat_id__in={c['chat_id'] for c in lote}
+            ).values_list('chat_id', 'estudiante_id')
+            for chat_id, estudiante_id in filas:
+                participantes[chat_id].append(estudiante_id)
+
+            for c in lote:
+                for estudiante_id in participantes[c['chat_id']]:
+                    if estudiante_id == c['evaluador_id']:
+                        continue
+                    datos = acumulado[estudiante_id]
+                    datos['cantidad'] += 1
+                    datos['suma'] += c['puntaje']
+                    if c['comentario']:
+                        datos['comentarios'].appendleft(ReputacionService._comentario(
+                            c['evaluador_id'], c['puntaje'], c['comentario'], c['fecha']
+                        ))
+
+        calificaciones = CalificacionChat.objects.order_by('id_calificacion').values(
+            'chat_id', 'evaluador_id', 'puntaje', 'comentario', 'fecha'
+        )
+        lote = []
+        for calificacion in calificaciones.iterator(chunk_size=tamano_lote):
+            lote.append(calificacion)
+            if len(lote) >= tamano_lote:
+                procesar(lote)
+                procesadas += len(lote)
+                lote = []
+        if lote:
+            procesar(lote)
+            procesadas += len(lote)
+
+        with transaction.atomic():
+            Reputacion.objects.all().delete()
+            Reputacion.objects.bulk_create(
+                (
+                    Reputacion(
+                        estudiante_id=estudiante_id,
+                        cantidad=datos['cantidad'],
+                        suma=datos['suma'],
+                        promedio=datos['suma'] / datos['cantidad'],
+                        ultimos_comentarios=list(datos['comentarios']),
+                    )
+                    for estudiante_id, datos in acumulado.items()
+                ),
+                batch_size=tamano_lote,
+            )
+        return procesadas, len(acumulado)
@@ -0,0 +1,102 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import busqueda, cache_respuestas, metricas
+from .consumers import publicar_evento
+from .notificaciones import restar_no_leidas
+from .models import CalificacionChat, ChatParticipante, Mensaje, Notificacion, Perfil, Publicacion
+from .recomendaciones import MotorRecomendaciones
+from .serializers import MensajeSerializer
+from .service import estado_lote_cambiado
+
+
+# ----------------------- RECOMENDACIONES -----------------------
+
+@receiver([post_save, post_delete], sender=Publicacion)
+def invalidar_recomendaciones_publicacion(sender, instance, **kwargs):
+    transaction.on_commit(MotorRecomendaciones.invalidar_todo)
+
+
+@receiver([post_save, post_delete], sender=Perfil)
+def invalidar_recomendaciones_perfil(sender, instance, **kwargs):
+    usuario_id = instance.estudiante_id
+    transaction.on_commit(lambda: MotorRecomendaciones.invalidar_usuario(usuario_id))
+
+
+# ----------------------- TIEMPO REAL (WEBSOCKETS) -----------------------
+
+@receiver(post_save, sender=Mensaje)
+def publicar_mensaje(sender, instance, created, **kwargs):
+    if not created:
+        return
+    metricas.mensajes_enviados.inc()
+    data = dict(MensajeSerializer(instance).data)
+    participantes = list(
+        ChatParticipante.objects.filter(chat_id=instance.chat_id).values_list('estudiante_id', flat=True)
+    )
+    transaction.on_commit(lambda: publicar_evento(participantes, 'nuevo_mensaje', data))
+
+
+# ----------------------- CONTADORES DE NOTIFICACIONES -----------------------
+
+@receiver(post_delete, sender=Notificacion)
+def descontar_notificacion_borrada(sender, instance, **kwargs):
+    if not instance.leida:
+        restar_no_leidas(instance.estudiante_id, instance.tipo)
+
+
+# ----------------------- CACHÉ DE RESPUESTAS -----------------------
+
+@receiver(estado_lote_cambiado, sender=Publicacion)
+def invalidar_publicaciones_en_lote(sender, ids, **kwargs):
+    def invalidar():
+        cache_respuestas.invalidar_publicaciones(*ids)
+        MotorRecomendaciones.invalidar_todo()
+
+    transaction.on_commit(invalidar)
+
+
+@receiver([post_save, post_delete], sender=Publicacion)
+def invalidar_cache_publicacion(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: cache_respuestas.invalidar_publicaciones(pk))
+
+
+@receiver([post_save, post_delete], sender=Perfil)
+def invalidar_cache_perfil(sender, instance, **kwargs):
+    usuario_id = instance.estudiante_id
+    transaction.on_commit(lambda: cache_respuestas.invalidar_perfiles(usuario_id))
+    # El usuario autenticado se cachea con un snapshot de su perfil
+    transaction.on_commit(lambda: cache_respuestas.invalidar_autenticacion(usuario_id))
+
+
+@receiver([post_save, post_delete], sender=CalificacionChat)
+def invalidar_cache_calificacion(sender, instance, **kwargs):
+    # Cambia la reputación de los calificados, visible en su perfil y publicaciones
+    calificados = list(
+        ChatParticipante.objects.filter(chat_id=instance.chat_id)
+        .exclude(estudiante_id=instance.evaluador_id)
+        .values_list('estudiante_id', flat=True)
+    )
+    publicacion_ids = list(
+        Publicacion.objects.filter(estudiante_id__in=calificados).values_list('pk', flat=True)
+    )
+
+    def invalidar():
+        cache_respuestas.invalidar_perfiles(*calificados)
+        cache_respuestas.invalidar_publicaciones(*publicacion_ids)
+
+    transaction.on_commit(invalidar)
+
+
+# ----------------------- BÚSQUEDA DE TEXTO COMPLETO -----------------------
+
+@receiver(post_save, sender=Publicacion)
+def indexar_publicacion(sender, instance, **kwargs):
+    busqueda.actualizar(instance)
+
+
+@receiver(post_delete, sender=Publicacion)
+def desindexar_publicacion(sender, instance, **kwargs):
+    busqueda.eliminar(instance.pk)
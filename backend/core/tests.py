@@ -1,3 +1,845 @@
-from django.test import TestCase
+import csv
+import io
+import json
+from datetime import timedelta
+from unittest import mock, skipIf
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import barredor, busqueda, cache_respuestas, instrumentacion
+from .middleware import JWTAuthMiddleware
+from .models import (
+    CalificacionChat, Chat, ChatParticipante, Habilidad, Mensaje, Notificacion, Perfil, Publicacion,
+    PerfilHabilidad, PublicacionHabilidad, Reporte, Reputacion,
+)
+from .notificaciones import escribir_notificaciones, marcar_leida, restar_no_leidas, resumen_no_leidas
+from .recomendaciones import MotorRecomendaciones
+from .routing import websocket_urlpatterns
+from .service import IndiceHabilidades
+
+User = get_user_model()
+
+
+class ChatBandejaTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='autor@inacapmail.cl', password='Clave12345')
+        self.client.force_authenticate(self.user)
+        self.url = reverse('chat-list-create')
+
+    def crear_chats(self, cantidad):
+        for i in range(cantidad):
+            otro = User.objects.create_user(email=f'otro{Chat.objects.count()}@inacapmail.cl', password='Clave12345')
+            publicacion = Publicacion.objects.create(titulo=f'pub {i}', estudiante=self.user)
+            chat = Chat.objects.create(publicacion=publicacion)
+            ChatParticipante.objects.create(chat=chat, estudiante=self.user, rol='autor')
+            ChatParticipante.objects.create(chat=chat, estudiante=otro, rol='receptor')
+            Mensaje.objects.create(chat=chat, estudiante=otro, texto='hola')
+            Mensaje.objects.create(chat=chat, estudiante=otro, texto='sigues ahí?')
+            Mensaje.objects.create(chat=chat, estudiante=self.user, texto='sí')
+
+    def test_cantidad_de_consultas_constante(self):
+        self.crear_chats(2)
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+
+        self.crear_chats(8)
+        with self.assertNumQueries(2):
+            respuesta = self.client.get(self.url)
+        self.assertEqual(len(respuesta.data['results']), 10)
+
+    def test_solo_chats_propios_con_resumen(self):
+        self.crear_chats(1)
+        ajeno = User.objects.create_user(email='ajeno@inacapmail.cl', password='Clave12345')
+        chat_ajeno = Chat.objects.create(publicacion=Publicacion.objects.create(titulo='x', estudiante=ajeno))
+        ChatParticipante.objects.create(chat=chat_ajeno, estudiante=ajeno, rol='autor')
+
+        respuesta = self.client.get(self.url)
+        self.assertEqual(respuesta.status_code, 200)
+        [chat] = respuesta.data['results']
+        self.assertEqual(chat['no_leidos'], 2)
+        self.assertEqual(chat['ultimo_mensaje']['texto'], 'sí')
+        self.assertNotIn('mensajes', chat)
+
+
+class CalificacionChatTests(APITestCase):
+    def setUp(self):
+        self.evaluador = User.objects.create_user(email='evaluador@inacapmail.cl', password='Clave12345')
+        self.calificado = User.objects.create_user(email='calificado@inacapmail.cl', password='Clave12345')
+        self.chat = Chat.objects.create(
+            publicacion=Publicacion.objects.create(titulo='pub', estudiante=self.calificado)
+        )
+        ChatParticipante.objects.create(chat=self.chat, estudiante=self.calificado, rol='autor')
+        ChatParticipante.objects.create(chat=self.chat, estudiante=self.evaluador, rol='receptor')
+        self.client.force_authenticate(self.evaluador)
+        self.url = reverse('calificacion-chat')
+
+    def test_puntaje_invalido_no_toca_la_reputacion(self):
+        for datos in ({'puntaje': 100}, {'puntaje': -3}, {'puntaje': 'cinco'}, {}):
+            respuesta = self.client.post(self.url, {'chat': self.chat.pk, **datos})
+            self.assertEqual(respuesta.status_code, 400, datos)
+            self.assertIn('puntaje', respuesta.data)
+        self.assertFalse(CalificacionChat.objects.exists())
+        self.assertFalse(Reputacion.objects.exists())
+
+    def test_puntaje_valido_suma_a_la_reputacion(self):
+        respuesta = self.client.post(self.url, {'chat': self.chat.pk, 'puntaje': 4})
+        self.assertEqual(respuesta.status_code, 201)
+        reputacion = Reputacion.objects.get(estudiante=self.calificado)
+        self.assertEqual((reputacion.cantidad, reputacion.suma, reputacion.promedio), (1, 4, 4.0))
+
+
+class PublicacionOcultaTests(APITestCase):
+    def setUp(self):
+        self.autor = User.objects.create_user(email='autor@inacapmail.cl', password='Clave12345')
+        self.publicacion = Publicacion.objects.create(
+            titulo='pub', estudiante=self.autor, estado=False, oculta_por_reportes=True
+        )
+        self.client.force_authenticate(self.autor)
+
+    def test_autor_no_puede_reactivar_una_publicacion_oculta(self):
+        url = reverse('publicaciones-update', args=[self.publicacion.pk])
+        self.client.patch(url, {'estado': True, 'oculta_por_reportes': False}, format='json')
+        self.publicacion.refresh_from_db()
+        self.assertFalse(self.publicacion.estado)
+        self.assertTrue(self.publicacion.oculta_por_reportes)
+
+    def test_barredor_no_borra_publicaciones_ocultas_por_reportes(self):
+        hace_un_anio = timezone.now() - timedelta(days=365)
+        Publicacion.objects.filter(pk=self.publicacion.pk).update(fecha_desactivacion=hace_un_anio)
+        borrada = Publicacion.objects.create(titulo='borrada', estudiante=self.autor, estado=False)
+        Publicacion.objects.filter(pk=borrada.pk).update(fecha_desactivacion=hace_un_anio)
+
+        barredor.eliminar_inactivas(dias=30, pausa=0)
+
+        self.assertTrue(Publicacion.objects.filter(pk=self.publicacion.pk).exists())
+        self.assertFalse(Publicacion.objects.filter(pk=borrada.pk).exists())
+
+    def test_un_solo_barrido_a_la_vez(self):
+        cache.clear()
+        with barredor.liderazgo() as lider:
+            self.assertTrue(lider)
+            self.assertIsNone(barredor.barrer_exclusivo(pausa=0))
+        self.assertIsNotNone(barredor.barrer_exclusivo(pausa=0))
+
+
+class PublicacionEliminadaTests(APITestCase):
+    def setUp(self):
+        self.autor = User.objects.create_user(email='autor@inacapmail.cl', password='Clave12345')
+        self.otro = User.objects.create_user(email='otro@inacapmail.cl', password='Clave12345')
+        self.publicacion = Publicacion.objects.create(titulo='pub', estudiante=self.autor)
+        self.client.force_authenticate(self.autor)
+        self.client.delete(reverse('publicaciones-delete', args=[self.publicacion.pk]))
+
+    def test_borrado_logico(self):
+        self.publicacion.refresh_from_db()
+        self.assertFalse(self.publicacion.estado)
+        self.assertIsNotNone(self.publicacion.fecha_desactivacion)
+
+    def test_no_aparece_en_mis_publicaciones_ni_se_edita(self):
+        self.assertEqual(self.client.get(reverse('mis-publicaciones')).data, [])
+        respuesta = self.client.patch(
+            reverse('publicaciones-update', args=[self.publicacion.pk]), {'titulo': 'otro'}, format='json'
+        )
+        self.assertEqual(respuesta.status_code, 404)
+
+    def test_no_se_puede_chatear_ni_reportar(self):
+        self.client.force_authenticate(self.otro)
+        respuesta = self.client.post(reverse('chat-list-create'), {'publicacion': self.publicacion.pk})
+        self.assertEqual(respuesta.status_code, 404)
+        self.assertFalse(Chat.objects.exists())
+
+        respuesta = self.client.post(reverse('crear-reporte'), {'publicacion': self.publicacion.pk, 'motivo': 'spam'})
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('publicacion', respuesta.data)
+
+    def test_fuera_del_feed_y_del_detalle(self):
+        cache.clear()
+        url = reverse('publicaciones-list-create')
+        propias = self.client.get(url, {'estado': 'false'})
+        self.assertEqual([p['id_publicacion'] for p in propias.data['results']], [self.publicacion.pk])
+
+        self.client.force_authenticate(self.otro)
+        for estado in ('true', 'false', 'todos'):
+            self.assertEqual(self.client.get(url, {'estado': estado}).data['results'], [], estado)
+        detalle = self.client.get(reverse('publicaciones-detail', args=[self.publicacion.pk]))
+        self.assertEqual(detalle.status_code, 404)
+
+    def test_admin_ve_las_inactivas_y_las_reactiva_en_lote(self):
+        cache.clear()
+        admin = User.objects.create_user(email='admin@inacapmail.cl', password='Clave12345', is_staff=True)
+        self.client.force_authenticate(admin)
+        inactivas = self.client.get(reverse('publicaciones-list-create'), {'estado': 'false'})
+        self.assertEqual([p['id_publicacion'] for p in inactivas.data['results']], [self.publicacion.pk])
+
+        url = reverse('admin-reactivar-publicaciones', args=[self.autor.pk])
+        self.assertEqual(self.client.post(url).data['cantidad'], 1)
+        self.publicacion.refresh_from_db()
+        self.assertTrue(self.publicacion.estado)
+        self.assertIsNone(self.publicacion.fecha_desactivacion)
+
+
+class ContadorNotificacionesTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='destino@inacapmail.cl', password='Clave12345')
+        self.otro = User.objects.create_user(email='emisor@inacapmail.cl', password='Clave12345')
+        self.chat = Chat.objects.create(
+            publicacion=Publicacion.objects.create(titulo='pub', estudiante=self.user)
+        )
+        self.client.force_authenticate(self.user)
+
+    def resumen(self):
+        respuesta = self.client.get(reverse('notificaciones-resumen'))
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.data
+
+    def test_mensajes_seguidos_se_agrupan_y_cuentan_una_vez(self):
+        for i in range(3):
+            escribir_notificaciones([self.user.pk], 'nuevo_mensaje', f'mensaje {i}', chat_id=self.chat.pk)
+
+        [notificacion] = Notificacion.objects.filter(estudiante=self.user)
+        self.assertEqual((notificacion.cantidad, notificacion.mensaje), (3, 'mensaje 2'))
+        resumen = self.resumen()
+        self.assertEqual(resumen['total'], 1)
+        self.assertEqual(resumen['por_tipo']['nuevo_mensaje'], 1)
+        self.assertEqual(resumen['por_tipo']['nuevo_chat'], 0)
+
+    def test_marcar_leida_descuenta_una_sola_vez(self):
+        escribir_notificaciones([self.user.pk], 'nuevo_chat', 'a')
+        escribir_notificaciones([self.user.pk], 'nuevo_chat', 'b')
+        notificacion = Notificacion.objects.filter(estudiante=self.user).first()
+        url = reverse('notificacion-marcar-leida', args=[notificacion.pk])
+
+        self.assertEqual(self.client.patch(url).status_code, 200)
+        self.assertEqual(self.client.patch(url).status_code, 200)
+        self.assertEqual(self.resumen()['por_tipo']['nuevo_chat'], 1)
+
+    def test_mensaje_despues_de_leer_abre_otra_notificacion(self):
+        escribir_notificaciones([self.user.pk], 'nuevo_mensaje', 'a', chat_id=self.chat.pk)
+        marcar_leida(Notificacion.objects.get(estudiante=self.user))
+        escribir_notificaciones([self.user.pk], 'nuevo_mensaje', 'b', chat_id=self.chat.pk)
+
+        self.assertEqual(Notificacion.objects.filter(estudiante=self.user, leida=False).count(), 1)
+        self.assertEqual(self.resumen()['total'], 1)
+
+    def test_marcar_todas_y_borrar_no_dejan_el_contador_negativo(self):
+        escribir_notificaciones([self.user.pk, self.otro.pk], 'nuevo_chat', 'a')
+        escribir_notificaciones([self.user.pk], 'calificacion_chat', 'b')
+
+        respuesta = self.client.post(reverse('notificaciones-marcar-todas-leidas'))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(self.resumen()['total'], 0)
+        self.assertEqual(self.client.post(reverse('notificaciones-marcar-todas-leidas')).status_code, 400)
+
+        Notificacion.objects.filter(estudiante=self.user).delete()  # ya leídas: no descuentan
+        restar_no_leidas(self.user.pk, 'nuevo_chat')
+        self.assertEqual(self.resumen()['total'], 0)
+        self.assertEqual(resumen_no_leidas(self.otro)['por_tipo']['nuevo_chat'], 1)
+
+        Notificacion.objects.filter(estudiante=self.otro).delete()
+        self.assertEqual(resumen_no_leidas(self.otro)['total'], 0)
+
+
+@override_settings(THROTTLE_BUCKETS={'reportes': {'usuario': {'capacidad': 2, 'por_minuto': 1}}})
+class ThrottleTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='reporta@inacapmail.cl', password='Clave12345')
+        autor = User.objects.create_user(email='autor@inacapmail.cl', password='Clave12345')
+        self.publicacion = Publicacion.objects.create(titulo='pub', estudiante=autor)
+        self.client.force_authenticate(self.user)
+
+    @mock.patch('core.throttling.time.time', return_value=1_000_000.0)
+    def test_cupo_agotado_responde_429_con_retry_after(self, _):
+        datos = {'publicacion': self.publicacion.pk, 'motivo': 'spam'}
+        for _ in range(2):
+            self.assertEqual(self.client.post(reverse('crear-reporte'), datos).status_code, 201)
+
+        respuesta = self.client.post(reverse('crear-reporte'), datos)
+        self.assertEqual(respuesta.status_code, 429)
+        # Ventana de 2 / 1 minutos = 120 s; 1_000_000 cae 40 s dentro de ella
+        self.assertEqual(respuesta['Retry-After'], '80')
+
+        self.client.force_authenticate(
+            User.objects.create_user(email='otro@inacapmail.cl', password='Clave12345')
+        )
+        self.assertEqual(self.client.post(reverse('crear-reporte'), datos).status_code, 201)
+
+
+class CacheRespuestasTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_version_expulsada_no_revive_entradas_viejas(self):
+        valor = cache_respuestas.obtener_o_calcular('feed', ['x'], 'feed', lambda: 'viejo')
+        self.assertEqual(valor, 'viejo')
+        cache.delete(cache_respuestas._clave_version('feed'))  # como una expulsión LRU
+
+        valor = cache_respuestas.obtener_o_calcular('feed', ['x'], 'feed', lambda: 'nuevo')
+        self.assertEqual(valor, 'nuevo')
+
+    def test_feed_separado_por_host(self):
+        user = User.objects.create_user(email='lector@inacapmail.cl', password='Clave12345')
+        self.client.force_authenticate(user)
+        url = reverse('publicaciones-list-create')
+        for i in range(25):
+            Publicacion.objects.create(titulo=f'pub {i}', estudiante=user)
+
+        uno = self.client.get(url, HTTP_HOST='uno.example.com')
+        dos = self.client.get(url, HTTP_HOST='dos.example.com')
+        self.assertIn('//uno.example.com/', uno.data['next'])
+        self.assertIn('//dos.example.com/', dos.data['next'])
+
+
+class MetricasTests(APITestCase):
+    url = '/api/metrics/'
+
+    def test_requiere_token_o_admin(self):
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        usuario = User.objects.create_user(email='comun@inacapmail.cl', password='Clave12345')
+        self.client.force_authenticate(usuario)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+        usuario.is_staff = True
+        usuario.save()
+        respuesta = self.client.get(self.url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn(b'# TYPE interu_http_request_duration_seconds histogram', respuesta.content)
+
+    @override_settings(METRICAS={'DIRECTORIO': None, 'INTERVALO_VOLCADO': 5, 'TOKEN': 'secreto'})
+    def test_scraper_con_token(self):
+        self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION='Bearer otro').status_code, 401)
+        respuesta = self.client.get(self.url, HTTP_AUTHORIZATION='Bearer secreto')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn(b'interu_reportes_pendientes 0', respuesta.content)
+
+
+INSTRUMENTACION_TEST = {'MUESTREO': 1.0, 'UMBRAL_DUPLICADAS': 5, 'LOG_LENTAS_MS': 500, 'LOG_TODAS': False}
+
+
+class InstrumentacionTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='medido@inacapmail.cl', password='Clave12345')
+        self.client.force_authenticate(self.user)
+        for i in range(3):
+            Publicacion.objects.create(titulo=f'pub {i}', estudiante=self.user)
+        self.url = reverse('mis-publicaciones')
+
+    def fila(self):
+        for fila in instrumentacion.resumen_por_ruta():
+            if (fila['url_name'], fila['metodo']) == ('mis-publicaciones', 'GET'):
+                return fila
+        return None
+
+    def total(self, fila, campo):
+        return fila[campo]['total'] if fila and fila[campo] else 0
+
+    @override_settings(INSTRUMENTACION=INSTRUMENTACION_TEST)
+    def test_server_timing_con_muestreo(self):
+        antes = self.fila()
+        respuesta = self.client.get(self.url)
+        self.assertEqual(respuesta.status_code, 200)
+
+        partes = [parte.strip() for parte in respuesta['Server-Timing'].split(',')]
+        nombres = [parte.split(';')[0] for parte in partes]
+        self.assertEqual(nombres[:4], ['db', 'ser', 'app', 'total'])
+        consultas = int(partes[0].split('desc="')[1].split(' ')[0])
+        self.assertGreater(consultas, 0)
+
+        despues = self.fila()
+        for campo in ('latencia', 'sql', 'consultas'):
+            self.assertEqual(self.total(despues, campo), self.total(antes, campo) + 1)
+
+    @override_settings(INSTRUMENTACION={**INSTRUMENTACION_TEST, 'MUESTREO': 0.0})
+    def test_sin_muestreo_solo_latencia(self):
+        antes = self.fila()
+        respuesta = self.client.get(self.url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotIn('Server-Timing', respuesta)
+
+        despues = self.fila()
+        self.assertEqual(self.total(despues, 'latencia'), self.total(antes, 'latencia') + 1)
+        self.assertEqual(self.total(despues, 'sql'), self.total(antes, 'sql'))
+        self.assertEqual(self.total(despues, 'consultas'), self.total(antes, 'consultas'))
+
+    @override_settings(INSTRUMENTACION={**INSTRUMENTACION_TEST, 'UMBRAL_DUPLICADAS': 1})
+    def test_marca_consultas_duplicadas(self):
+        antes = self.fila()
+        with self.assertLogs('core.instrumentacion', 'WARNING') as logs:
+            respuesta = self.client.get(self.url)
+        self.assertIn('dup;desc=', respuesta['Server-Timing'])
+        self.assertEqual(json.loads(logs.records[0].getMessage())['evento'], 'request')
+        self.assertEqual(self.fila()['con_duplicadas'], (antes['con_duplicadas'] if antes else 0) + 1)
+
+
+class HabilidadesLargoTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='perfil@inacapmail.cl', password='Clave12345')
+        self.client.force_authenticate(self.user)
+        self.larga = 'x' * 101
+
+    def test_perfil_rechaza_habilidad_larga(self):
+        datos = {
+            'nombre': 'Ana', 'apellido': 'Soto', 'carrera': 'Informática', 'area': 'TI',
+            'habilidades_ofrecidas': ['python', self.larga],
+        }
+        respuesta = self.client.post(reverse('crear-perfil'), datos, format='json')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('habilidades_ofrecidas', respuesta.data)
+        self.assertFalse(Habilidad.objects.exists())
+
+    def test_publicacion_rechaza_habilidad_larga(self):
+        Perfil.objects.create(
+            estudiante=self.user, nombre='Ana', apellido='Soto', carrera='Informática', area='TI',
+            habilidades_ofrecidas=['python'],
+        )
+        respuesta = self.client.post(
+            reverse('publicaciones-list-create'),
+            {'titulo': 'Busco ayuda', 'habilidades_buscadas': [self.larga]}, format='json',
+        )
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('habilidades_buscadas', respuesta.data)
+
+
+class IndiceHabilidadesTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='indice@inacapmail.cl', password='Clave12345')
+        self.perfil = Perfil.objects.create(
+            estudiante=self.user, nombre='Ana', apellido='Soto', carrera='Informática', area='TI',
+            habilidades_ofrecidas=['python'],
+        )
+        self.client.force_authenticate(self.user)
+        self.url = reverse('publicaciones-list-create')
+        self.python = self.publicar(ofrece=['Python', 'SQL'], busca=['Diseño'])
+        self.diseno = self.publicar(ofrece=['diseno'], busca=['python'])
+        self.guitarra = self.publicar(ofrece=['guitarra'], busca=['sql'])
+
+    def publicar(self, ofrece, busca):
+        # Las habilidades ofrecidas de la publicación se copian del perfil
+        Perfil.objects.filter(pk=self.perfil.pk).update(habilidades_ofrecidas=ofrece)
+        self.client.force_authenticate(User.objects.get(pk=self.user.pk))
+        respuesta = self.client.post(
+            self.url, {'titulo': 'pub', 'habilidades_buscadas': busca}, format='json'
+        )
+        self.assertEqual(respuesta.status_code, 201)
+        return respuesta.data['id_publicacion']
+
+    def filtrar(self, **params):
+        cache.clear()
+        return sorted(p['id_publicacion'] for p in self.client.get(self.url, params).data['results'])
+
+    def test_filtros_ofrece_y_busca(self):
+        self.assertEqual(self.filtrar(ofrece='python'), [self.python])
+        self.assertEqual(self.filtrar(ofrece='DISEÑO'), [self.diseno])
+        self.assertEqual(self.filtrar(ofrece='sql,guitarra'), [self.python, self.guitarra])
+        self.assertEqual(self.filtrar(busca='sql'), [self.guitarra])
+        self.assertEqual(self.filtrar(ofrece='sql', busca='diseno'), [self.python])
+        self.assertEqual(self.filtrar(ofrece='cocina'), [])
+
+    def test_indice_sigue_las_ediciones(self):
+        respuesta = self.client.patch(
+            reverse('publicaciones-update', args=[self.guitarra]), {'habilidades_buscadas': ['Cocina']},
+            format='json',
+        )
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(self.filtrar(busca='sql'), [])
+        self.assertEqual(self.filtrar(busca='cocina'), [self.guitarra])
+        self.assertEqual(self.filtrar(ofrece='guitarra'), [self.guitarra])
+
+        respuesta = self.client.patch(
+            reverse('perfil-estudiante'), {'habilidades_ofrecidas': ['SQL', 'Diseño']}, format='json'
+        )
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(
+            sorted(PerfilHabilidad.objects.filter(perfil=self.perfil).values_list('habilidad__nombre', flat=True)),
+            ['diseno', 'sql'],
+        )
+
+
+class MensajesPollingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.autor = User.objects.create_user(email='autor@inacapmail.cl', password='Clave12345')
+        self.receptor = User.objects.create_user(email='receptor@inacapmail.cl', password='Clave12345')
+        self.chat = Chat.objects.create(
+            publicacion=Publicacion.objects.create(titulo='pub', estudiante=self.autor)
+        )
+        ChatParticipante.objects.create(chat=self.chat, estudiante=self.autor, rol='autor')
+        ChatParticipante.objects.create(chat=self.chat, estudiante=self.receptor, rol='receptor')
+        self.mensajes = [
+            Mensaje.objects.create(chat=self.chat, estudiante=self.receptor, texto=f'm{i}') for i in range(3)
+        ]
+        self.client.force_authenticate(self.autor)
+        self.url = reverse('mensaje-list-create')
+
+    def test_after_y_limit_devuelven_solo_los_nuevos(self):
+        respuesta = self.client.get(self.url, {'chat': self.chat.pk, 'after': self.mensajes[0].pk, 'limit': 1})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([m['texto'] for m in respuesta.data], ['m1'])
+
+    def test_etag_vigente_responde_304_hasta_que_llega_otro_mensaje(self):
+        params = {'chat': self.chat.pk, 'after': self.mensajes[-1].pk}
+        etag = self.client.get(self.url, params)['ETag']
+
+        respuesta = self.client.get(self.url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 304)
+        self.assertEqual(respuesta['ETag'], etag)
+
+        Mensaje.objects.create(chat=self.chat, estudiante=self.receptor, texto='nuevo')
+        respuesta = self.client.get(self.url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotEqual(respuesta['ETag'], etag)
+        self.assertEqual([m['texto'] for m in respuesta.data], ['nuevo'])
+
+    def test_solo_participantes(self):
+        self.client.force_authenticate(
+            User.objects.create_user(email='ajeno@inacapmail.cl', password='Clave12345')
+        )
+        self.assertEqual(self.client.get(self.url, {'chat': self.chat.pk}).status_code, 403)
+
+
+class ChatIdempotenteTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.autor = User.objects.create_user(email='autor@inacapmail.cl', password='Clave12345')
+        self.receptor = User.objects.create_user(email='receptor@inacapmail.cl', password='Clave12345')
+        self.publicacion = Publicacion.objects.create(titulo='pub', estudiante=self.autor)
+        self.client.force_authenticate(self.receptor)
+        self.url = reverse('chat-list-create')
+
+    def test_mismo_chat_responde_200_sin_duplicar(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            primera = self.client.post(self.url, {'publicacion': self.publicacion.pk})
+            segunda = self.client.post(self.url, {'publicacion': self.publicacion.pk})
+        self.assertEqual((primera.status_code, segunda.status_code), (201, 200))
+        self.assertEqual(primera.data['id_chat'], segunda.data['id_chat'])
+        self.assertEqual(Chat.objects.count(), 1)
+        self.assertEqual(ChatParticipante.objects.count(), 2)
+        self.assertEqual(Notificacion.objects.filter(estudiante=self.autor).count(), 1)
+
+    def test_idempotency_key_repite_la_primera_respuesta(self):
+        cabecera = {'HTTP_IDEMPOTENCY_KEY': 'intento-1'}
+        primera = self.client.post(self.url, {'publicacion': self.publicacion.pk}, **cabecera)
+        repetida = self.client.post(self.url, {'publicacion': self.publicacion.pk}, **cabecera)
+        self.assertEqual(repetida.status_code, 201)
+        self.assertEqual(repetida['Idempotent-Replayed'], 'true')
+        self.assertEqual(repetida.data, primera.data)
+        self.assertNotIn('Idempotent-Replayed', primera)
+
+    def test_idempotency_key_vacia_es_invalida(self):
+        respuesta = self.client.post(self.url, {'publicacion': self.publicacion.pk}, HTTP_IDEMPOTENCY_KEY=' ')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('Idempotency-Key', respuesta.data)
+        self.assertFalse(Chat.objects.exists())
+
+
+class ExportacionTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@inacapmail.cl', password='Clave12345', is_staff=True)
+        self.autor = User.objects.create_user(email='autor@inacapmail.cl', password='Clave12345')
+        self.publicacion = Publicacion.objects.create(titulo='=HYPERLINK("x")', estudiante=self.autor)
+        self.pendiente = Reporte.objects.create(motivo='spam', estudiante=self.autor, publicacion=self.publicacion)
+        self.viejo = Reporte.objects.create(
+            motivo='viejo', estudiante=self.autor, publicacion=self.publicacion, estado=1
+        )
+        Reporte.objects.filter(pk=self.viejo.pk).update(fecha=timezone.now() - timedelta(days=30))
+        self.client.force_authenticate(self.admin)
+
+    def contenido(self, respuesta):
+        self.assertEqual(respuesta.status_code, 200)
+        return b''.join(respuesta.streaming_content).decode('utf-8')
+
+    def test_solo_administradores(self):
+        self.client.force_authenticate(self.autor)
+        self.assertEqual(self.client.get(reverse('exportar-reportes')).status_code, 403)
+
+    def test_filtros_y_ndjson(self):
+        hoy = timezone.localdate().isoformat()
+        respuesta = self.client.get(
+            reverse('exportar-reportes'), {'formato': 'ndjson', 'estado': 'pendiente,aceptado', 'desde': hoy}
+        )
+        self.assertTrue(respuesta['Content-Type'].startswith('application/x-ndjson'))
+        filas = [json.loads(linea) for linea in self.contenido(respuesta).splitlines()]
+        self.assertEqual([f['id_reporte'] for f in filas], [self.pendiente.pk])
+        self.assertEqual(filas[0]['estudiante_email'], 'autor@inacapmail.cl')
+
+        respuesta = self.client.get(reverse('exportar-reportes'), {'formato': 'ndjson', 'estado': 'aceptado'})
+        filas = [json.loads(linea) for linea in self.contenido(respuesta).splitlines()]
+        self.assertEqual([f['id_reporte'] for f in filas], [self.viejo.pk])
+
+    def test_csv_escapa_formulas(self):
+        respuesta = self.client.get(reverse('exportar-publicaciones'))
+        self.assertIn('attachment; filename="publicaciones-', respuesta['Content-Disposition'])
+        encabezado, fila = list(csv.reader(io.StringIO(self.contenido(respuesta).lstrip('\ufeff'))))
+        self.assertEqual(encabezado[3], 'titulo')
+        self.assertEqual(fila[3], '\'=HYPERLINK("x")')
+
+    def test_parametros_invalidos(self):
+        for url, params, campo in (
+            ('exportar-reportes', {'formato': 'xml'}, 'formato'),
+            ('exportar-reportes', {'estado': 'otro'}, 'estado'),
+            ('exportar-calificaciones', {'estado': '1'}, 'estado'),
+            ('exportar-reportes', {'desde': 'ayer'}, 'desde'),
+        ):
+            respuesta = self.client.get(reverse(url), params)
+            self.assertEqual(respuesta.status_code, 400, params)
+            self.assertIn(campo, respuesta.data)
+
+
+@override_settings(MODERACION={'UMBRAL_OCULTAR': 3})
+class ModeracionTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(email='admin@inacapmail.cl', password='Clave12345', is_staff=True)
+        self.autor = User.objects.create_user(email='autor@inacapmail.cl', password='Clave12345')
+        self.publicacion = Publicacion.objects.create(titulo='pub', estudiante=self.autor)
+        self.denunciantes = [
+            User.objects.create_user(email=f'denuncia{i}@inacapmail.cl', password='Clave12345') for i in range(3)
+        ]
+
+    def reportar(self, publicacion, denunciantes):
+        for estudiante in denunciantes:
+            self.client.force_authenticate(estudiante)
+            respuesta = self.client.post(reverse('crear-reporte'), {'publicacion': publicacion.pk, 'motivo': 'spam'})
+            self.assertEqual(respuesta.status_code, 201)
+        self.client.force_authenticate(self.admin)
+
+    def moderar(self, accion):
+        url = reverse('moderacion-publicacion', args=[self.publicacion.pk])
+        return self.client.post(url, {'accion': accion})
+
+    def test_se_oculta_al_llegar_al_umbral(self):
+        self.reportar(self.publicacion, self.denunciantes[:2])
+        self.publicacion.refresh_from_db()
+        self.assertTrue(self.publicacion.estado)
+
+        self.reportar(self.publicacion, self.denunciantes[2:])
+        self.publicacion.refresh_from_db()
+        self.assertFalse(self.publicacion.estado)
+        self.assertTrue(self.publicacion.oculta_por_reportes)
+
+    def test_cola_agrupa_y_ordena_por_cantidad(self):
+        otra = Publicacion.objects.create(titulo='otra', estudiante=self.autor)
+        self.reportar(otra, self.denunciantes[:1])
+        self.reportar(self.publicacion, self.denunciantes[:2])
+
+        grupos = self.client.get(reverse('moderacion-cola')).data['results']
+        self.assertEqual(
+            [(g['publicacion'], g['reportes'], g['denunciantes']) for g in grupos],
+            [(self.publicacion.pk, 2, 2), (otra.pk, 1, 1)],
+        )
+
+    def test_rechazar_restaura_la_publicacion_oculta(self):
+        self.reportar(self.publicacion, self.denunciantes)
+        respuesta = self.moderar('rechazar')
+        self.assertEqual(respuesta.data['cantidad'], 3)
+        self.assertFalse(Reporte.objects.exclude(estado=2).exists())
+        self.publicacion.refresh_from_db()
+        self.assertTrue(self.publicacion.estado)
+        self.assertFalse(self.publicacion.oculta_por_reportes)
+        self.assertEqual(self.client.get(reverse('moderacion-cola')).data['results'], [])
+
+    def test_aprobar_y_eliminar(self):
+        self.reportar(self.publicacion, self.denunciantes[:2])
+        self.assertEqual(self.moderar('aprobar').data['cantidad'], 2)
+        self.publicacion.refresh_from_db()
+        self.assertTrue(self.publicacion.estado)
+        self.assertEqual(set(Reporte.objects.values_list('estado', 'administrador')), {(1, self.admin.pk)})
+
+        self.reportar(self.publicacion, self.denunciantes[2:])
+        self.assertEqual(self.moderar('eliminar').data['cantidad'], 1)
+        self.publicacion.refresh_from_db()
+        self.assertFalse(self.publicacion.estado)
+        self.assertFalse(self.publicacion.oculta_por_reportes)
+
+    def test_accion_invalida_y_solo_admin(self):
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.moderar('borrar').status_code, 400)
+        self.client.force_authenticate(self.autor)
+        self.assertEqual(self.client.get(reverse('moderacion-cola')).status_code, 403)
+
+
+class RecomendacionesTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='busca@inacapmail.cl', password='Clave12345')
+        self.autor = User.objects.create_user(email='autor@inacapmail.cl', password='Clave12345')
+        self.otro = User.objects.create_user(email='otro@inacapmail.cl', password='Clave12345')
+        self.perfil = Perfil.objects.create(
+            estudiante=self.user, nombre='Ana', apellido='Soto', carrera='Informática', area='TI',
+            habilidades_ofrecidas=['python'],
+        )
+        IndiceHabilidades.sincronizar_perfil(self.perfil)
+        self.propia = self.publicar(self.user, ofrece=['diseño'], busca=['diseño'])
+        self.reciproca = self.publicar(self.autor, ofrece=['diseño'], busca=['python'])
+        self.parcial = self.publicar(self.otro, busca=['python', 'sql', 'java'])
+        self.inactiva = self.publicar(self.autor, ofrece=['diseño'], busca=['python'], estado=False)
+        self.client.force_authenticate(self.user)
+        self.url = reverse('recomendaciones')
+
+    def publicar(self, estudiante, ofrece=(), busca=(), estado=True):
+        publicacion = Publicacion.objects.create(
+            titulo='pub', estudiante=estudiante, estado=estado,
+            habilidades_ofrecidas=list(ofrece), habilidades_buscadas=list(busca),
+        )
+        IndiceHabilidades.sincronizar_publicacion(publicacion)
+        return publicacion
+
+    def ranking(self):
+        respuesta = self.client.get(self.url)
+        self.assertEqual(respuesta.status_code, 200)
+        return [(r['publicacion']['id_publicacion'], r['reciproco']) for r in respuesta.data]
+
+    def test_orden_sin_propias_ni_inactivas(self):
+        self.assertEqual(self.ranking(), [(self.reciproca.pk, True), (self.parcial.pk, False)])
+
+    def test_cambio_de_habilidades_del_perfil_invalida(self):
+        self.ranking()
+        with self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.client.patch(
+                reverse('perfil-estudiante'), {'habilidades_ofrecidas': ['sql']}, format='json'
+            )
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(self.ranking(), [(self.reciproca.pk, False), (self.parcial.pk, False)])
+
+    def test_cambio_de_publicacion_invalida(self):
+        self.ranking()
+        self.client.force_authenticate(self.autor)
+        with self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.client.patch(
+                reverse('publicaciones-update', args=[self.reciproca.pk]),
+                {'habilidades_buscadas': ['java']}, format='json',
+            )
+        self.assertEqual(respuesta.status_code, 200)
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.ranking(), [(self.reciproca.pk, False), (self.parcial.pk, False)])
+
+    def test_version_expulsada_no_revive_el_ranking_viejo(self):
+        self.ranking()
+        PublicacionHabilidad.objects.filter(publicacion=self.parcial).delete()  # sin señales
+        cache.delete(cache_respuestas._clave_version(MotorRecomendaciones.NAMESPACE))  # como una expulsión LRU
+        self.assertEqual(self.ranking(), [(self.reciproca.pk, True)])
+
+
+class BusquedaTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='lector@inacapmail.cl', password='Clave12345')
+        self.titulo = Publicacion.objects.create(
+            titulo='Clases de programación en Python', descripcion='Nivel inicial', estudiante=self.user
+        )
+        self.descripcion = Publicacion.objects.create(
+            titulo='Ayuda con tareas', descripcion='Soy programador y busco diseño', estudiante=self.user
+        )
+        self.otra = Publicacion.objects.create(titulo='Guitarra', descripcion='Acordes', estudiante=self.user)
+        self.client.force_authenticate(self.user)
+        self.url = reverse('publicaciones-buscar')
+
+    def buscar(self, q, **params):
+        respuesta = self.client.get(self.url, {'q': q, **params})
+        self.assertEqual(respuesta.status_code, 200)
+        return [p['id_publicacion'] for p in respuesta.data['results']]
+
+    def test_coincidencias_ordenadas_por_relevancia(self):
+        # El título pesa más que la descripción
+        self.assertEqual(self.buscar('programación'), [self.titulo.pk, self.descripcion.pk])
+        respuesta = self.client.get(self.url, {'q': 'programacion', 'limit': 1})
+        self.assertEqual(len(respuesta.data['results']), 1)
+        self.assertIn('offset=1', respuesta.data['next'])
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+
+    def test_sin_tildes_ni_mayusculas(self):
+        self.assertEqual(self.buscar('DISENO'), [self.descripcion.pk])
+        self.assertEqual(self.buscar('diseño'), [self.descripcion.pk])
+        self.assertEqual(self.buscar('Programacion'), self.buscar('programación'))
+
+    def test_indice_sigue_las_ediciones_y_borrados(self):
+        self.otra.titulo = 'Clases de piano'
+        self.otra.save()
+        self.assertEqual(self.buscar('guitarra'), [])
+        self.assertEqual(self.buscar('piano'), [self.otra.pk])
+
+        self.client.delete(reverse('publicaciones-delete', args=[self.titulo.pk]))
+        self.assertEqual(self.buscar('python'), [])
+
+        pk = self.otra.pk
+        self.otra.delete()
+        if busqueda.es_postgres():
+            return  # el GIN lo mantiene Postgres
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {busqueda.TABLA_FTS} WHERE rowid = %s', [pk])
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+    @skipIf(connection.vendor != 'sqlite', 'La tabla FTS5 solo existe en SQLite')
+    def test_reconstruir_desde_un_indice_vacio(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {busqueda.TABLA_FTS}')
+        self.assertEqual(self.buscar('python'), [])
+
+        salida = io.StringIO()
+        call_command('reconstruir_busqueda', '--lote', '2', stdout=salida)
+        self.assertIn('3 publicaciones indexadas', salida.getvalue())
+        self.assertEqual(self.buscar('python'), [self.titulo.pk])
+        self.assertEqual(self.buscar('acordes'), [self.otra.pk])
+
+
+class EventosWebsocketTests(TransactionTestCase):
+    def setUp(self):
+        self.autor = User.objects.create_user(email='autor@inacapmail.cl', password='Clave12345')
+        self.receptor = User.objects.create_user(email='receptor@inacapmail.cl', password='Clave12345')
+        self.ajeno = User.objects.create_user(email='ajeno@inacapmail.cl', password='Clave12345')
+        self.chat = Chat.objects.create(
+            publicacion=Publicacion.objects.create(titulo='pub', estudiante=self.autor)
+        )
+        ChatParticipante.objects.create(chat=self.chat, estudiante=self.autor, rol='autor')
+        ChatParticipante.objects.create(chat=self.chat, estudiante=self.receptor, rol='receptor')
+        self.aplicacion = JWTAuthMiddleware(URLRouter(websocket_urlpatterns))
+
+    def comunicador(self, usuario=None, token=None, subprotocolos=None):
+        if usuario is not None:
+            token = str(RefreshToken.for_user(usuario).access_token)
+        ruta = '/ws/eventos/'
+        if token and not subprotocolos:
+            ruta += f'?token={token}'
+        return WebsocketCommunicator(self.aplicacion, ruta, subprotocols=subprotocolos)
+
+    async def test_rechaza_sin_token_o_con_token_invalido(self):
+        for comunicador in (self.comunicador(), self.comunicador(token='no-es-un-jwt')):
+            conectado, codigo = await comunicador.connect()
+            self.assertFalse(conectado)
+            self.assertEqual(codigo, 4401)
+
+    async def test_token_por_subprotocolo(self):
+        token = str(RefreshToken.for_user(self.autor).access_token)
+        comunicador = self.comunicador(subprotocolos=['bearer', token])
+        conectado, subprotocolo = await comunicador.connect()
+        self.assertTrue(conectado)
+        self.assertEqual(subprotocolo, 'bearer')
+        await comunicador.send_json_to({'tipo': 'ping'})
+        self.assertEqual(await comunicador.receive_json_from(), {'tipo': 'pong'})
+        await comunicador.disconnect()
+
+    async def test_mensaje_nuevo_solo_llega_a_los_participantes(self):
+        autor, ajeno = self.comunicador(self.autor), self.comunicador(self.ajeno)
+        self.assertTrue((await autor.connect())[0])
+        self.assertTrue((await ajeno.connect())[0])
+
+        await sync_to_async(Mensaje.objects.create)(chat=self.chat, estudiante=self.receptor, texto='hola')
+
+        evento = await autor.receive_json_from()
+        self.assertEqual(evento['tipo'], 'mensaje')
+        self.assertEqual((evento['data']['texto'], evento['data']['chat']), ('hola', self.chat.pk))
+        self.assertTrue(await ajeno.receive_nothing())
+        await autor.disconnect()
+        await ajeno.disconnect()
@@ -0,0 +1,82 @@
+"""
+Throttling por cupo (bucket) para endpoints de escritura.
+
+Cada vista elige su `throttle_scope` y sus clases (por usuario, por IP o
+ambas); capacidad y recarga vienen de settings.THROTTLE_BUCKETS. El conteo
+vive en el caché compartido y se actualiza con `cache.add` + `cache.incr`,
+atómicos por clave en Redis, Memcached y LocMem: no hay locks de proceso y
+varios workers no pueden dejar pasar más del cupo. DRF revisa los throttles
+en `initial()`, antes del handler: una request rechazada no toca la base
+ni abre transacciones.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+
+class VentanaFijaThrottle(BaseThrottle):
+    """
+    Admite `capacidad` requests de escritura por ventana, con ventanas de
+    capacidad / por_minuto minutos: la ráfaga máxima es `capacidad` y la
+    tasa sostenida no supera `por_minuto`.
+    """
+    tipo = None  # 'usuario' o 'ip': la entrada de THROTTLE_BUCKETS[scope] a usar
+    solo_escritura = True
+
+    def __init__(self):
+        self.espera = None
+
+    def get_ident_bucket(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        if self.solo_escritura and request.method in SAFE_METHODS:
+            return True
+
+        scope = getattr(view, 'throttle_scope', None)
+        config = settings.THROTTLE_BUCKETS.get(scope, {}).get(self.tipo)
+        if not config:
+            return True
+
+        capacidad = config['capacidad']
+        ventana = capacidad * 60.0 / config['por_minuto']  # segundos
+        ahora = time.time()
+        indice = int(ahora // ventana)
+        clave = f'throttle:{scope}:{self.tipo}:{self.get_ident_bucket(request)}:{indice}'
+
+        cache.add(clave, 0, int(ventana) + 1)
+        try:
+            usadas = cache.incr(clave)
+        except ValueError:  # expulsada del caché entre add e incr
+            cache.add(clave, 1, int(ventana) + 1)
+            usadas = 1
+
+        if usadas > capacidad:
+            self.espera = (indice + 1) * ventana - ahora
+            return False
+        return True
+
+    def wait(self):
+        return self.espera
+
+
+class BucketUsuarioThrottle(VentanaFijaThrottle):
+    """Un bucket por usuario autenticado (por IP si es anónimo)."""
+    tipo = 'usuario'
+
+    def get_ident_bucket(self, request):
+        if request.user and request.user.is_authenticated:
+            return request.user.pk
+        return f'anon-{self.get_ident(request)}'
+
+
+class BucketIPThrottle(VentanaFijaThrottle):
+    """Un bucket por IP de origen (respeta NUM_PROXIES de DRF)."""
+    tipo = 'ip'
+
+    def get_ident_bucket(self, request):
+        return self.get_ident(request)
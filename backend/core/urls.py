@@ -3,16 +3,22 @@ from .views import (
     # Publicaciones
     PublicacionListCreateView, PublicacionDetailView,
     PublicacionUpdateView, PublicacionDeleteView, MisPublicacionesView,
+    RecomendacionesView, BuscarPublicacionesView,
     # Chats y mensajes
     ChatListCreateView, ChatDetailView, CompletarIntercambioView, MensajeListCreateView,
     # Calificaciones
     CalificacionChatCreateView,
     # Notificaciones
     NotificacionListView, MarcarNotificacionLeidaView, MarcarTodasNotificacionesLeidasView,
+    ResumenNotificacionesView,
     # Perfil
     PerfilDetailView, CrearPerfilView, EliminarMiCuenta,
+    # Caché
+    MetricasCacheView, MetricasInstrumentacionView, MetricasPrometheusView,
     # Reportes
-    CrearReporteView, ListarReportesView, ModerarReporteView,
+    CrearReporteView, ListarReportesView, ModerarReporteView, ExportarView,
+    ColaModeracionView, ModerarPublicacionView,
+    PublicacionesDeUsuarioAdminView,
 )
 
 urlpatterns = [
@@ -24,10 +30,12 @@ urlpatterns = [
 
     # Publicaciones
     path('publicaciones/', PublicacionListCreateView.as_view(), name='publicaciones-list-create'),
+    path('publicaciones/buscar/', BuscarPublicacionesView.as_view(), name='publicaciones-buscar'),
     path('publicaciones/mias/', MisPublicacionesView.as_view(), name='mis-publicaciones'),
     path('publicaciones/<int:pk>/', PublicacionDetailView.as_view(), name='publicaciones-detail'),
     path('publicaciones/<int:pk>/editar/', PublicacionUpdateView.as_view(), name='publicaciones-update'),
     path('publicaciones/<int:pk>/eliminar/', PublicacionDeleteView.as_view(), name='publicaciones-delete'),
+    path('recomendaciones/', RecomendacionesView.as_view(), name='recomendaciones'),
 
     # Chats
     path('chats/', ChatListCreateView.as_view(), name='chat-list-create'),
@@ -42,11 +50,30 @@ urlpatterns = [
 
     # Notificaciones
     path('notificaciones/', NotificacionListView.as_view(), name='notificacion-list'),
+    path('notificaciones/resumen/', ResumenNotificacionesView.as_view(), name='notificaciones-resumen'),
     path('notificaciones/<int:pk>/marcar-leida/', MarcarNotificacionLeidaView.as_view(), name='notificacion-marcar-leida'),
     path('notificaciones/marcar-todas-leidas/', MarcarTodasNotificacionesLeidasView.as_view(), name='notificaciones-marcar-todas-leidas'),
 
+    # Caché
+    path('cache/metricas/', MetricasCacheView.as_view(), name='cache-metricas'),
+    path('instrumentacion/metricas/', MetricasInstrumentacionView.as_view(), name='instrumentacion-metricas'),
+    path('metrics/', MetricasPrometheusView.as_view(), name='metrics'),
+
     # Reportes
     path('reportes/', CrearReporteView.as_view(), name='crear-reporte'),
     path('reportes/listar/', ListarReportesView.as_view(), name='listar-reportes'),
     path('reportes/<int:pk>/moderar/', ModerarReporteView.as_view(), name='moderar-reporte'),
+    path('moderacion/cola/', ColaModeracionView.as_view(), name='moderacion-cola'),
+    path('moderacion/publicaciones/<int:pk>/', ModerarPublicacionView.as_view(), name='moderacion-publicacion'),
+
+    # Exportaciones (admin, streaming)
+    path('exportar/reportes/', ExportarView.as_view(exportacion='reportes'), name='exportar-reportes'),
+    path('exportar/publicaciones/', ExportarView.as_view(exportacion='publicaciones'), name='exportar-publicaciones'),
+    path('exportar/calificaciones/', ExportarView.as_view(exportacion='calificaciones'), name='exportar-calificaciones'),
+
+    # Administración
+    path('admin/usuarios/<int:pk>/desactivar-publicaciones/',
+         PublicacionesDeUsuarioAdminView.as_view(accion='desactivar'), name='admin-desactivar-publicaciones'),
+    path('admin/usuarios/<int:pk>/reactivar-publicaciones/',
+         PublicacionesDeUsuarioAdminView.as_view(accion='reactivar'), name='admin-reactivar-publicaciones'),
 ]
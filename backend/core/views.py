@@ -2,45 +2,64 @@ from django.shortcuts import get_object_or_404
 from rest_framework import generics, permissions, status, serializers
 from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied, ValidationError
-from django.db import transaction
+from django.db import IntegrityError, transaction
+from django.db.models import Count, OuterRef, Prefetch, Q, Subquery
 from rest_framework.views import APIView
+from rest_framework.authentication import BaseAuthentication
+from django.contrib.auth.models import AnonymousUser
 from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+import datetime
+import hashlib
+import hmac
+from urllib.parse import urlencode
 
 from .models import (
     ChatParticipante, Publicacion, CalificacionChat,
     Mensaje, Reporte, Perfil, Notificacion, Chat
 )
 from .serializers import (
-    ModerarReporteSerializer, PerfilCompletoSerializer,
-    PublicacionSerializer, ChatSerializer, MensajeSerializer,
+    ModerarReporteSerializer, ModerarPublicacionSerializer, ColaModeracionSerializer, PerfilCompletoSerializer,
+    PublicacionSerializer, ChatSerializer, ChatBandejaSerializer, MensajeSerializer,
     NotificacionSerializer, ReporteSerializer, CalificacionChatSerializer
 )
+from .pagination import ChatCursorPagination, ColaModeracionPagination, PublicacionCursorPagination
+from .throttling import BucketIPThrottle, BucketUsuarioThrottle
+from .service import IndiceHabilidades, ReputacionService, SoftDeleteService
+from .recomendaciones import MotorRecomendaciones, TOP_K_MAX
+from . import busqueda, cache_respuestas, exportacion, idempotencia, instrumentacion, metricas, moderacion
+from .notificaciones import marcar_leida, marcar_todas_leidas, notificar, resumen_no_leidas
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework import status
-import requests
+from djoser.conf import settings as djoser_settings
+from accounts.reset import solicitar_reset
+
+
 @api_view(['POST'])
 @permission_classes([])
 def test_reset_flow(request):
     """
-    Endpoint para probar el flujo completo de reseteo
+    Endpoint para probar el flujo completo de reseteo.
+    Llama al servicio en proceso: nada de HTTP contra la propia API.
     """
-    email = request.data.get('email')
-    
-    # Paso 1: Solicitar reset
-    try:
-        response = requests.post(
-            'http://127.0.0.1:8000/api/auth/users/reset_password/',
-            json={'email': email},
-            headers={'Content-Type': 'application/json'}
-        )
+    serializer = djoser_settings.SERIALIZERS.password_reset(data=request.data, context={"request": request})
+    if not serializer.is_valid():
         return Response({
             "step": "request_reset",
-            "status": response.status_code,
-            "data": response.json() if response.status_code == 204 else response.text
+            "status": status.HTTP_400_BAD_REQUEST,
+            "data": serializer.errors,
         })
-    except Exception as e:
-        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    usuario = serializer.get_user()
+    enviados = solicitar_reset(usuario, request=request) if usuario else 0
+    return Response({
+        "step": "request_reset",
+        "status": status.HTTP_204_NO_CONTENT,
+        "data": {"correos_encolados": enviados},
+    })
 
 # ----------- PUBLICACIONES VIEWS  -----------
 
@@ -49,20 +68,173 @@ class MisPublicacionesView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Publicacion.objects.filter(estudiante=self.request.user)
+        return Publicacion.objects.filter(
+            estudiante=self.request.user, estado=True
+        ).select_related('estudiante__reputacion')
+
+def parsear_fecha_param(params, nombre, fin_de_dia=False):
+    """
+    Convierte un query param (fecha o fecha-hora ISO) en datetime aware.
+    Si solo viene la fecha y fin_de_dia=True, se usa el final de ese día.
+    """
+    valor = params.get(nombre)
+    if not valor:
+        return None
+
+    fecha = parse_datetime(valor)
+    if fecha is None:
+        dia = parse_date(valor)
+        if dia is None:
+            raise ValidationError({nombre: ["Formato de fecha inválido. Usa AAAA-MM-DD."]})
+        hora = datetime.time.max if fin_de_dia else datetime.time.min
+        fecha = datetime.datetime.combine(dia, hora)
+
+    if timezone.is_naive(fecha):
+        fecha = timezone.make_aware(fecha)
+    return fecha
+
+
+def parsear_lista_param(params, nombre):
+    """Acepta ?x=a,b y también ?x=a&x=b."""
+    valores = []
+    for valor in params.getlist(nombre):
+        valores.extend(v for v in valor.split(',') if v.strip())
+    return valores
+
 
 class PublicacionListCreateView(generics.ListCreateAPIView):
-    queryset = Publicacion.objects.all()
+    """
+    Feed paginado por cursor. Filtros opcionales:
+    estado (true/false/todos, por defecto true), carrera, area, desde, hasta,
+    ofrece / busca (listas de habilidades separadas por coma, vía el índice).
+    Con estado false o todos, un estudiante solo ve sus propias publicaciones
+    inactivas; los administradores ven todas.
+    """
     serializer_class = PublicacionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = PublicacionCursorPagination
+
+    def alcance(self):
+        """None si el listado es público; si no, 'staff' o el pk del autor al que se limita."""
+        estado = self.request.query_params.get('estado', 'true').lower()
+        if estado in ('true', '1'):
+            return None
+        if estado not in ('false', '0', 'todos'):
+            raise ValidationError({"estado": ["Valor inválido. Usa true, false o todos."]})
+        return 'staff' if self.request.user.is_staff else self.request.user.pk
+
+    def get_queryset(self):
+        params = self.request.query_params
+        queryset = Publicacion.objects.select_related('estudiante__reputacion')
+
+        alcance = self.alcance()
+        if alcance is None:
+            queryset = queryset.filter(estado=True)
+        else:
+            if params['estado'].lower() in ('false', '0'):
+                queryset = queryset.filter(estado=False)
+            if alcance != 'staff':
+                queryset = queryset.filter(estudiante_id=alcance)
+
+        carrera = params.get('carrera')
+        if carrera:
+            queryset = queryset.filter(estudiante__perfil__carrera=carrera)
+
+        area = params.get('area')
+        if area:
+            queryset = queryset.filter(estudiante__perfil__area=area)
+
+        desde = parsear_fecha_param(params, 'desde')
+        if desde:
+            queryset = queryset.filter(fecha_creacion__gte=desde)
+
+        hasta = parsear_fecha_param(params, 'hasta', fin_de_dia=True)
+        if hasta:
+            queryset = queryset.filter(fecha_creacion__lte=hasta)
+
+        ofrece = parsear_lista_param(params, 'ofrece')
+        if ofrece:
+            queryset = queryset.filter(
+                id_publicacion__in=IndiceHabilidades.publicaciones_con(ofrece, 'ofrecida')
+            )
+
+        busca = parsear_lista_param(params, 'busca')
+        if busca:
+            queryset = queryset.filter(
+                id_publicacion__in=IndiceHabilidades.publicaciones_con(busca, 'buscada')
+            )
+
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        # La respuesta depende de los parámetros, del origen (los links
+        # next/previous del cursor son URLs absolutas) y, para las inactivas,
+        # de quién las pide.
+        origen = f'{request.scheme}://{request.get_host()}'
+        parametros = origen + '?' + urlencode(sorted(request.query_params.lists()), doseq=True)
+        alcance = self.alcance()
+        if alcance is not None:
+            parametros = f'{alcance}|{parametros}'
+        data = cache_respuestas.obtener_o_calcular(
+            'feed', [hashlib.md5(parametros.encode()).hexdigest()], 'feed',
+            lambda: super(PublicacionListCreateView, self).list(request, *args, **kwargs).data,
+        )
+        return Response(data)
+
+class BuscarPublicacionesView(APIView):
+    """
+    Búsqueda de texto completo en título y descripción, ordenada por relevancia.
+    ?q=texto&limit=N&offset=M
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    limite_maximo = 50
+
+    def get(self, request):
+        q = request.query_params.get('q', '').strip()
+        if not q:
+            raise ValidationError({"q": ["Este campo es requerido."]})
+        try:
+            limite = min(max(int(request.query_params.get('limit', 20)), 1), self.limite_maximo)
+            desplazamiento = max(int(request.query_params.get('offset', 0)), 0)
+        except ValueError:
+            raise ValidationError({"non_field_errors": ["limit y offset deben ser números enteros."]})
+
+        # Se pide uno de más para saber si hay página siguiente
+        ranking = busqueda.buscar(q, limite + 1, desplazamiento)
+        hay_mas = len(ranking) > limite
+        ranking = ranking[:limite]
+
+        publicaciones = Publicacion.objects.select_related('estudiante__reputacion').in_bulk(
+            [pk for pk, _ in ranking]
+        )
+        resultados = [
+            {**PublicacionSerializer(publicaciones[pk]).data, 'relevancia': round(relevancia, 4)}
+            for pk, relevancia in ranking if pk in publicaciones
+        ]
+
+        siguiente = None
+        if hay_mas:
+            siguiente = request.build_absolute_uri(
+                f"{request.path}?{urlencode({'q': q, 'limit': limite, 'offset': desplazamiento + limite})}"
+            )
+        return Response({'next': siguiente, 'results': resultados}, status=200)
+
 
 class PublicacionDetailView(generics.RetrieveAPIView):
-    queryset = Publicacion.objects.filter(estado=True)
+    queryset = Publicacion.objects.filter(estado=True).select_related('estudiante__reputacion')
     serializer_class = PublicacionSerializer
     permission_classes = [permissions.AllowAny]
 
+    def retrieve(self, request, *args, **kwargs):
+        pk = self.kwargs['pk']
+        data = cache_respuestas.obtener_o_calcular(
+            f'publicacion:{pk}', [], 'publicacion_detalle',
+            lambda: super(PublicacionDetailView, self).retrieve(request, *args, **kwargs).data,
+        )
+        return Response(data)
+
 class PublicacionUpdateView(generics.UpdateAPIView):
-    queryset = Publicacion.objects.all()
+    queryset = Publicacion.objects.filter(estado=True).select_related('estudiante__reputacion')
     serializer_class = PublicacionSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -84,35 +256,107 @@ class PublicacionDeleteView(generics.DestroyAPIView):
             raise PermissionDenied(
                 {"publicacion": ["No puedes eliminar publicaciones de otro usuario."]}
             )
-        instance.delete()
+        # Borrado lógico: conserva chats, mensajes y notificaciones asociados
+        SoftDeleteService.desactivar_lote(Publicacion.objects.filter(pk=instance.pk))
 
-# ----------- CHAT Y MENSAJES -----------
+class RecomendacionesView(APIView):
+    """
+    Publicaciones con las que conviene intercambiar, ordenadas por puntaje.
+    ?limit=K (máximo TOP_K_MAX).
+    """
+    permission_classes = [permissions.IsAuthenticated]
 
-def crear_notificacion(usuario, tipo, mensaje, chat=None, publicacion=None, calificacion=None):
-    Notificacion.objects.create(
-        estudiante=usuario,
-        tipo=tipo,
-        mensaje=mensaje,
-        chat=chat,
-        publicacion=publicacion,
-        calificacion=calificacion
-    )
+    def get(self, request):
+        try:
+            limite = int(request.query_params.get('limit', 10))
+        except ValueError:
+            raise ValidationError({"limit": ["Debe ser un número entero."]})
+        limite = max(1, min(limite, TOP_K_MAX))
+
+        ranking = MotorRecomendaciones.top_k(request.user, limite)
+        publicaciones = Publicacion.objects.select_related('estudiante__reputacion').in_bulk([r['publicacion'] for r in ranking])
+
+        resultados = []
+        for r in ranking:
+            publicacion = publicaciones.get(r['publicacion'])
+            if publicacion is None or not publicacion.estado:
+                continue
+            resultados.append({
+                **r,
+                'publicacion': PublicacionSerializer(publicacion).data,
+            })
+        return Response(resultados, status=200)
+
+# ----------- CHAT Y MENSAJES -----------
 
 class ChatListCreateView(generics.ListCreateAPIView):
-    queryset = Chat.objects.all().order_by('-fecha_inicio')
-    serializer_class = ChatSerializer
+    """
+    Bandeja de entrada: solo los chats donde participa el usuario, con el
+    último mensaje y los no leídos anotados en la misma consulta.
+    """
+    serializer_class = ChatBandejaSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ChatCursorPagination
+    throttle_classes = [BucketUsuarioThrottle, BucketIPThrottle]
+    throttle_scope = 'chats'
+
+    def get_queryset(self):
+        user = self.request.user
+        ultimo = Mensaje.objects.filter(chat=OuterRef('pk')).order_by('-id_mensaje')
+
+        return (
+            Chat.objects
+            .filter(id_chat__in=ChatParticipante.objects.filter(estudiante=user).values('chat'))
+            .annotate(
+                no_leidos=Count(
+                    'mensajes',
+                    filter=Q(mensajes__leido=False) & ~Q(mensajes__estudiante=user),
+                ),
+                ultimo_mensaje_id=Subquery(ultimo.values('id_mensaje')[:1]),
+                ultimo_mensaje_texto=Subquery(ultimo.values('texto')[:1]),
+                ultimo_mensaje_fecha=Subquery(ultimo.values('fecha')[:1]),
+                ultimo_mensaje_estudiante=Subquery(ultimo.values('estudiante')[:1]),
+            )
+            .prefetch_related(Prefetch('participantes', queryset=ChatParticipante.objects.order_by('id')))
+        )
 
-    @transaction.atomic
     def create(self, request, *args, **kwargs):
+        """
+        Idempotente por (publicacion, receptor): si el chat ya existe se
+        devuelve con 200 tras una sola lectura indexada, sin transacción de
+        escritura. Con Idempotency-Key se repite la primera respuesta.
+        """
+        guardada = idempotencia.respuesta_guardada(request)
+        if guardada is not None:
+            return guardada
+
         receptor = request.user
         publicacion_id = request.data.get('publicacion')
         if not publicacion_id:
             raise serializers.ValidationError(
                 {"publicacion": ["Este campo es requerido."]}
             )
+        try:
+            publicacion_id = int(publicacion_id)
+        except (TypeError, ValueError):
+            raise serializers.ValidationError({"publicacion": ["Debe ser un número entero."]})
+
+        chat = Chat.objects.filter(publicacion_id=publicacion_id, receptor=receptor).first()
+        if chat is not None:
+            return idempotencia.guardar_respuesta(request, Response(ChatSerializer(chat).data, status=200))
+
+        try:
+            chat = self.crear_chat(publicacion_id, receptor)
+            status_code = 201
+        except IntegrityError:
+            # Una request simultánea creó el mismo chat primero
+            chat = Chat.objects.get(publicacion_id=publicacion_id, receptor=receptor)
+            status_code = 200
+        return idempotencia.guardar_respuesta(request, Response(ChatSerializer(chat).data, status=status_code))
 
-        publicacion = get_object_or_404(Publicacion, pk=publicacion_id)
+    @transaction.atomic
+    def crear_chat(self, publicacion_id, receptor):
+        publicacion = get_object_or_404(Publicacion, pk=publicacion_id, estado=True)
         autor = publicacion.estudiante
 
         if autor == receptor:
@@ -120,18 +364,20 @@ class ChatListCreateView(generics.ListCreateAPIView):
                 {"publicacion": ["No puedes iniciar un chat contigo mismo."]}
             )
 
-        chat = Chat.objects.create(publicacion=publicacion)
-        ChatParticipante.objects.get_or_create(chat=chat, estudiante=autor, defaults={'rol': 'autor'})
-        ChatParticipante.objects.get_or_create(chat=chat, estudiante=receptor, defaults={'rol': 'receptor'})
+        chat = Chat.objects.create(publicacion=publicacion, receptor=receptor)
+        ChatParticipante.objects.bulk_create([
+            ChatParticipante(chat=chat, estudiante=autor, rol='autor'),
+            ChatParticipante(chat=chat, estudiante=receptor, rol='receptor'),
+        ])
 
-        crear_notificacion(
-            autor,
+        notificar(
+            [autor],
             'nuevo_chat',
             f'Nuevo chat sobre tu publicación {publicacion_id}',
-            chat,
-            publicacion
+            chat=chat,
+            publicacion=publicacion
         )
-        return Response(ChatSerializer(chat).data, status=201)
+        return chat
 
 
 class ChatDetailView(generics.RetrieveAPIView):
@@ -168,13 +414,12 @@ class CompletarIntercambioView(generics.UpdateAPIView):
         chat.save()
 
         receptores = ChatParticipante.objects.filter(chat=chat).exclude(estudiante=estudiante)
-        for receptor in receptores:
-            crear_notificacion(
-                receptor.estudiante,
-                'intercambio_completado',
-                f'El autor ha marcado el chat {chat.pk} como completado.',
-                chat
-            )
+        notificar(
+            receptores.values_list('estudiante_id', flat=True),
+            'intercambio_completado',
+            f'El autor ha marcado el chat {chat.pk} como completado.',
+            chat=chat
+        )
 
         return Response(ChatSerializer(chat).data, status=200)
 
@@ -183,9 +428,58 @@ class CompletarIntercambioView(generics.UpdateAPIView):
 # -----------------------MENSAJES -----------------------
 
 class MensajeListCreateView(generics.ListCreateAPIView):
-    queryset = Mensaje.objects.all().order_by('fecha')
+    """
+    GET ?chat=<id>&after=<id_mensaje>&limit=N devuelve solo los mensajes
+    nuevos del chat (en orden de id). Responde 304 si el ETag del cliente
+    sigue vigente, sin pasar por el serializer.
+    """
     serializer_class = MensajeSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [BucketUsuarioThrottle, BucketIPThrottle]
+    throttle_scope = 'mensajes'
+    limite_por_defecto = 50
+    limite_maximo = 200
+
+    def parsear_entero(self, nombre, defecto=None):
+        valor = self.request.query_params.get(nombre)
+        if valor in (None, ''):
+            return defecto
+        try:
+            numero = int(valor)
+        except ValueError:
+            raise ValidationError({nombre: ["Debe ser un número entero."]})
+        if numero < 0:
+            raise ValidationError({nombre: ["Debe ser mayor o igual a 0."]})
+        return numero
+
+    def list(self, request, *args, **kwargs):
+        chat_id = self.parsear_entero('chat')
+        if chat_id is None:
+            raise serializers.ValidationError(
+                {"chat": ["Este campo es requerido."]}
+            )
+        despues_de = self.parsear_entero('after', 0)
+        limite = min(self.parsear_entero('limit', self.limite_por_defecto) or 1, self.limite_maximo)
+
+        if not ChatParticipante.objects.filter(chat_id=chat_id, estudiante=request.user).exists():
+            raise PermissionDenied(
+                {"chat": ["No eres participante de este chat."]}
+            )
+
+        mensajes = Mensaje.objects.filter(chat_id=chat_id)
+        ultimo_id = (
+            mensajes.order_by('-id_mensaje').values_list('id_mensaje', flat=True).first() or 0
+        )
+        etag = f'"m{chat_id}-{despues_de}-{limite}-{ultimo_id}"'
+        if etag in request.headers.get('If-None-Match', ''):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        nuevos = mensajes.filter(id_mensaje__gt=despues_de).order_by('id_mensaje')[:limite]
+        return Response(
+            MensajeSerializer(nuevos, many=True).data,
+            status=200,
+            headers={'ETag': etag},
+        )
 
     @transaction.atomic
     def create(self, request, *args, **kwargs):
@@ -210,13 +504,13 @@ class MensajeListCreateView(generics.ListCreateAPIView):
 
         mensaje = Mensaje.objects.create(chat=chat, estudiante=remitente, texto=texto)
 
-        for otro in ChatParticipante.objects.filter(chat=chat).exclude(estudiante=remitente):
-            crear_notificacion(
-                otro.estudiante,
-                'nuevo_mensaje',
-                f'Nuevo mensaje en el chat {chat.id_chat}',
-                chat
-            )
+        otros = ChatParticipante.objects.filter(chat=chat).exclude(estudiante=remitente)
+        notificar(
+            otros.values_list('estudiante_id', flat=True),
+            'nuevo_mensaje',
+            f'Nuevo mensaje en el chat {chat.id_chat}',
+            chat=chat
+        )
 
         return Response(MensajeSerializer(mensaje).data, status=201)
 
@@ -232,13 +526,11 @@ class CalificacionChatCreateView(generics.CreateAPIView):
     @transaction.atomic
     def create(self, request, *args, **kwargs):
         evaluador = request.user
-        chat_id = request.data.get('chat')
-        if not chat_id:
-            raise serializers.ValidationError(
-                {"chat": ["Este campo es requerido."]}
-            )
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        datos = serializer.validated_data
 
-        chat = get_object_or_404(Chat, pk=chat_id)
+        chat = datos['chat']
         if not ChatParticipante.objects.filter(chat=chat, estudiante=evaluador).exists():
             raise PermissionDenied(
                 {"chat": ["No eres participante de este chat."]}
@@ -249,23 +541,22 @@ class CalificacionChatCreateView(generics.CreateAPIView):
                 {"chat": ["Ya has calificado este chat."]}
             )
 
-        puntaje = request.data.get('puntaje')
-        comentario = request.data.get('comentario', '')
-
         calificacion = CalificacionChat.objects.create(
             chat=chat,
             evaluador=evaluador,
-            puntaje=puntaje,
-            comentario=comentario
+            puntaje=datos['puntaje'],
+            comentario=datos.get('comentario') or ''
         )
 
-        for otro in ChatParticipante.objects.filter(chat=chat).exclude(estudiante=evaluador):
-            crear_notificacion(
-                otro.estudiante,
-                'calificacion_chat',
-                f'El usuario {evaluador.pk} calificó el chat {chat.pk}.',
-                chat
-            )
+        otros = ChatParticipante.objects.filter(chat=chat).exclude(estudiante=evaluador)
+        calificados = list(otros.values_list('estudiante_id', flat=True))
+        ReputacionService.registrar(calificacion, calificados)
+        notificar(
+            calificados,
+            'calificacion_chat',
+            f'El usuario {evaluador.pk} calificó el chat {chat.pk}.',
+            chat=chat
+        )
 
         return Response(CalificacionChatSerializer(calificacion).data, status=201)
 
@@ -288,8 +579,7 @@ class MarcarNotificacionLeidaView(generics.UpdateAPIView):
 
     def patch(self, request, pk=None):
         notif = get_object_or_404(Notificacion, pk=pk, estudiante=request.user)
-        notif.leida = True
-        notif.save(update_fields=['leida'])
+        marcar_leida(notif)
         return Response(NotificacionSerializer(notif).data, status=200)
 
 
@@ -297,9 +587,7 @@ class MarcarTodasNotificacionesLeidasView(generics.CreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
-        actualizadas = Notificacion.objects.filter(
-            estudiante=request.user, leida=False
-        ).update(leida=True)
+        actualizadas = marcar_todas_leidas(request.user)
 
         if actualizadas == 0:
             # Usamos el formato estándar DRF para errores globales
@@ -313,6 +601,14 @@ class MarcarTodasNotificacionesLeidasView(generics.CreateAPIView):
         )
 
 
+class ResumenNotificacionesView(APIView):
+    """No leídas por tipo, leídas del contador denormalizado (sin contar filas)."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response(resumen_no_leidas(request.user), status=200)
+
+
 # ----------------------- PERFIL -----------------------
 
 User = get_user_model()
@@ -322,7 +618,7 @@ class CrearPerfilView(generics.CreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def perform_create(self, serializer):
-        if Perfil.objects.filter(estudiante=self.request.user).exists():
+        if hasattr(self.request.user, 'perfil'):  # snapshot del caché de autenticación
             # Usamos non_field_errors porque no es un campo específico
             raise ValidationError(
                 {"non_field_errors": ["El perfil ya existe."]}
@@ -335,9 +631,18 @@ class PerfilDetailView(generics.RetrieveUpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        perfil, _ = Perfil.objects.get_or_create(estudiante=self.request.user)
+        perfil, _ = Perfil.objects.select_related('estudiante__reputacion').get_or_create(
+            estudiante=self.request.user
+        )
         return perfil
 
+    def retrieve(self, request, *args, **kwargs):
+        data = cache_respuestas.obtener_o_calcular(
+            f'perfil:{request.user.pk}', [], 'perfil',
+            lambda: super(PerfilDetailView, self).retrieve(request, *args, **kwargs).data,
+        )
+        return Response(data)
+
 
 
 class EliminarMiCuenta(APIView):
@@ -363,14 +668,84 @@ class EliminarMiCuenta(APIView):
             status=status.HTTP_200_OK
         )
 
+class MetricasCacheView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(cache_respuestas.metricas(), status=200)
+
+
+class MetricasInstrumentacionView(APIView):
+    """Histogramas por nombre de URL de latencia, tiempo SQL y consultas (estas dos, muestreadas)."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(instrumentacion.resumen_por_ruta(), status=200)
+
+
+class TokenMetricasAuthentication(BaseAuthentication):
+    """Acepta "Authorization: Bearer <METRICAS['TOKEN']>" (el scraper de Prometheus)."""
+
+    def authenticate(self, request):
+        token = metricas.config('TOKEN')
+        if token and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return AnonymousUser(), 'metricas'
+        return None
+
+    def authenticate_header(self, request):
+        return 'Bearer realm="metricas"'
+
+
+class EsScraperOAdmin(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return request.auth == 'metricas' or bool(request.user and request.user.is_staff)
+
+
+class MetricasPrometheusView(APIView):
+    """Texto para Prometheus: requiere METRICAS['TOKEN'] o un usuario administrador."""
+    permission_classes = [EsScraperOAdmin]
+
+    def get_authenticators(self):
+        return [TokenMetricasAuthentication(), *super().get_authenticators()]
+
+    def get(self, request):
+        return HttpResponse(metricas.exponer(), content_type=metricas.CONTENT_TYPE)
+
 # ----------------------- REPORTES Y MODERACIÓN -----------------------
 
+class PublicacionesDeUsuarioAdminView(APIView):
+    """
+    Desactiva (POST .../desactivar-publicaciones/) o reactiva
+    (POST .../reactivar-publicaciones/) todas las publicaciones de un usuario
+    con un solo UPDATE.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    accion = 'desactivar'
+
+    def post(self, request, pk):
+        usuario = get_object_or_404(User, pk=pk)
+        publicaciones = Publicacion.objects.filter(estudiante=usuario)
+        if self.accion == 'desactivar':
+            cambiadas = SoftDeleteService.desactivar_lote(publicaciones)
+            verbo = 'desactivadas'
+        else:
+            cambiadas = SoftDeleteService.reactivar_lote(publicaciones)
+            verbo = 'reactivadas'
+        return Response(
+            {"detalle": f"{cambiadas} publicaciones {verbo}.", "cantidad": cambiadas},
+            status=200
+        )
+
+
 class CrearReporteView(generics.CreateAPIView):
     serializer_class = ReporteSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [BucketUsuarioThrottle, BucketIPThrottle]
+    throttle_scope = 'reportes'
 
     def perform_create(self, serializer):
-        serializer.save(estudiante=self.request.user)
+        reporte = serializer.save(estudiante=self.request.user)
+        moderacion.ocultar_si_supera_umbral(reporte.publicacion_id)
 
 
 class ListarReportesView(generics.ListAPIView):
@@ -379,7 +754,74 @@ class ListarReportesView(generics.ListAPIView):
     permission_classes = [permissions.IsAdminUser]
 
 
+class ExportarView(APIView):
+    """
+    Descarga completa en streaming (ver core.exportacion). Query params:
+    formato (csv o ndjson, por defecto csv), desde, hasta y estado (lista
+    separada por coma; no aplica a calificaciones).
+    """
+    permission_classes = [permissions.IsAdminUser]
+    exportacion = 'reportes'
+
+    def get(self, request):
+        params = request.query_params
+        definicion = exportacion.EXPORTACIONES[self.exportacion]
+
+        formato = params.get('formato', 'csv').lower()
+        if formato not in exportacion.FORMATOS:
+            raise ValidationError({"formato": ["Valor inválido. Usa csv o ndjson."]})
+
+        queryset = definicion.modelo.objects.all()
+        desde = parsear_fecha_param(params, 'desde')
+        if desde:
+            queryset = queryset.filter(**{f'{definicion.campo_fecha}__gte': desde})
+        hasta = parsear_fecha_param(params, 'hasta', fin_de_dia=True)
+        if hasta:
+            queryset = queryset.filter(**{f'{definicion.campo_fecha}__lte': hasta})
+        estados = parsear_lista_param(params, 'estado')
+        if estados:
+            queryset = queryset.filter(estado__in=definicion.parsear_estados(estados))
+
+        return exportacion.respuesta(definicion, queryset, formato)
+
+
 class ModerarReporteView(generics.UpdateAPIView):
     serializer_class = ModerarReporteSerializer
     queryset = Reporte.objects.all()
     permission_classes = [permissions.IsAdminUser]
+
+
+class ColaModeracionView(generics.ListAPIView):
+    """Publicaciones con reportes pendientes, las más reportadas y recientes primero."""
+    serializer_class = ColaModeracionSerializer
+    permission_classes = [permissions.IsAdminUser]
+    pagination_class = ColaModeracionPagination
+
+    def get_queryset(self):
+        return moderacion.cola()
+
+
+class ModerarPublicacionView(APIView):
+    """
+    GET: reportes pendientes de la publicación.
+    POST {"accion": aprobar|rechazar|eliminar}: la aplica a todos ellos.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, pk):
+        publicacion = get_object_or_404(Publicacion, pk=pk)
+        pendientes = Reporte.objects.filter(publicacion=publicacion, estado=moderacion.PENDIENTE).order_by('-fecha')
+        return Response(ReporteSerializer(pendientes, many=True).data, status=200)
+
+    def post(self, request, pk):
+        publicacion = get_object_or_404(Publicacion, pk=pk)
+        serializer = ModerarPublicacionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        cantidad = moderacion.aplicar_accion(
+            Reporte.objects.filter(publicacion=publicacion, estado=moderacion.PENDIENTE),
+            serializer.validated_data['accion'], request.user,
+        )
+        return Response(
+            {"detalle": f"{cantidad} reportes moderados.", "cantidad": cantidad},
+            status=200
+        )
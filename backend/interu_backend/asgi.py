@@ -8,11 +8,27 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 import os
 from django.core.asgi import get_asgi_application
-from channels.routing import ProtocolTypeRouter
+from channels.routing import ProtocolTypeRouter, URLRouter
+from channels.security.websocket import AllowedHostsOriginValidator
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'interu_backend.settings')
 
+# Inicializa Django antes de importar código que usa modelos
+django_asgi_app = get_asgi_application()
+
+from core.middleware import JWTAuthMiddleware  # noqa: E402
+from core.routing import websocket_urlpatterns  # noqa: E402
+from accounts.correo import iniciar_workers  # noqa: E402
+from core.barredor import iniciar_barredor_periodico  # noqa: E402
+
 application = ProtocolTypeRouter({
-    "http": get_asgi_application(),
-    # "websocket": ... ← lo agregamos después
+    "http": django_asgi_app,
+    "websocket": AllowedHostsOriginValidator(
+        JWTAuthMiddleware(URLRouter(websocket_urlpatterns))
+    ),
 })
+
+# Workers de correo y barredor periódico: solo arrancan si EMAIL_COLA['WORKERS']
+# y BARREDOR['INTERVALO_SEGUNDOS'] son > 0
+iniciar_workers()
+iniciar_barredor_periodico()
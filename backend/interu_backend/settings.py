@@ -6,6 +6,9 @@ SITE_ID = 1
 from pathlib import Path
 from datetime import timedelta
 import os
+import sys
+
+from django.core.exceptions import ImproperlyConfigured
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -36,6 +39,7 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'core.middleware.InstrumentacionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -46,6 +50,26 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Costo SQL por request (core.instrumentacion). MUESTREO: fracción de requests
+# medidas (0 = apagado, 1 = todas); UMBRAL_DUPLICADAS: repeticiones de una misma
+# firma SQL para considerarla N+1.
+INSTRUMENTACION = {
+    'MUESTREO': float(os.environ.get('INSTRUMENTACION_MUESTREO', 1.0 if DEBUG else 0.0)),
+    'UMBRAL_DUPLICADAS': 5,
+    'LOG_LENTAS_MS': 500,
+    'LOG_TODAS': os.environ.get('INSTRUMENTACION_LOG_TODAS', '0') == '1',
+}
+
+# Exportador /api/metrics/ (core.metricas). Con varios workers de gunicorn,
+# DIRECTORIO debe ser un directorio compartido (vacío al arrancar) donde cada
+# proceso vuelca su snapshot cada INTERVALO_VOLCADO segundos. El scrape debe
+# enviar "Authorization: Bearer <TOKEN>" o venir de un usuario administrador.
+METRICAS = {
+    'DIRECTORIO': os.environ.get('METRICAS_DIRECTORIO') or None,
+    'INTERVALO_VOLCADO': float(os.environ.get('METRICAS_INTERVALO_VOLCADO', '5')),
+    'TOKEN': os.environ.get('METRICAS_TOKEN') or None,
+}
+
 ROOT_URLCONF = 'interu_backend.urls'
 WSGI_APPLICATION = 'interu_backend.wsgi.application'
 ASGI_APPLICATION = 'interu_backend.asgi.application'
@@ -67,11 +91,126 @@ TEMPLATES = [
 ]
 
 # ==================== DATABASE ====================
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DB_ENGINE: sqlite (por defecto, local/tests) o postgres
+if os.environ.get('DB_ENGINE', 'sqlite') == 'postgres':
+    _db_pool = os.environ.get('DB_POOL', '0') == '1'
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'interu'),
+            'USER': os.environ.get('DB_USER', 'interu'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', '127.0.0.1'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            # El pool nativo de Django (requiere psycopg 3 + psycopg-pool) no
+            # admite conexiones persistentes: con pool, CONN_MAX_AGE va en 0.
+            'CONN_MAX_AGE': 0 if _db_pool else int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'connect_timeout': 5,
+                **({'pool': {
+                    'min_size': int(os.environ.get('DB_POOL_MIN', 2)),
+                    'max_size': int(os.environ.get('DB_POOL_MAX', 10)),
+                    'timeout': 10,
+                }} if _db_pool else {}),
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # Se ejecuta en cada conexión nueva. WAL deja leer mientras otro
+                # escribe; IMMEDIATE toma el lock de escritura al empezar la
+                # transacción, así el busy timeout espera en vez de fallar con
+                # "database is locked" a mitad de camino.
+                'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;'
+                if os.environ.get('DB_SQLITE_WAL', '1') == '1' else '',
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': int(os.environ.get('DB_SQLITE_TIMEOUT', 20)),  # busy_timeout, en segundos
+            },
+        }
+    }
+
+# ==================== CACHE ====================
+# CACHE_BACKEND: locmem (LRU en memoria, por defecto), file o redis
+_cache_backend = os.environ.get('CACHE_BACKEND', 'locmem')
+if _cache_backend == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', 'redis://127.0.0.1:6379/1'),
+        }
     }
+elif _cache_backend == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / '.cache')),
+            'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 10000))},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'interu',
+            'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 5000))},
+        }
+    }
+
+# TTL (segundos) por endpoint para core.cache_respuestas
+CACHE_TTL = {
+    'default': 60,
+    'publicacion_detalle': 300,
+    'perfil': 300,
+    'feed': 30,
+    'recomendaciones': 600,
+    'auth': 300,  # usuario + perfil por jti (accounts.authentication)
+}
+
+# ==================== CHANNELS (WEBSOCKETS) ====================
+# En memoria solo en desarrollo (un solo proceso / tests): con varios workers
+# cada uno tendría su propia capa y los mensajes no llegarían a los sockets de
+# los demás. Fuera de DEBUG, CHANNEL_REDIS_URL es obligatorio.
+if os.environ.get('CHANNEL_REDIS_URL'):
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [os.environ['CHANNEL_REDIS_URL']]},
+        }
+    }
+elif DEBUG:
+    CHANNEL_LAYERS = {
+        'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}
+    }
+else:
+    raise ImproperlyConfigured(
+        'CHANNEL_REDIS_URL es obligatorio con DEBUG=False: la capa en memoria '
+        'no comparte mensajes entre workers.'
+    )
+
+# ==================== NOTIFICACIONES ====================
+# True: las notificaciones se escriben en un pool de hilos después del commit
+NOTIFICACIONES_ASINCRONAS = os.environ.get('NOTIFICACIONES_ASINCRONAS', '0') == '1'
+NOTIFICACIONES_WORKERS = 2
+
+# ==================== BARREDOR DE PUBLICACIONES ====================
+# Desactiva publicaciones viejas y elimina las inactivas hace mucho.
+# Por defecto corre con `manage.py barrer_publicaciones` en cron. Con
+# INTERVALO_SEGUNDOS > 0 también corre en un hilo de cada worker; en ambos
+# casos un lock (advisory en PostgreSQL, caché compartido en otro motor)
+# garantiza un solo barrido a la vez. LIDER_TTL_SEGUNDOS libera el lock de un
+# proceso que murió barriendo.
+BARREDOR = {
+    'DIAS_EXPIRACION': 30,
+    'DIAS_ELIMINACION': 180,
+    'LOTE': 500,
+    'PAUSA_ENTRE_LOTES': 0.05,
+    'INTERVALO_SEGUNDOS': int(os.environ.get('BARREDOR_INTERVALO_SEGUNDOS', 0)),
+    'LIDER_TTL_SEGUNDOS': 30 * 60,
 }
 
 # ==================== PASSWORD VALIDATION ====================
@@ -103,10 +242,39 @@ CORS_ALLOW_CREDENTIALS = True
 # ==================== REST FRAMEWORK & JWT ====================
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.JWTAuthenticationConCache',
     ),
 }
 
+# Cupo por scope (core.throttling): `capacidad` = ráfaga máxima,
+# `por_minuto` = tasa sostenida. Solo aplica a métodos de escritura.
+THROTTLE_BUCKETS = {
+    'mensajes': {
+        'usuario': {'capacidad': 20, 'por_minuto': 30},
+        'ip': {'capacidad': 60, 'por_minuto': 120},
+    },
+    'chats': {
+        'usuario': {'capacidad': 5, 'por_minuto': 10},
+        'ip': {'capacidad': 20, 'por_minuto': 30},
+    },
+    'reportes': {
+        'usuario': {'capacidad': 3, 'por_minuto': 5},
+        'ip': {'capacidad': 10, 'por_minuto': 15},
+    },
+    'registro': {
+        'ip': {'capacidad': 5, 'por_minuto': 2},
+    },
+}
+
+# Vigencia de las respuestas guardadas por Idempotency-Key (core.idempotencia)
+IDEMPOTENCIA_TTL_SEGUNDOS = 24 * 60 * 60
+
+# Cola de moderación (core.moderacion). Una publicación se oculta sola cuando
+# UMBRAL_OCULTAR estudiantes distintos tienen reportes pendientes sobre ella.
+MODERACION = {
+    'UMBRAL_OCULTAR': int(os.environ.get('MODERACION_UMBRAL_OCULTAR', '5')),
+}
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=15),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
@@ -126,7 +294,8 @@ DJOSER = {
     "SEND_ACTIVATION_EMAIL": True,   # habilita envío de correo de activación
     "SEND_CONFIRMATION_EMAIL": False,
 
-    "PASSWORD_RESET_SHOW_EMAIL_NOT_FOUND": True,
+    # 204 también para correos desconocidos: no revela qué cuentas existen
+    "PASSWORD_RESET_SHOW_EMAIL_NOT_FOUND": False,
     "PASSWORD_RESET_TIMEOUT": 1800,
 
     "SERIALIZERS": {
@@ -136,8 +305,29 @@ DJOSER = {
     },
 }
 
-    
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Confirmación de reset: tokens usados/inválidos y límite de intentos en caché
+RESET_CONFIRMACION = {
+    'TTL_TOKENS_RECHAZADOS': DJOSER['PASSWORD_RESET_TIMEOUT'],
+    'VENTANA_SEGUNDOS': 900,
+    'LIMITE_POR_UID': 5,
+    'LIMITE_POR_IP': 20,
+}
+
+# Los correos se encolan en accounts.CorreoSaliente y se entregan en segundo
+# plano con EMAIL_COLA['BACKEND_REAL'] (ver accounts.correo).
+EMAIL_BACKEND = 'accounts.backends.ColaEmailBackend'
+EMAIL_COLA = {
+    # En local/tests: django.core.mail.backends.console.EmailBackend o filebased
+    'BACKEND_REAL': os.environ.get('EMAIL_BACKEND_REAL', 'django.core.mail.backends.smtp.EmailBackend'),
+    # Por defecto los entrega `manage.py enviar_correos --continuo`; con
+    # EMAIL_WORKERS > 0 además corren esos hilos en cada proceso web.
+    'WORKERS': int(os.environ.get('EMAIL_WORKERS', 0)),
+    'LOTE': 20,
+    'MAX_INTENTOS': 5,
+    'BACKOFF_BASE_SEGUNDOS': 30,
+    'INTERVALO_SONDEO': 5,
+    'RECLAMO_VENCE_SEGUNDOS': 600,
+}
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
@@ -160,7 +350,8 @@ LOGGING = {
             'class': 'logging.StreamHandler',
             'formatter': 'verbose',
         },
-        'file': {
+        # `manage.py test` no escribe en el log versionado
+        'file': {'class': 'logging.NullHandler'} if sys.argv[1:2] == ['test'] else {
             'class': 'logging.FileHandler',
             'filename': 'password_reset_debug.log',
             'formatter': 'verbose',
@@ -1,14 +1,20 @@
 from django.contrib import admin
 from django.urls import path, include
-from accounts.views import PasswordResetConfirmView
+from accounts.views import PasswordResetConfirmView, PasswordResetView, RegistroViewSet
 
 urlpatterns = [
     path('admin/', admin.site.urls),
 
+    # Reset de contraseña en proceso (accounts.reset); van antes de djoser para tener prioridad
+    path("api/auth/users/reset_password/", PasswordResetView.as_view()),
+    path("api/auth/users/reset_password_confirm/", PasswordResetConfirmView.as_view()),
+
+    # Registro con throttling; el resto de /users/ sigue en el router de djoser
+    path("api/auth/users/", RegistroViewSet.as_view({"get": "list", "post": "create"})),
+
     # Rutas de autenticación con djoser
-    path('api/auth/', include('djoser.urls')),                # registro, activación, reset password, etc.
+    path('api/auth/', include('djoser.urls')),                # registro, activación, etc.
     path('api/auth/', include('djoser.urls.jwt')),    
-    path("api/auth/users/reset_password_confirm/", PasswordResetConfirmView.as_view()),
 
     # Rutas de tu aplicación core
     path('api/', include('core.urls')),
@@ -14,3 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'interu_backend.settings')
 
 application = get_wsgi_application()
+
+# Workers de correo y barredor periódico: solo arrancan si EMAIL_COLA['WORKERS']
+# y BARREDOR['INTERVALO_SEGUNDOS'] son > 0
+from accounts.correo import iniciar_workers  # noqa: E402
+from core.barredor import iniciar_barredor_periodico  # noqa: E402
+iniciar_workers()
+iniciar_barredor_periodico()
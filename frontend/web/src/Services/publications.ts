@@ -16,8 +16,9 @@ export const listarPublicaciones = async (filters: Record<string, any> = {}) =>
   });
 
   const url = `${API}/publicaciones/${params.toString() ? `?${params.toString()}` : ""}`;
-  const { data } = await axios.get(url);
-  return data as Publication[];
+  const { data } = await axios.get(url, { headers: authHeaders() });
+  // El feed viene paginado por cursor: { next, previous, results }
+  return (data.results ?? data) as Publication[];
 };
 
 export const obtenerPublicacion = async (id: number) => {